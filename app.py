@@ -1,16 +1,57 @@
 import os
 import logging
 from flask import Flask
+from template_cache import configure_templates
+from assets import configure_assets
+from compression import configure_compression
+from warmup import WARMUP, StartupTimings, warm_up
 
 # Configure logging for debugging
 logging.basicConfig(level=logging.DEBUG)
 
-# Create Flask application
+# Create Flask application (routes.py registers its views on this object)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 
-# Import routes after app creation to avoid circular imports
-from routes import *
+
+def create_app(warm=None):
+    """Configure the app, register its routes and warm up its caches (WARMUP unless warm is given)
+
+    Safe to call more than once; only the first call does the work. With
+    ``gunicorn --preload`` it runs in the master, so forked workers start warm.
+    """
+    if 'startup' in app.extensions:
+        return app
+    timings = app.extensions['startup'] = StartupTimings()
+
+    # Persistent template bytecode and the {% cache %} fragment tag
+    with timings.phase('templates'):
+        configure_templates(app)
+
+    # Fingerprinted, precompressed static files with immutable cache headers
+    with timings.phase('assets'):
+        configure_assets(app)
+
+    # gzip/brotli for rendered pages and API responses (runs after the routes' after_request hooks)
+    configure_compression(app)
+
+    # Import routes after app creation to avoid circular imports
+    with timings.phase('routes'):
+        import routes  # noqa: F401
+
+    # Compiled templates, form classes, blank workbooks and recent sessions before the first request
+    if WARMUP if warm is None else warm:
+        warm_up(app, timings)
+
+    @app.after_request
+    def record_first_response(response):
+        timings.response_sent()
+        return response
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Run as a script this module is __main__; the routes register on the importable app module
+    from app import create_app as create_registered_app
+    create_registered_app().run(host='0.0.0.0', port=5000, debug=True)
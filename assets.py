@@ -0,0 +1,335 @@
+"""Fingerprinted, minified and precompressed static assets.
+
+``build_assets`` minifies the scripts and stylesheets under ``static/``
+(including the per-step bundles in ``static/js/steps``), copies everything to
+``static/dist`` under content-hashed names such as ``js/main.3f2a9c1d0b.js``,
+writes ``.gz`` (and ``.br`` when the ``brotli`` package is installed) variants
+next to them and records the mapping in ``static/dist/manifest.json``.
+
+``configure_assets`` makes ``url_for('static', filename=...)`` resolve to the
+hashed file and serves hashed files with a one-year immutable
+``Cache-Control``, picking the precompressed variant the client accepts. A
+changed file gets a new name, so browsers never revalidate assets and repeat
+page loads only fetch the HTML. In debug mode the source files are served as
+before.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIST_DIR = 'dist'
+ASSETS_AUTO_BUILD = os.environ.get('ASSETS_AUTO_BUILD', '1') == '1'
+ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.txt', '.html')
+# Content-Encoding and file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Previous character (or keyword) after which a '/' starts a regular expression rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do',
+                   'else', 'yield', 'await')
+_WORD_TAIL = re.compile(r'[A-Za-z_$][\w$]*$')
+
+
+def minify_js(source):
+    """Drop comments, indentation, blank lines and repeated spaces from a script
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly as in
+    the source; strings, template literals and regular expressions are copied
+    unchanged.
+    """
+    out = []
+    i = 0
+    n = len(source)
+    # Open template literals: each entry is the brace depth of its current ${...} expression
+    templates = []
+    last = ''
+
+    def previous_allows_regex():
+        if not last:
+            return True
+        if last in _REGEX_PRECEDERS:
+            return True
+        word = _WORD_TAIL.search(''.join(out[-12:]).rstrip())
+        return bool(word) and word.group() in _REGEX_KEYWORDS
+
+    while i < n:
+        c = source[i]
+        if templates and templates[-1] is None:
+            # Inside the text of a template literal
+            if c == '\\':
+                out.append(source[i:i + 2])
+                i += 2
+            elif c == '`':
+                out.append(c)
+                templates.pop()
+                last = c
+                i += 1
+            elif source.startswith('${', i):
+                out.append('${')
+                templates[-1] = 0
+                i += 2
+            else:
+                out.append(c)
+                i += 1
+            continue
+        if c in '\'"':
+            end = i + 1
+            while end < n and source[end] != c and source[end] != '\n':
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            last = c
+            i = end + 1
+        elif c == '`':
+            out.append(c)
+            templates.append(None)
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            if out and out[-1] not in ' \n':
+                out.append(' ')
+        elif c == '/' and previous_allows_regex():
+            end = i + 1
+            in_class = False
+            while end < n and source[end] != '\n':
+                if source[end] == '\\':
+                    end += 2
+                    continue
+                if source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                elif source[end] == '/' and not in_class:
+                    break
+                end += 1
+            end += 1
+            while end < n and source[end].isalnum():
+                end += 1
+            out.append(source[i:end])
+            last = '/'
+            i = end
+        elif c == '\n':
+            while out and out[-1] == ' ':
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+            i += 1
+        elif c in ' \t\r':
+            if out and out[-1] not in ' \n':
+                out.append(' ')
+            i += 1
+        else:
+            if templates:
+                if c == '{':
+                    templates[-1] += 1
+                elif c == '}':
+                    if templates[-1] == 0:
+                        templates[-1] = None
+                        out.append(c)
+                        i += 1
+                        continue
+                    templates[-1] -= 1
+            out.append(c)
+            last = c
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source):
+    """Drop comments and the whitespace around braces, semicolons, commas and child combinators"""
+    out = []
+    i = 0
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"':
+            end = i + 1
+            while end < n and source[end] != c:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif c.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            if out and out[-1] not in '{};,>' and i < n and source[i] not in '{};,>':
+                out.append(' ')
+        else:
+            if c in '{};,>':
+                while out and out[-1] == ' ':
+                    out.pop()
+            if c == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css}
+
+
+def fingerprint(filename, content):
+    """File name with a hash of its content before the extension, e.g. js/main.3f2a9c1d0b.js"""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def iter_sources(static_folder):
+    """Static file names relative to static_folder, skipping the build output"""
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder and ASSETS_DIST_DIR in dirs:
+            dirs.remove(ASSETS_DIST_DIR)
+        dirs.sort()
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+
+
+def source_digest(static_folder):
+    """Hash of every source file's name and content, to tell whether the build is current"""
+    digest = hashlib.sha256()
+    for filename in iter_sources(static_folder):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            digest.update(filename.encode('utf-8') + b'\0' + f.read() + b'\0')
+    return digest.hexdigest()
+
+
+def build_assets(static_folder):
+    """Write minified, fingerprinted and compressed copies of the static files and their manifest"""
+    dist = os.path.join(static_folder, ASSETS_DIST_DIR)
+    previous = load_manifest(static_folder) or {}
+    files = {}
+    for filename in iter_sources(static_folder):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            content = f.read()
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in MINIFIERS:
+            content = MINIFIERS[ext](content.decode('utf-8')).encode('utf-8')
+        hashed = fingerprint(filename, content)
+        _write_file(os.path.join(dist, hashed), content)
+        entry = {'path': f'{ASSETS_DIST_DIR}/{hashed}', 'size': len(content), 'encodings': []}
+        if ext in COMPRESSIBLE_EXTENSIONS:
+            for encoding, suffix in ENCODINGS:
+                compressed = _compress(encoding, content)
+                if compressed is not None and len(compressed) < len(content):
+                    _write_file(os.path.join(dist, hashed + suffix), compressed)
+                    entry['encodings'].append(encoding)
+        files[filename] = entry
+    manifest = {'source_digest': source_digest(static_folder), 'files': files}
+    _write_file(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    _prune(dist, [manifest, previous])
+    return manifest
+
+
+def _compress(encoding, content):
+    if encoding == 'gzip':
+        return gzip.compress(content, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(content, quality=11)
+    return None
+
+
+def _prune(dist, manifests):
+    """Remove build output referenced by neither the new nor the previous manifest
+
+    The previous build is kept so pages rendered just before a deploy can still
+    load their assets.
+    """
+    keep = {MANIFEST_NAME}
+    for manifest in manifests:
+        for entry in manifest.get('files', {}).values():
+            name = entry['path'][len(ASSETS_DIST_DIR) + 1:]
+            keep.add(name)
+            keep.update(name + suffix for encoding, suffix in ENCODINGS if encoding in entry['encodings'])
+    for root, _, names in os.walk(dist):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, dist).replace(os.sep, '/') not in keep:
+                os.remove(path)
+
+
+def _write_file(path, content):
+    """Write via a temp file and rename, so concurrently starting workers never serve partial files"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_manifest(static_folder):
+    """The last build's manifest, or None"""
+    try:
+        with open(os.path.join(static_folder, ASSETS_DIST_DIR, MANIFEST_NAME), 'rb') as f:
+            return json.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def configure_assets(app):
+    """Build the assets if they are stale, rewrite static URLs to the hashed files and serve them"""
+    manifest = load_manifest(app.static_folder)
+    if ASSETS_AUTO_BUILD and (manifest is None or manifest.get('source_digest') != source_digest(app.static_folder)):
+        try:
+            manifest = build_assets(app.static_folder)
+            logger.info('Built %d static assets', len(manifest['files']))
+        except OSError:
+            logger.exception('Static asset build failed; serving unversioned files')
+    files = (manifest or {}).get('files', {})
+    hashed = {entry['path']: entry for entry in files.values()}
+    app.extensions['assets'] = {'files': files, 'hashed': hashed, 'digest': (manifest or {}).get('source_digest')}
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and not app.debug:
+            entry = files.get(values.get('filename'))
+            if entry is not None:
+                values['filename'] = entry['path']
+
+    send_static_file = app.view_functions['static']
+
+    def static(filename):
+        entry = hashed.get(filename)
+        if entry is None:
+            return send_static_file(filename=filename)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = next((encoding for encoding, _ in ENCODINGS
+                         if encoding in entry['encodings'] and encoding in request.accept_encodings), None)
+        suffix = dict(ENCODINGS)[encoding] if encoding else ''
+        response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype,
+                                       download_name=os.path.basename(filename), max_age=ASSET_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,179 @@
+"""Coalescing buffer for autosaved wizard fields.
+
+The wizard pages send small batches of changed fields while the user types
+(``/api/ramp-form/step/<n>/autosave``). Writing each batch would bump the
+session's generation and invalidate every worker's cached copy several times a
+second, so batches are merged per session in memory and written with a single
+``SessionStore.patch`` once the oldest unwritten change is ``AUTOSAVE_INTERVAL``
+seconds old.
+
+Every batch carries a client id (one per open page) and a sequence number.
+The last sequence number written for each client is kept in the session's
+``autosave`` fragment, so retried or reordered batches are ignored even when
+another worker handled the newer one.
+
+Buffered changes only live in the worker that received them. The routes flush
+a session's buffered changes before any other request reads or saves that
+session in the same worker. Other workers see them within the interval.
+
+A full save of a step (or deleting the session) in another worker must not be
+undone by an older batch still buffered here. Full saves therefore write a new
+token to the ``saved`` fragment (``AutosaveBuffer.supersede``); each batch
+remembers the token the session had when it was buffered and is dropped at
+flush if the token changed or the session is gone. A session's first batch is
+written straight away, so every buffered batch belongs to a stored session.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_INTERVAL = float(os.environ.get('AUTOSAVE_INTERVAL', 2.0))
+AUTOSAVE_FRAGMENT = 'autosave'
+SAVED_FRAGMENT = 'saved'
+
+
+class AutosaveBuffer:
+    """Per-process buffer merging autosaved changes into one session write per interval"""
+
+    def __init__(self, store, interval=AUTOSAVE_INTERVAL):
+        self.store = store
+        self.interval = interval
+        # session_uuid -> {'fragments': {name: changes}, 'seqs': {client: seq}, 'since': monotonic time,
+        #                  'saved': the session's full-save token when buffered, 'new': session not stored yet}
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Held while a batch is written, so an older batch never lands after a newer one
+        self._write_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+
+        self.batches = 0
+        self.stale = 0
+        self.writes = 0
+        self.superseded = 0
+
+        atexit.register(self.flush_all)
+
+    def add(self, session_uuid, client, seq, fragments):
+        """Buffer one batch of {fragment: changes}; returns False if seq is not newer than the client's last"""
+        stored = self.store.get(session_uuid)
+        written = stored.get(AUTOSAVE_FRAGMENT, {}).get(client, 0)
+        with self._lock:
+            pending = self._pending.get(session_uuid)
+            last = max(written, pending['seqs'].get(client, 0) if pending else 0)
+            if seq <= last:
+                self.stale += 1
+                return False
+            if pending is None:
+                pending = self._pending[session_uuid] = {'fragments': {}, 'seqs': {}, 'since': time.monotonic(),
+                                                         'saved': stored.get(SAVED_FRAGMENT), 'new': not stored}
+            for name, changes in fragments.items():
+                pending['fragments'].setdefault(name, {}).update(changes)
+            pending['seqs'][client] = seq
+            self.batches += 1
+        metrics.inc('wfm_autosave_batches_total')
+        if not stored:
+            self.flush(session_uuid)
+        self._ensure_flusher()
+        return True
+
+    def supersede(self, session_uuid):
+        """Drop a session's buffered changes ahead of a full save; returns the fragments to write with it
+
+        The new token makes other workers drop the batches they buffered before the save.
+        """
+        self.discard(session_uuid)
+        return {SAVED_FRAGMENT: {'token': uuid.uuid4().hex}}
+
+    def has_pending(self, session_uuid=None):
+        """Whether anything (or anything for one session) is waiting to be written"""
+        with self._lock:
+            return bool(self._pending) if session_uuid is None else session_uuid in self._pending
+
+    def flush(self, session_uuid):
+        """Write a session's buffered changes now"""
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending.pop(session_uuid, None)
+            if pending is None:
+                return False
+            fragments = dict(pending['fragments'])
+            fragments[AUTOSAVE_FRAGMENT] = pending['seqs']
+            try:
+                stored = self.store.get(session_uuid)
+                if stored.get(SAVED_FRAGMENT) != pending['saved'] or not (stored or pending['new']):
+                    # Saved in full or deleted since the batch was buffered
+                    with self._lock:
+                        self.superseded += 1
+                    return False
+                self.store.patch(session_uuid, fragments)
+            except Exception:
+                logger.exception('Failed to write autosaved changes for session %s', session_uuid)
+                self._requeue(session_uuid, pending)
+                return False
+            self.writes += 1
+        metrics.inc('wfm_autosave_writes_total')
+        return True
+
+    def discard(self, session_uuid):
+        """Drop a session's buffered changes (the session is being deleted)"""
+        with self._write_lock, self._lock:
+            self._pending.pop(session_uuid, None)
+
+    def flush_due(self):
+        """Write every session whose oldest buffered change has waited a full interval"""
+        cutoff = time.monotonic() - self.interval
+        with self._lock:
+            due = [session_uuid for session_uuid, pending in self._pending.items() if pending['since'] <= cutoff]
+        for session_uuid in due:
+            self.flush(session_uuid)
+
+    def flush_all(self):
+        """Write everything buffered"""
+        with self._lock:
+            sessions = list(self._pending)
+        for session_uuid in sessions:
+            self.flush(session_uuid)
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'batches': self.batches, 'stale': self.stale,
+                    'writes': self.writes, 'superseded': self.superseded}
+
+    def _requeue(self, session_uuid, pending):
+        """Put a batch that failed to write back, under any changes buffered since"""
+        with self._lock:
+            newer = self._pending.get(session_uuid)
+            if newer is not None:
+                for name, changes in newer['fragments'].items():
+                    pending['fragments'].setdefault(name, {}).update(changes)
+                pending['seqs'].update(newer['seqs'])
+            self._pending[session_uuid] = pending
+
+    def _ensure_flusher(self):
+        """Start the background thread in this process if it is not running"""
+        # Threads do not survive a fork, so gunicorn --preload workers start their own
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='autosave-flusher', daemon=True)
+            self._flusher_pid = os.getpid()
+            self._flusher.start()
+
+    def _run_flusher(self):
+        pid = os.getpid()
+        while pid == os.getpid():
+            time.sleep(self.interval / 4)
+            try:
+                self.flush_due()
+            except Exception:
+                logger.exception('Autosave flush failed')
@@ -0,0 +1,281 @@
+"""Micro-benchmarks for the code every wizard request runs.
+
+Each benchmark times one hot path (step data save/load, server session
+load/save, step field lookup, form construction, submission appends against a
+log of 1k/10k/100k records, date choices) inside a Flask test request context,
+with the app pointed at a scratch data directory. Results are per-call
+microseconds (best and median of several timed rounds).
+
+    python benchmarks.py --save-baseline        # record benchmark_baseline.json
+    python benchmarks.py                        # compare against it
+    python benchmarks.py --only session --max-regression 0.1
+
+Compared runs print the change per benchmark and exit with status 1 when any
+median is slower than the baseline by more than ``--max-regression``.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+BASELINE_FILE = 'benchmark_baseline.json'
+SUBMISSION_LOG_SIZES = (1000, 10000, 100000)
+COUNTRY_CODES = ('CAN', 'COL', 'HKG', 'IND', 'MEX', 'PAN', 'PHL', 'POL', 'TTO', 'USA')
+SITES_PER_COUNTRY = 3
+
+BENCHMARKS = []
+
+
+def benchmark(name, step=None):
+    """Register a benchmark: fn() sets up state and returns the callable to time
+
+    The setup and the timed calls run inside one request context: a POST of
+    ``step``'s form data when given, otherwise a plain GET of step 1. They share
+    one session, like a user's consecutive requests.
+    """
+    def register(fn):
+        BENCHMARKS.append((name, step, fn))
+        return fn
+    return register
+
+
+def step_form_data(step):
+    """Form fields a user posts for a wizard step"""
+    start = datetime.now().date() + timedelta(days=30)
+    if step == 1:
+        return {'business_type': 'new_business', 'client_name': 'Benchmark Client',
+                'ramp_start_date': start.isoformat(), 'ramp_end_date': (start + timedelta(weeks=26)).isoformat(),
+                'ramp_requirement': '250', 'ramp_requirement_type': 'HC', 'action': 'save'}
+    if step == 3:
+        data = {'recruitment_lead_time': '21', 'hiring_capacity_weekly': '15', 'hiring_capacity_monthly': '60',
+                'site_config_needed': 'yes', 'action': 'save'}
+        for code in COUNTRY_CODES:
+            data[f'sites_count_{code}'] = str(SITES_PER_COUNTRY)
+            for site in range(1, SITES_PER_COUNTRY + 1):
+                data[f'site_location_{code}_site{site}'] = f'{code} Site {site}'
+                data[f'agent_profile_{code}_site{site}'] = 'Tier 1'
+                data[f'lead_time_{code}_site{site}'] = '14'
+                data[f'weekly_capacity_{code}_site{site}'] = '12'
+                data[f'monthly_capacity_{code}_site{site}'] = '48'
+        return data
+    raise ValueError(f'No benchmark data for step {step}')
+
+
+def sample_submission():
+    """A ramp submission shaped like the ones the wizard stores"""
+    record = {key: value for key, value in step_form_data(1).items() if key != 'action'}
+    record.update({'geo_country': list(COUNTRY_CODES), 'batch_size': '20', 'training_duration': 'weeks',
+                   'training_duration_number': '3', 'submission_type': 'ramp',
+                   'timestamp': datetime.now().isoformat()})
+    record.update({f'{code.lower()}_headcount': 25 for code in COUNTRY_CODES})
+    record['sites_config'] = {key: value for key, value in step_form_data(3).items()
+                              if key.startswith(('sites_count_', 'site_location_', 'weekly_capacity_'))}
+    return record
+
+
+def seed_submissions(total):
+    """Grow the submission log to ``total`` records by writing segments directly, then index them"""
+    from submission_index import sync_index
+    from submission_store import (SEGMENT_MAX_BYTES, SUBMISSIONS_DIR, encode_record, iter_submissions,
+                                  list_segments, segment_path)
+    existing = sum(1 for _ in iter_submissions())
+    if existing >= total:
+        return existing
+    os.makedirs(SUBMISSIONS_DIR, exist_ok=True)
+    line = encode_record(sample_submission())
+    segments = list_segments()
+    number = segments[-1] if segments else 1
+    f = open(segment_path(number), 'ab')
+    try:
+        for _ in range(total - existing):
+            if f.tell() and f.tell() + len(line) > SEGMENT_MAX_BYTES:
+                f.close()
+                number += 1
+                f = open(segment_path(number), 'ab')
+            f.write(line)
+    finally:
+        f.close()
+    sync_index()
+    return total
+
+
+@benchmark('get_form_fields_for_step')
+def bench_form_fields():
+    from routes import get_form_fields_for_step
+    return lambda: get_form_fields_for_step(3)
+
+
+@benchmark('generate_date_choices')
+def bench_date_choices():
+    from routes import generate_date_choices
+    return generate_date_choices
+
+
+@benchmark('RampInputForm()')
+def bench_full_form():
+    from forms import RampInputForm
+    return RampInputForm
+
+
+@benchmark('step form (step 3)')
+def bench_step_form():
+    from form_schema import STEP_FORMS
+    return STEP_FORMS[3]
+
+
+@benchmark('save_step_data (step 1)', step=1)
+def bench_save_step_1():
+    from form_schema import STEP_FORMS
+    from routes import save_step_data
+    return lambda: save_step_data(1, STEP_FORMS[1]())
+
+
+@benchmark('save_step_data (step 3, 30 sites)', step=3)
+def bench_save_step_3():
+    from form_schema import STEP_FORMS
+    from routes import save_step_data
+    return lambda: save_step_data(3, STEP_FORMS[3]())
+
+
+@benchmark('load_step_data (step 3)', step=3)
+def bench_load_step_3():
+    from form_schema import STEP_FORMS
+    from routes import load_step_data, save_step_data
+    save_step_data(3, STEP_FORMS[3]())
+    return lambda: load_step_data(3, STEP_FORMS[3]())
+
+
+@benchmark('load_server_session')
+def bench_load_session():
+    from routes import get_session_uuid, load_server_session, save_server_session
+    save_server_session(get_session_uuid(), {'step1': step_form_data(1)})
+    return lambda: load_server_session(get_session_uuid())
+
+
+@benchmark('save_server_session')
+def bench_save_session():
+    from routes import get_session_uuid, save_server_session
+    document = {'step1': step_form_data(1), 'sites_config': step_form_data(3)}
+    return lambda: save_server_session(get_session_uuid(), document)
+
+
+def bench_save_submission(size):
+    def setup():
+        from routes import save_submission
+        seed_submissions(size)
+        record = sample_submission()
+        return lambda: save_submission(dict(record))
+    return setup
+
+
+for _size in SUBMISSION_LOG_SIZES:
+    benchmark(f'save_submission ({_size // 1000}k records)')(bench_save_submission(_size))
+
+
+def measure(fn, rounds=5, min_round_time=0.2):
+    """Per-call seconds for each timed round, with the loop count calibrated to min_round_time"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_round_time or number >= 1000000:
+            break
+        number = max(number * 2, int(number * min_round_time / max(elapsed, 1e-9) * 1.1))
+    return [elapsed / number] + [timer.timeit(number) / number for _ in range(rounds - 1)], number
+
+
+def run_benchmarks(only=None, rounds=5, min_round_time=0.2):
+    """Run the registered benchmarks in a scratch directory and return their results"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    directory = tempfile.mkdtemp(prefix='benchmarks-')
+    previous = os.getcwd()
+    os.chdir(directory)
+    sys.path.insert(0, root)
+    try:
+        from app import create_app
+        app = create_app(warm=False)
+        app.config['WTF_CSRF_ENABLED'] = False
+        logging.getLogger().setLevel(logging.WARNING)
+        results = {}
+        for name, step, setup in BENCHMARKS:
+            if only and not any(word.lower() in name.lower() for word in only):
+                continue
+            if step is None:
+                context = app.test_request_context('/ramp-form/step/1')
+            else:
+                context = app.test_request_context(f'/ramp-form/step/{step}', method='POST', data=step_form_data(step))
+            with context:
+                fn = setup()
+                samples, number = measure(fn, rounds=rounds, min_round_time=min_round_time)
+            results[name] = {
+                'best_us': round(min(samples) * 1e6, 3),
+                'median_us': round(statistics.median(samples) * 1e6, 3),
+                'loops': number,
+            }
+            print(f"{name:<40} {results[name]['median_us']:>12.2f} us  (best {results[name]['best_us']:.1f}, "
+                  f"{number} loops x {rounds})")
+        return results
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline, max_regression):
+    """Print the change against the baseline and return the names of regressed benchmarks"""
+    regressions = []
+    print()
+    print(f"{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, figures in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            print(f"{name:<40} {'-':>12} {figures['median_us']:>12.2f} {'new':>8}")
+            continue
+        change = figures['median_us'] / before['median_us'] - 1 if before['median_us'] else 0.0
+        flag = ''
+        if change > max_regression:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<40} {before['median_us']:>12.2f} {figures['median_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the session and step-data hot paths')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f'baseline JSON file (default {BASELINE_FILE})')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--only', nargs='*', help='run benchmarks whose names contain any of these words')
+    parser.add_argument('--rounds', type=int, default=5, help='timed rounds per benchmark')
+    parser.add_argument('--min-round-time', type=float, default=0.2, help='minimum seconds per round')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='fail when a median is this fraction slower than the baseline (default 0.2)')
+    args = parser.parse_args(argv)
+    baseline_path = os.path.abspath(args.baseline)
+
+    results = run_benchmarks(args.only, rounds=args.rounds, min_round_time=args.min_round_time)
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump({'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'results': results}, f, indent=2, sort_keys=True)
+        print(f'Baseline written to {baseline_path}')
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f'No baseline at {baseline_path}; run with --save-baseline to record one')
+        return 0
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.max_regression)
+    for name in regressions:
+        print(f'FAIL {name} regressed by more than {args.max_regression:.0%}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
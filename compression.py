@@ -0,0 +1,67 @@
+"""Compression of dynamic responses according to the client's Accept-Encoding.
+
+Rendered pages, JSON and CSV responses of at least ``COMPRESS_MIN_BYTES`` are
+compressed with brotli (when the ``brotli`` package is installed) or gzip.
+Streamed responses, files sent with ``send_file`` (the fingerprinted static
+files are already precompressed), responses that already have a
+Content-Encoding and ``Cache-Control: no-transform`` responses are left alone.
+Strong ETags become weak, since the compressed bytes differ from the
+uncompressed ones.
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'application/xml', 'image/svg+xml',
+}
+
+
+def choose_encoding(accept_encodings):
+    """Preferred encoding the client accepts, or None"""
+    if brotli is not None and 'br' in accept_encodings:
+        return 'br'
+    if 'gzip' in accept_encodings:
+        return 'gzip'
+    return None
+
+
+def compress_response(request, response):
+    """Compress a buffered response in place when it is worth it and the client accepts it"""
+    if (request.method == 'HEAD' or response.status_code in (204, 206, 304) or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or response.cache_control.no_transform):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=min(COMPRESS_LEVEL, 11))
+    else:
+        compressed = gzip.compress(data, compresslevel=min(COMPRESS_LEVEL, 9), mtime=0)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def configure_compression(app):
+    """Compress the app's responses; registered first, so it runs after every other after_request hook"""
+    @app.after_request
+    def compress(response):
+        return compress_response(request, response)
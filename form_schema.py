@@ -0,0 +1,53 @@
+"""Field-schema registry for the multi-step ramp form.
+
+``RampInputForm`` declares every field once. At import time this module derives a
+small FlaskForm subclass per wizard step containing only the fields that step
+saves or renders, so a request binds a handful of fields instead of ~60. The
+per-step field lists and the set of date fields are precomputed here as well.
+"""
+from flask_wtf import FlaskForm
+from wtforms import DateField
+
+from forms import RampInputForm
+
+# Fields saved to the session by each step
+STEP_FIELDS = {
+    1: ('business_type', 'existing_business_select', 'client_name', 'ramp_start_date', 'ramp_end_date',
+        'ramp_requirement', 'ramp_requirement_type'),
+    2: ('requirement_type', 'requirement_value', 'geo_country', 'can_headcount', 'col_headcount',
+        'hkg_headcount', 'ind_headcount', 'mex_headcount', 'pan_headcount', 'phl_headcount',
+        'pol_headcount', 'tto_headcount', 'usa_headcount'),
+    3: ('recruitment_lead_time', 'hiring_capacity_weekly', 'hiring_capacity_monthly', 'recruitment_notes'),
+    4: ('lob_count', 'lob_names', 'languages_supported', 'specify_languages', 'voice_inbound', 'voice_outbound',
+        'chat', 'email', 'back_office', 'social_sms', 'others', 'others_text'),
+    5: ('ramp_start_availability', 'ramp_end_availability',
+        'client_trainer', 'internal_trainer', 'total_trainers', 'training_duration',
+        'training_duration_number', 'nesting_duration', 'nesting_duration_number', 'batch_size'),
+    6: ('supervisor_ratio', 'qa_ratio', 'trainer_ratio'),
+    7: (),  # Submit step has no form fields, just review and submit
+}
+
+# Fields a step's template renders without saving them in that step
+TEMPLATE_EXTRA_FIELDS = {
+    1: ('ramp_start_availability', 'ramp_end_availability'),
+    4: ('batch_size', 'training_duration', 'training_duration_number', 'nesting_duration',
+        'nesting_duration_number', 'lob_language_channel_data'),
+}
+
+# All fields declared on the full form, in declaration order
+ALL_FIELDS = tuple(name for name, _ in sorted(
+    ((name, value) for name, value in vars(RampInputForm).items() if hasattr(value, 'field_class')),
+    key=lambda item: item[1].creation_counter))
+
+DATE_FIELDS = frozenset(name for name in ALL_FIELDS if issubclass(getattr(RampInputForm, name).field_class, DateField))
+
+
+def build_step_form(step):
+    """Derive a FlaskForm subclass holding only the fields a step needs"""
+    names = STEP_FIELDS[step] + tuple(n for n in TEMPLATE_EXTRA_FIELDS.get(step, ()) if n not in STEP_FIELDS[step])
+    attrs = {name: getattr(RampInputForm, name) for name in names}
+    attrs['__doc__'] = f'Fields for step {step} of the ramp form'
+    return type(f'RampStep{step}Form', (FlaskForm,), attrs)
+
+
+STEP_FORMS = {step: build_step_form(step) for step in STEP_FIELDS}
@@ -0,0 +1,294 @@
+"""Local background jobs for work too slow to run inside a request.
+
+Jobs are recorded in a SQLite table under ``JOBS_DIR`` so any gunicorn worker can
+report on them, and run on a small thread pool in the worker that accepted them.
+Handlers receive a ``JobContext`` for progress reports, cooperative cancellation
+and result files. Finished jobs and their result files are deleted after
+``JOB_RETENTION`` seconds; jobs left queued or running by a worker that has died
+are marked failed when the job is next read or when a worker starts its pool.
+No external broker is involved.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from processes import pid_alive
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.environ.get('JOBS_DIR', 'jobs')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 24 * 3600))
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+PROGRESS_INTERVAL = 0.5
+CLEANUP_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL,
+    message TEXT,
+    params TEXT,
+    result TEXT,
+    result_path TEXT,
+    result_mimetype TEXT,
+    result_filename TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, finished_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobContext:
+    """Handle passed to job handlers for progress, cancellation and result files"""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+        self._last_report = 0.0
+        self._last_check = 0.0
+        self._cancelled = False
+
+    def progress(self, fraction=None, message=None, force=False):
+        """Record progress (0..1) and a status message, at most every PROGRESS_INTERVAL seconds"""
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self.queue._update(self.job_id, progress=fraction, message=message)
+
+    def cancelled(self):
+        """Whether cancellation was requested (checked against the job table periodically)"""
+        now = time.monotonic()
+        if not self._cancelled and now - self._last_check >= PROGRESS_INTERVAL:
+            self._last_check = now
+            row = self.queue._connection().execute(
+                'SELECT cancel_requested FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+            self._cancelled = bool(row and row[0])
+        return self._cancelled
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled"""
+        if self.cancelled():
+            raise JobCancelled()
+
+    def result_file(self, extension, mimetype, filename):
+        """Path to write the job's result file to; the file is served by the result endpoint"""
+        path = os.path.join(self.queue.results_dir, f'{self.job_id}.{extension}')
+        self.queue._update(self.job_id, result_path=path, result_mimetype=mimetype, result_filename=filename)
+        return path
+
+
+class JobQueue:
+    """Persistent job table plus a per-process thread pool that runs the jobs"""
+
+    def __init__(self, directory, workers=2, retention=24 * 3600):
+        self.db_path = os.path.join(directory, 'jobs.sqlite3')
+        self.results_dir = os.path.join(directory, 'results')
+        self.workers = workers
+        self.retention = retention
+        self.handlers = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._futures = {}
+        self._last_cleanup = 0.0
+
+    def handler(self, kind):
+        """Decorator registering the function that runs jobs of a kind: fn(context, **params)"""
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def _connection(self):
+        """Get this thread's connection, reconnecting after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(self.results_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _update(self, job_id, **values):
+        values = {key: value for key, value in values.items() if value is not None}
+        if not values:
+            return
+        assignments = ', '.join(f'{key} = ?' for key in values)
+        conn = self._connection()
+        with conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*values.values(), job_id))
+
+    def _ensure_executor(self):
+        """The thread pool for this process; a forked worker starts its own and recovers orphans"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+                self._executor_pid = os.getpid()
+                self._futures = {}
+                self.recover()
+            return self._executor
+
+    def submit(self, kind, **params):
+        """Queue a job and return its id"""
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        executor = self._ensure_executor()
+        job_id = uuid.uuid4().hex
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT INTO jobs (id, kind, status, progress, params, owner_pid, created_at) '
+                         'VALUES (?, ?, ?, 0, ?, ?, ?)',
+                         (job_id, kind, 'queued', json.dumps(params, default=str), os.getpid(), time.time()))
+        future = executor.submit(self._run, job_id, kind, params)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        self._maybe_cleanup()
+        return job_id
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id, kind, params):
+        conn = self._connection()
+        with conn:
+            started = conn.execute("UPDATE jobs SET status = 'running', started_at = ? "
+                                   "WHERE id = ? AND status = 'queued' AND cancel_requested = 0",
+                                   (time.time(), job_id)).rowcount
+        if not started:
+            self._finish(job_id, 'cancelled')
+            return
+        context = JobContext(self, job_id)
+        try:
+            result = self.handlers[kind](context, **params)
+        except JobCancelled:
+            self._finish(job_id, 'cancelled')
+        except ValueError as e:
+            # Bad input (unreadable workbook, invalid filter...) rather than a bug
+            logger.warning('Job %s (%s) failed: %s', job_id, kind, e)
+            self._finish(job_id, 'failed', error=str(e))
+        except Exception as e:
+            logger.exception('Job %s (%s) failed', job_id, kind)
+            self._finish(job_id, 'failed', error=str(e) or e.__class__.__name__)
+        else:
+            self._finish(job_id, 'succeeded', result=json.dumps(result, default=str), progress=1.0)
+
+    def _finish(self, job_id, status, **values):
+        """Move an active job to a finished status together with its result/error, in one statement"""
+        values = dict({key: value for key, value in values.items() if value is not None},
+                      status=status, finished_at=time.time())
+        assignments = ', '.join(f'{key} = ?' for key in values)
+        conn = self._connection()
+        with conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN ('queued', 'running')",
+                         (*values.values(), job_id))
+        if status != 'succeeded':
+            self._remove_result_file(job_id)
+
+    def get(self, job_id):
+        """Public view of a job, or None if unknown"""
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        if self._recover_row(row):
+            row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'progress': row['progress'],
+            'message': row['message'],
+            'error': row['error'],
+            'has_file': bool(row['result_path']) and row['status'] == 'succeeded',
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+
+    def result(self, job_id):
+        """(result value, file path, mimetype, filename) of a succeeded job"""
+        row = self._connection().execute(
+            'SELECT result, result_path, result_mimetype, result_filename FROM jobs WHERE id = ?',
+            (job_id,)).fetchone()
+        result = json.loads(row['result']) if row['result'] else None
+        return result, row['result_path'], row['result_mimetype'], row['result_filename']
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs in this process are dropped right away"""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                         (job_id,))
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job_id, 'cancelled')
+        return self.get(job_id)
+
+    def recover(self):
+        """Fail jobs left active by processes that no longer exist"""
+        conn = self._connection()
+        rows = conn.execute("SELECT id, status, owner_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        for row in rows:
+            self._recover_row(row)
+
+    def _recover_row(self, row):
+        """Fail one job row if it is active but its owning process is gone; returns whether it was"""
+        if row['status'] not in ACTIVE_STATUSES or row['owner_pid'] == os.getpid() or pid_alive(row['owner_pid']):
+            return False
+        self._finish(row['id'], 'failed', error='Interrupted: the worker running this job exited')
+        return True
+
+    def cleanup(self, now=None):
+        """Delete finished jobs (and their result files) older than the retention period"""
+        cutoff = (now or time.time()) - self.retention
+        conn = self._connection()
+        rows = conn.execute("SELECT id FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') "
+                            'AND finished_at < ?', (cutoff,)).fetchall()
+        for row in rows:
+            self._remove_result_file(row['id'])
+        with conn:
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(row['id'],) for row in rows])
+        return len(rows)
+
+    def _maybe_cleanup(self):
+        if time.monotonic() - self._last_cleanup >= CLEANUP_INTERVAL:
+            self._last_cleanup = time.monotonic()
+            try:
+                self.cleanup()
+            except (OSError, sqlite3.Error):
+                logger.exception('Job cleanup failed')
+
+    def _remove_result_file(self, job_id):
+        row = self._connection().execute('SELECT result_path FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row and row['result_path']:
+            try:
+                os.remove(row['result_path'])
+            except FileNotFoundError:
+                pass
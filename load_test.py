@@ -0,0 +1,401 @@
+"""End-to-end load test of the ramp and sizing wizards.
+
+Starts the app under a local gunicorn (in a scratch data directory, so the real
+submission log and sessions are untouched) unless ``--url`` points at a running
+server, then has ``--users`` simulated users repeat a journey concurrently:
+
+* steps 1 to 7 of the ramp wizard with save, next and previous actions, a
+  step 3 site configuration with ``--sites`` sites in every country, the step 7
+  review and the final submit
+* the sizing form with an intraday workbook attached
+* blank (conditional) and prefilled template downloads
+
+When it starts the server it also reports the cold start: seconds from
+launching gunicorn until the port accepts connections and until the first
+wizard page is served (``--preload`` warms the app once in the gunicorn master).
+
+Every request is timed under a label such as ``step3 save``. The report lists
+p50/p95/p99 per label and overall throughput; the run fails (exit status 1)
+when a percentile exceeds its budget or requests fail. Budgets default to
+``DEFAULT_BUDGETS`` and can be overridden per label::
+
+    python load_test.py --users 20 --journeys 5 --budget "step3 save:p95=300" --budget "*:p99=1500"
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+COUNTRY_CODES = ('CAN', 'COL', 'HKG', 'IND', 'MEX', 'PAN', 'PHL', 'POL', 'TTO', 'USA')
+PERCENTILES = ('p50', 'p95', 'p99')
+# Milliseconds per percentile; '*' applies to every label without its own entry
+DEFAULT_BUDGETS = {'*': {'p95': 1000, 'p99': 2500}}
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class Recorder:
+    """Latency samples per label, shared by all simulated users"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, label, seconds, ok):
+        with self.lock:
+            self.samples[label].append(seconds)
+            if not ok:
+                self.errors[label] += 1
+
+
+class User:
+    """One simulated browser: its own cookies, timing every request under a label"""
+
+    def __init__(self, base_url, recorder, number, sites):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.recorder = recorder
+        self.number = number
+        self.sites = sites
+        self.cookies = {}
+        self.random = random.Random(number)
+
+    def request(self, label, method, path, body=None, headers=None, expect=(200, 302)):
+        """Send a request and return (status, headers, body text)"""
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        started = time.perf_counter()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+            status = response.status
+            response_headers = response.getheaders()
+        except OSError:
+            self.recorder.add(label, time.perf_counter() - started, False)
+            return 0, [], ''
+        finally:
+            connection.close()
+        self.recorder.add(label, time.perf_counter() - started, status in expect)
+        for name, value in response_headers:
+            if name.lower() == 'set-cookie':
+                cookie_name, _, cookie_value = value.split(';', 1)[0].partition('=')
+                self.cookies[cookie_name.strip()] = cookie_value
+        return status, response_headers, data.decode('utf-8', 'replace')
+
+    def get_page(self, label, path):
+        """GET a page and return its CSRF token"""
+        _, _, text = self.request(label, 'GET', path)
+        match = CSRF_PATTERN.search(text)
+        return match.group(1) if match else ''
+
+    def post_form(self, label, path, fields, expect=(200, 302)):
+        body = urlencode(fields, doseq=True)
+        return self.request(label, 'POST', path, body=body, expect=expect,
+                            headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def post_multipart(self, label, path, fields, files, expect=(200, 302)):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, content) in files.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                         f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return self.request(label, 'POST', path, body=b''.join(parts), expect=expect,
+                            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+    def step_fields(self, step):
+        """Realistic form values for one wizard step"""
+        start = date.today() + timedelta(days=self.random.randint(14, 60))
+        if step == 1:
+            return {'business_type': 'new_business', 'client_name': f'Load Test {self.number}',
+                    'ramp_start_date': start.isoformat(), 'ramp_end_date': (start + timedelta(weeks=26)).isoformat(),
+                    'ramp_requirement': self.random.randint(50, 500), 'ramp_requirement_type': 'HC'}
+        if step == 2:
+            fields = {'requirement_type': 'headcount', 'requirement_value': 400, 'geo_country': list(COUNTRY_CODES)}
+            fields.update({f'{code.lower()}_headcount': self.random.randint(10, 80) for code in COUNTRY_CODES})
+            return fields
+        if step == 3:
+            fields = {'recruitment_lead_time': 21, 'hiring_capacity_weekly': 15, 'hiring_capacity_monthly': 60,
+                      'recruitment_notes': 'Load test', 'site_config_needed': 'yes'}
+            for code in COUNTRY_CODES:
+                fields[f'sites_count_{code}'] = self.sites
+                for site in range(1, self.sites + 1):
+                    fields[f'site_location_{code}_site{site}'] = f'{code} Site {site}'
+                    fields[f'agent_profile_{code}_site{site}'] = 'Tier 1'
+                    fields[f'lead_time_{code}_site{site}'] = self.random.randint(7, 30)
+                    fields[f'weekly_capacity_{code}_site{site}'] = self.random.randint(5, 20)
+                    fields[f'monthly_capacity_{code}_site{site}'] = self.random.randint(20, 80)
+            return fields
+        if step == 4:
+            return {'lob_count': 2, 'lob_names': 'Customer Service', 'languages_supported': 'bilingual',
+                    'specify_languages': 'English, Spanish', 'voice_inbound': 'y', 'chat': 'y', 'email': 'y'}
+        if step == 5:
+            return {'ramp_start_availability': 'available', 'ramp_end_availability': 'available',
+                    'client_trainer': '2', 'internal_trainer': '3', 'total_trainers': 5,
+                    'training_duration': 'weeks', 'training_duration_number': '3',
+                    'nesting_duration': 'weeks', 'nesting_duration_number': '2', 'batch_size': '20'}
+        if step == 6:
+            return {'supervisor_ratio': '1:15', 'qa_ratio': '1:20', 'trainer_ratio': '1:18'}
+        return {}
+
+    def ramp_journey(self):
+        """Steps 1 to 7 with saves, one step back and forth, then the final submit"""
+        self.request('clear session', 'GET', '/clear-session')
+        for step in range(1, 8):
+            path = f'/ramp-form/step/{step}'
+            token = self.get_page(f'step{step} get', path)
+            fields = dict(self.step_fields(step), csrf_token=token)
+            if step == 7:
+                break
+            if step in (3, 5) or self.random.random() < 0.3:
+                self.post_form(f'step{step} save', path, dict(fields, action='save'))
+            if step == 4:
+                # Go back to the site configuration and come forward again
+                self.post_form('step4 previous', path, dict(fields, action='previous'))
+                self.get_page('step3 get', '/ramp-form/step/3')
+            self.post_form(f'step{step} next', path, dict(fields, action='next'))
+        self.request('ramp plan', 'GET', '/ramp-form/plan')
+        self.post_form('submit', '/ramp-form/submit', {}, expect=(302,))
+
+    def sizing_journey(self, workbook):
+        """Sizing form with channel figures and an intraday workbook"""
+        token = self.get_page('sizing get', '/sizing-form')
+        fields = {'csrf_token': token, 'inbound_annual_calls': self.random.randint(100000, 900000),
+                  'inbound_aht': '6:30', 'inbound_sl': 80, 'inbound_asa': '0:20', 'chat_weekly_calls': 5000,
+                  'chat_aht': '8:00', 'attach_channel': 'inbound'}
+        self.post_multipart('sizing submit', '/sizing-form', fields, {'attach_volume': ('intraday.csv', workbook)},
+                            expect=(302,))
+
+    def template_journey(self):
+        """Blank template downloads (the repeat is conditional) and a prefilled one"""
+        template = self.random.choice(('monthly', 'weekly', 'intraday'))
+        _, headers, _ = self.request('template download', 'GET', f'/download-template/{template}')
+        etag = next((value for name, value in headers if name.lower() == 'etag'), None)
+        if etag:
+            self.request('template revalidate', 'GET', f'/download-template/{template}',
+                         headers={'If-None-Match': etag}, expect=(304,))
+        self.request('template prefilled', 'GET', '/download-template/intraday/prefilled?days=7')
+
+
+def intraday_workbook():
+    """CSV in the intraday template layout: 48 half-hour intervals of volume and AHT"""
+    lines = ['Time Interval,Volume,AHT (minutes)']
+    for interval in range(48):
+        volume = max(0, round(120 * (1 - abs(interval - 26) / 26) + random.random() * 10))
+        lines.append(f'{interval // 2:02d}:{30 * (interval % 2):02d},{volume},{6 + random.random():.2f}')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed):
+    """Per-label counts, errors and percentiles in milliseconds"""
+    labels = {}
+    for label, samples in recorder.samples.items():
+        ordered = sorted(samples)
+        labels[label] = {
+            'count': len(ordered),
+            'errors': recorder.errors[label],
+            'p50': round(percentile(ordered, 0.50) * 1000, 1),
+            'p95': round(percentile(ordered, 0.95) * 1000, 1),
+            'p99': round(percentile(ordered, 0.99) * 1000, 1),
+            'max': round(ordered[-1] * 1000, 1),
+        }
+    total = sum(item['count'] for item in labels.values())
+    return {
+        'requests': total,
+        'errors': sum(item['errors'] for item in labels.values()),
+        'elapsed': round(elapsed, 2),
+        'throughput': round(total / elapsed, 1) if elapsed else 0.0,
+        'labels': labels,
+    }
+
+
+def parse_budgets(values):
+    """DEFAULT_BUDGETS updated with 'label:p95=300' style overrides"""
+    budgets = {label: dict(limits) for label, limits in DEFAULT_BUDGETS.items()}
+    for value in values:
+        label, _, limit = value.rpartition(':')
+        name, _, milliseconds = limit.partition('=')
+        if not label or name not in PERCENTILES:
+            raise ValueError(f'Budget {value!r} should look like "step3 save:p95=300"')
+        budgets.setdefault(label, {})[name] = float(milliseconds)
+    return budgets
+
+
+def check_budgets(summary, budgets, max_error_rate):
+    """Messages for every percentile over budget and for an excessive error rate"""
+    failures = []
+    for label, figures in sorted(summary['labels'].items()):
+        limits = dict(budgets.get('*', {}), **budgets.get(label, {}))
+        for name, limit in limits.items():
+            if figures[name] > limit:
+                failures.append(f'{label}: {name} {figures[name]}ms exceeds budget {limit:g}ms')
+    if summary['requests'] and summary['errors'] / summary['requests'] > max_error_rate:
+        failures.append(f"{summary['errors']} of {summary['requests']} requests failed")
+    return failures
+
+
+def print_report(summary):
+    width = max([len(label) for label in summary['labels']] + [5])
+    print(f"{'label':<{width}}  {'count':>6} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, figures in sorted(summary['labels'].items()):
+        print(f"{label:<{width}}  {figures['count']:>6} {figures['errors']:>6} {figures['p50']:>8} "
+              f"{figures['p95']:>8} {figures['p99']:>8} {figures['max']:>8}")
+    print(f"{summary['requests']} requests, {summary['errors']} errors in {summary['elapsed']}s "
+          f"({summary['throughput']} req/s)")
+    if summary.get('cold_start'):
+        print(f"cold start: listening after {summary['cold_start']['listening']}s, "
+              f"first page after {summary['cold_start']['first_response']}s")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def first_response(base_url, path='/ramp-form/step/1'):
+    """GET a page, retrying until the server answers 200 or 30 seconds pass"""
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    sys.exit(f'{path} did not answer 200 within 30 seconds')
+
+
+def start_server(workers, threads, preload=False):
+    """Run the app under gunicorn in a scratch directory and return (process, url, directory, cold start)"""
+    if shutil.which('gunicorn') is None:
+        sys.exit('gunicorn is not installed; install it or pass --url of a running server')
+    directory = tempfile.mkdtemp(prefix='load-test-')
+    port = free_port()
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        ['gunicorn', '--workers', str(workers), '--threads', str(threads), '--bind', f'127.0.0.1:{port}',
+         '--chdir', directory, '--log-level', 'warning'] + (['--preload'] if preload else []) + ['main:app'],
+        env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit('gunicorn exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+        except OSError:
+            time.sleep(0.05)
+            continue
+        listening = time.perf_counter() - started
+        url = f'http://127.0.0.1:{port}'
+        first_response(url)
+        cold_start = {'listening': round(listening, 3), 'first_response': round(time.perf_counter() - started, 3)}
+        return process, url, directory, cold_start
+    process.terminate()
+    sys.exit('gunicorn did not start within 30 seconds')
+
+
+def run(base_url, users, journeys, sites, ramp_up):
+    """Run every user's journeys concurrently and return the summary"""
+    recorder = Recorder()
+    workbook = intraday_workbook()
+
+    def simulate(number):
+        time.sleep(ramp_up * number / max(users, 1))
+        user = User(base_url, recorder, number, sites)
+        for _ in range(journeys):
+            user.ramp_journey()
+            user.sizing_journey(workbook)
+            user.template_journey()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=simulate, args=(number,), daemon=True) for number in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(recorder, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the ramp and sizing wizards end to end')
+    parser.add_argument('--url', help='base URL of a running server (default: start gunicorn locally)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers when starting a server')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--preload', action='store_true', help='start gunicorn with --preload')
+    parser.add_argument('--users', type=int, default=20, help='concurrent simulated users')
+    parser.add_argument('--journeys', type=int, default=3, help='journeys per user')
+    parser.add_argument('--sites', type=int, default=3, help='sites per country in the step 3 configuration')
+    parser.add_argument('--ramp-up', type=float, default=2.0, help='seconds over which users start')
+    parser.add_argument('--budget', action='append', default=[], metavar='LABEL:PCT=MS',
+                        help='latency budget, e.g. "step3 save:p95=300" or "*:p99=1500" (repeatable)')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='fraction of requests allowed to fail')
+    parser.add_argument('--json', metavar='PATH', help='also write the summary as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as e:
+        parser.error(str(e))
+
+    process = directory = cold_start = None
+    base_url = args.url
+    if not base_url:
+        process, base_url, directory, cold_start = start_server(args.workers, args.threads, args.preload)
+    try:
+        summary = run(base_url, args.users, args.journeys, args.sites, args.ramp_up)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    summary['cold_start'] = cold_start
+    print_report(summary)
+    summary['budgets'] = budgets
+    summary['failures'] = check_budgets(summary, budgets, args.max_error_rate)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    for failure in summary['failures']:
+        print(f'FAIL {failure}')
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
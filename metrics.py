@@ -0,0 +1,280 @@
+"""Request, storage and template metrics in Prometheus text format.
+
+Each process records counters, gauges and histograms in memory (a dict update
+under a lock, so instrumentation stays cheap enough to leave on) and a
+background thread writes a snapshot to ``METRICS_DIR/<pid>.json`` every
+``METRICS_FLUSH_INTERVAL`` seconds. ``/metrics`` merges the snapshots of every
+gunicorn worker: counters and histograms are summed, gauges are summed over
+live processes only. Counters of workers that have exited are folded into
+``archive.json`` so totals keep increasing across worker restarts.
+"""
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from processes import pid_alive
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.environ.get('METRICS_DIR', 'metrics')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE_NAME = 'archive.json'
+
+# name: (type, help)
+METRICS = {
+    'wfm_http_request_duration_seconds': ('histogram', 'Request latency by route (and wizard step)'),
+    'wfm_template_render_seconds': ('histogram', 'Jinja template render time'),
+    'wfm_session_cache_hits_total': ('counter', 'Session cache hits'),
+    'wfm_session_cache_misses_total': ('counter', 'Session cache misses'),
+    'wfm_session_cache_evictions_total': ('counter', 'Sessions evicted from the cache to stay within its byte budget'),
+    'wfm_session_cache_bytes': ('gauge', 'Approximate size of cached sessions'),
+    'wfm_session_cache_entries': ('gauge', 'Sessions held in the cache'),
+    'wfm_fragment_cache_hits_total': ('counter', 'Template fragments served from the fragment cache'),
+    'wfm_fragment_cache_misses_total': ('counter', 'Template fragments rendered and added to the fragment cache'),
+    'wfm_autosave_batches_total': ('counter', 'Autosave batches accepted into the coalescing buffer'),
+    'wfm_autosave_writes_total': ('counter', 'Session writes made by flushing coalesced autosave batches'),
+    'wfm_startup_first_response_seconds': ('histogram', 'Seconds from start-up to each worker\'s first response'),
+    'wfm_storage_writes_total': ('counter', 'Session and submission writes'),
+    'wfm_storage_write_bytes_total': ('counter', 'Bytes written for sessions and submissions'),
+}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+class Registry:
+    """Per-process metric values with a periodic snapshot shared through the metrics directory"""
+
+    def __init__(self, directory, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher = None
+        self._reset()
+
+    def _reset(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        # A forked worker starts from zero instead of double counting its parent's values
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+                    self._flusher = None
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        self._check_pid()
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._ensure_flusher()
+
+    def set(self, name, value, **labels):
+        """Set a gauge, or a counter this process tracks elsewhere (collectors)"""
+        self._check_pid()
+        key = _key(name, labels)
+        with self._lock:
+            if METRICS[name][0] == 'gauge':
+                self._gauges[key] = value
+            else:
+                self._counters[key] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        """Record one observation in a histogram"""
+        self._check_pid()
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': list(buckets), 'counts': [0] * (len(buckets) + 1),
+                                                     'sum': 0.0, 'count': 0}
+            histogram['counts'][bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self._ensure_flusher()
+
+    def collector(self, fn):
+        """Register a function called before each snapshot to set values it tracks itself"""
+        self.collectors.append(fn)
+        return fn
+
+    def snapshot(self):
+        """This process's values as JSON-friendly lists"""
+        for fn in self.collectors:
+            try:
+                fn(self)
+            except Exception:
+                logger.exception('Metrics collector %s failed', getattr(fn, '__name__', fn))
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, dict(labels), value] for (name, labels), value in self._gauges.items()],
+                'histograms': [[name, dict(labels), dict(h, counts=list(h['counts']))]
+                               for (name, labels), h in self._histograms.items()],
+            }
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read"""
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(os.path.join(self.directory, f'{os.getpid()}.json'), self.snapshot())
+
+    def collect(self):
+        """Merged snapshot of every worker, folding exited workers into the archive"""
+        self.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, ARCHIVE_NAME)
+            archive = _read_json(archive_path) or {'counters': [], 'gauges': [], 'histograms': []}
+            live = []
+            dead = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json') or name == ARCHIVE_NAME:
+                    continue
+                snapshot = _read_json(os.path.join(self.directory, name))
+                if snapshot is None:
+                    continue
+                (live if pid_alive(snapshot.get('pid')) else dead).append((name, snapshot))
+            if dead:
+                archive = merge([archive] + [dict(snapshot, gauges=[]) for _, snapshot in dead])
+                _write_json(archive_path, archive)
+                for name, _ in dead:
+                    _remove(os.path.join(self.directory, name))
+        return merge([archive] + [snapshot for _, snapshot in live])
+
+    def render(self):
+        """Prometheus text exposition of the merged metrics"""
+        return render(self.collect())
+
+    def _ensure_flusher(self):
+        """Start the background snapshot thread in this process if it is not running"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='metrics-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        pid = os.getpid()
+        while pid == os.getpid():
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Metrics flush failed')
+
+
+def merge(snapshots):
+    """Sum counters, gauges and histograms across snapshots"""
+    counters = {}
+    gauges = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', ()):
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot.get('gauges', ()):
+            key = _key(name, labels)
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, histogram in snapshot.get('histograms', ()):
+            key = _key(name, labels)
+            merged = histograms.get(key)
+            if merged is None or merged['buckets'] != histogram['buckets']:
+                histograms[key] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+            merged['sum'] += histogram['sum']
+            merged['count'] += histogram['count']
+    return {
+        'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        'gauges': [[name, dict(labels), value] for (name, labels), value in gauges.items()],
+        'histograms': [[name, dict(labels), h] for (name, labels), h in histograms.items()],
+    }
+
+
+def _labels(labels, extra=None):
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    """Format a merged snapshot in the Prometheus text format"""
+    by_name = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for name, labels, value in snapshot[kind]:
+            by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name], key=lambda item: sorted(item[0].items())):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(value['buckets'] + ['+Inf'], value['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, ("le", bound))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+            lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _read_json(path):
+    try:
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path, value):
+    """Write JSON via a temp file and an atomic rename so readers never see partial files"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+
+# Shared by the web routes and the storage modules
+registry = Registry(METRICS_DIR)
+inc = registry.inc
+observe = registry.observe
@@ -0,0 +1,15 @@
+"""Helpers for state shared between gunicorn worker processes."""
+import os
+
+
+def pid_alive(pid):
+    """Whether a local process id still exists"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,256 @@
+"""Week-by-week ramp simulation from the wizard's form data.
+
+Each site hires up to its weekly capacity once its lead time has passed, until
+its share of the country headcount is reached. Hires go through training and
+nesting as cohorts, so the weekly pipeline is derived from the cumulative hires
+array by shifting it: agents in training at week w are the hires of the last
+``training`` weeks, nesting the ones before that, and everything older is
+production ready. Trainers, supervisors and QA follow from the step 6 ratios.
+Every series is a plain list over weeks, so a plan with dozens of sites is a
+few thousand list operations and cheap enough to rebuild on every summary view.
+"""
+import math
+from datetime import date, timedelta
+
+COUNTRY_CODES = ('CAN', 'COL', 'HKG', 'IND', 'MEX', 'PAN', 'PHL', 'POL', 'TTO', 'USA')
+SITE_METRICS = ('site_location', 'agent_profile', 'lead_time', 'weekly_capacity', 'monthly_capacity')
+SERIES = ('hires', 'classes', 'in_training', 'nesting', 'production', 'trainers', 'supervisors', 'qa')
+WORK_DAYS_PER_WEEK = 5
+WEEKS_PER_MONTH = 52 / 12
+MAX_WEEKS = 260
+
+
+def _to_int(value, default=0):
+    """Int from a form value, falling back to the default for blanks and junk"""
+    try:
+        return int(float(value)) if value not in (None, '') else default
+    except (ValueError, TypeError):
+        return default
+
+
+def parse_ratio(value):
+    """Agents per support role from a '1:15' style ratio (or a plain number); None when blank"""
+    if value in (None, ''):
+        return None
+    parts = str(value).split(':')
+    try:
+        if len(parts) == 1:
+            per_role = float(parts[0])
+        elif len(parts) == 2:
+            per_role = float(parts[1]) / float(parts[0])
+        else:
+            return None
+    except (ValueError, ZeroDivisionError):
+        return None
+    return per_role if per_role > 0 else None
+
+
+def duration_weeks(unit, number):
+    """Training/nesting length in weeks from the unit ('days'/'weeks') and number fields"""
+    number = _to_int(number)
+    if number <= 0:
+        return 0
+    if unit == 'days':
+        return math.ceil(number / WORK_DAYS_PER_WEEK)
+    return number
+
+
+def _parse_date(value):
+    """Date from an ISO string or date; None when blank or invalid"""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def country_targets(form_data):
+    """Headcount to ramp per selected country; the overall requirement when none is set"""
+    selected = form_data.get('geo_country') or []
+    if isinstance(selected, str):
+        selected = [selected]
+    targets = {}
+    for code in COUNTRY_CODES:
+        headcount = _to_int(form_data.get(f'{code.lower()}_headcount'))
+        if headcount > 0 and (not selected or code in selected):
+            targets[code] = headcount
+    if not targets:
+        requirement = _to_int(form_data.get('ramp_requirement')) or _to_int(form_data.get('requirement_value'))
+        if requirement > 0:
+            targets['ALL'] = requirement
+    return targets
+
+
+def country_sites(code, sites_config, form_data):
+    """Site definitions (name, location, weekly capacity, lead time in weeks) for a country"""
+    default_capacity = _to_int(form_data.get('hiring_capacity_weekly'))
+    if not default_capacity:
+        default_capacity = _to_int(form_data.get('hiring_capacity_monthly')) / WEEKS_PER_MONTH
+    default_lead_days = _to_int(form_data.get('recruitment_lead_time'))
+
+    def site(suffix, name):
+        capacity = _to_int(sites_config.get(f'weekly_capacity_{suffix}'))
+        if not capacity:
+            capacity = _to_int(sites_config.get(f'monthly_capacity_{suffix}')) / WEEKS_PER_MONTH
+        lead_days = _to_int(sites_config.get(f'lead_time_{suffix}')) or default_lead_days
+        return {
+            'site': name,
+            'location': sites_config.get(f'site_location_{suffix}') or None,
+            'weekly_capacity': capacity or default_capacity,
+            'lead_time_weeks': math.ceil(lead_days / 7),
+        }
+
+    count = _to_int(sites_config.get(f'sites_count_{code}'))
+    per_site = [f'{code}_site{n}' for n in range(1, max(count, 1) + 1)]
+    if count or any(f'{metric}_{per_site[0]}' in sites_config for metric in SITE_METRICS):
+        return [site(suffix, f'Site {n}') for n, suffix in enumerate(per_site, 1)]
+    return [site(code, 'All sites')]
+
+
+def split_target(target, capacities):
+    """Split a headcount across sites in proportion to their hiring capacity"""
+    total = sum(capacities)
+    if not total:
+        capacities = [1] * len(capacities)
+        total = len(capacities)
+    # Capacities from monthly figures are fractional; shares are whole headcount
+    shares = [math.floor(target * capacity / total) for capacity in capacities]
+    # Hand the rounding remainder to the largest sites first
+    for i in sorted(range(len(capacities)), key=lambda i: -capacities[i])[:target - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _shift(values, weeks):
+    """Series delayed by a number of weeks (zeros shifted in)"""
+    if weeks <= 0:
+        return values
+    return [0] * min(weeks, len(values)) + values[:max(len(values) - weeks, 0)]
+
+
+def _ratio_series(agents, per_role):
+    """Support headcount needed for an agent series at a ratio"""
+    if not per_role:
+        return [0] * len(agents)
+    return [math.ceil(round(count / per_role, 6)) for count in agents]
+
+
+def simulate_site(target, site, weeks, training, nesting, batch_size, ratios):
+    """Weekly series for one site over a horizon of ``weeks`` weeks"""
+    capacity = site['weekly_capacity']
+    hires = [0] * weeks
+    hired = 0
+    if capacity > 0:
+        # Fractional capacities (monthly figures) accumulate into whole hires
+        allowance = 0.0
+        for week in range(site['lead_time_weeks'], weeks):
+            if hired >= target:
+                break
+            allowance += capacity
+            count = min(int(allowance), target - hired)
+            allowance -= count
+            hires[week] = count
+            hired += count
+
+    cumulative = []
+    total = 0
+    for count in hires:
+        total += count
+        cumulative.append(total)
+    after_training = _shift(cumulative, training)
+    production = _shift(cumulative, training + nesting)
+    in_training = [a - b for a, b in zip(cumulative, after_training)]
+    in_nesting = [a - b for a, b in zip(after_training, production)]
+
+    class_size = batch_size or None
+    started = [math.ceil(count / class_size) if class_size else int(count > 0) for count in hires]
+    started_total = []
+    total = 0
+    for count in started:
+        total += count
+        started_total.append(total)
+    classes = [a - b for a, b in zip(started_total, _shift(started_total, training))] if training else [0] * weeks
+
+    floor = [a + b for a, b in zip(in_nesting, production)]
+    ready_week = next((week for week, count in enumerate(production) if count >= target), None)
+    return dict(site, **{
+        'target': target,
+        'hires': hires,
+        'classes': classes,
+        'in_training': in_training,
+        'nesting': in_nesting,
+        'production': production,
+        'trainers': _ratio_series(in_training, ratios['trainer']),
+        'supervisors': _ratio_series(floor, ratios['supervisor']),
+        'qa': _ratio_series(floor, ratios['qa']),
+        'ready_week': ready_week,
+    })
+
+
+def _sum_series(plans, weeks):
+    """Element-wise totals of every series across site or country plans"""
+    return {name: [sum(values) for values in zip(*(plan[name] for plan in plans))] if plans else [0] * weeks
+            for name in SERIES}
+
+
+def _horizon(start, end, sites, training, nesting):
+    """Weeks to simulate: to the ramp end, or until the slowest site could finish"""
+    weeks = math.ceil(((end - start).days + 1) / 7) if end and end >= start else 0
+    for target, site in sites:
+        if site['weekly_capacity'] > 0 and target:
+            weeks = max(weeks, site['lead_time_weeks'] + math.ceil(target / site['weekly_capacity'])
+                        + training + nesting + 1)
+    return min(max(weeks, 1), MAX_WEEKS)
+
+
+def simulate_ramp(form_data, sites_config=None):
+    """Week-by-week plan per country and site from merged wizard form data"""
+    sites_config = sites_config or {}
+    start = _parse_date(form_data.get('ramp_start_date')) or date.today()
+    end = _parse_date(form_data.get('ramp_end_date'))
+    training = duration_weeks(form_data.get('training_duration'), form_data.get('training_duration_number'))
+    nesting = duration_weeks(form_data.get('nesting_duration'), form_data.get('nesting_duration_number'))
+    batch_size = _to_int(form_data.get('batch_size'))
+    ratios = {
+        'trainer': parse_ratio(form_data.get('trainer_ratio')),
+        'supervisor': parse_ratio(form_data.get('supervisor_ratio')),
+        'qa': parse_ratio(form_data.get('qa_ratio')),
+    }
+
+    layout = {}
+    for code, target in country_targets(form_data).items():
+        sites = country_sites(code, sites_config, form_data)
+        shares = split_target(target, [site['weekly_capacity'] for site in sites])
+        layout[code] = (target, list(zip(shares, sites)))
+    weeks = _horizon(start, end, [pair for _, pairs in layout.values() for pair in pairs], training, nesting)
+
+    countries = {}
+    for code, (target, pairs) in layout.items():
+        site_plans = [simulate_site(share, site, weeks, training, nesting, batch_size, ratios) for share, site in pairs]
+        ready = [plan['ready_week'] for plan in site_plans]
+        countries[code] = {
+            'target': target,
+            'sites': site_plans,
+            'totals': _sum_series(site_plans, weeks),
+            'ready_week': None if None in ready else max(ready, default=0),
+        }
+
+    totals = _sum_series([country['totals'] for country in countries.values()], weeks)
+    ready = [country['ready_week'] for country in countries.values()]
+    ready_week = None if None in ready or not countries else max(ready)
+    ready_date = start + timedelta(weeks=ready_week) if ready_week is not None else None
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat() if end else None,
+        'weeks': [(start + timedelta(weeks=week)).isoformat() for week in range(weeks)],
+        'training_weeks': training,
+        'nesting_weeks': nesting,
+        'batch_size': batch_size or None,
+        'target': sum(country['target'] for country in countries.values()),
+        'countries': countries,
+        'totals': totals,
+        'ready_week': ready_week,
+        'ready_date': ready_date.isoformat() if ready_date else None,
+        'on_track': bool(ready_date and (end is None or ready_date <= end)),
+    }
@@ -1,30 +1,61 @@
+import functools
+import hashlib
+import io
 import json
 import os
+import re
+import sqlite3
+import threading
+import time
 import uuid
+import click
 from datetime import datetime, timedelta, date
-from flask import render_template, request, flash, redirect, url_for, jsonify, send_file, session
-from werkzeug.utils import secure_filename
+from flask import abort, render_template, request, flash, redirect, url_for, jsonify, send_file, session, Response, stream_with_context, g, make_response
+from flask import before_render_template, template_rendered
+from flask_wtf.csrf import validate_csrf
+from werkzeug.datastructures import MultiDict
+from wtforms.validators import ValidationError
 from app import app
+import metrics
+import warmup
 from forms import RampInputForm
+from forms_sizing import SizingForm
+from form_schema import STEP_FIELDS, STEP_FORMS, DATE_FIELDS
+from submission_store import SUBMISSION_TYPES, append_submission, iter_submissions
+from submission_index import index_submission, rebuild_index
+from session_store import SessionStore, FileSessionBackend, SqliteSessionBackend
+from workbook_import import CHANNELS, import_workbook, apply_import, WorkbookImportError
+from workbook_templates import TEMPLATES, XLSX_MIMETYPE, static_template, prefilled_template
+from ramp_plan import simulate_ramp
+from scenario_sweep import MAX_SYNC_TIME_BUDGET, check_limit, expand_grid, run_sweep, sweep_needs_job
+from staffing import staffing_plan, staffing_summary, DEFAULT_SL_SECONDS
+from submission_query import parse_query, iter_page, encode_cursor, query_etag
+from submission_export import iter_csv, iter_xlsx, write_csv, write_xlsx
+from template_cache import data_key
+from assets import build_assets
+from jobs import JobQueue, JOBS_DIR, JOB_WORKERS, JOB_RETENTION
+from autosave import AutosaveBuffer
+from upload_store import (UploadStore, UploadError, UploadTooLarge, UploadOffsetMismatch,
+                          UPLOADS_DIR, UPLOAD_MAX_BYTES, UPLOAD_PARTIAL_TTL)
 
 # Data storage files
-DATA_FILE = 'form_submissions.json'
 SESSIONS_DIR = 'server_sessions'
+EXPORT_FORMATS = ('csv', 'xlsx')
 
 def load_submissions():
-    """Load form submissions from JSON file"""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    """Load all form submissions from the submission log"""
+    return [record for _, record in iter_submissions()]
 
 def save_submission(data):
-    """Save form submission to JSON file"""
-    submissions = load_submissions()
+    """Append a form submission to the submission log"""
     data['timestamp'] = datetime.now().isoformat()
-    submissions.append(data)
-    with open(DATA_FILE, 'w') as f:
-        json.dump(submissions, f, indent=2)
+    position = append_submission(data)
+    try:
+        index_submission(position, data)
+    except sqlite3.Error:
+        # The log is the source of truth; the next query or rebuild catches the index up
+        app.logger.exception('Failed to index submission at %s', position)
+    return position
 
 def get_session_uuid():
     """Get or create server-side session UUID"""
@@ -33,37 +64,209 @@ def get_session_uuid():
         session.modified = True
     return session['session_uuid']
 
-def get_server_session_path(session_uuid):
-    """Get path for server-side session file"""
-    os.makedirs(SESSIONS_DIR, exist_ok=True)
-    return os.path.join(SESSIONS_DIR, f'{session_uuid}.json')
+def create_session_backend():
+    """Build the session backend selected by SESSION_BACKEND ('sqlite' or 'file')"""
+    backend = os.environ.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'file':
+        return FileSessionBackend(SESSIONS_DIR)
+    if backend == 'sqlite':
+        db_path = os.environ.get('SESSION_DB', os.path.join(SESSIONS_DIR, 'sessions.sqlite3'))
+        return SqliteSessionBackend(db_path, legacy_dir=SESSIONS_DIR)
+    raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
 
-# In-memory cache for fast session access
-_session_cache = {}
+# Bounded per-process session cache in front of the shared session backend
+session_store = SessionStore(
+    create_session_backend(),
+    max_bytes=int(os.environ.get('SESSION_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    idle_ttl=int(os.environ.get('SESSION_CACHE_IDLE_TTL', 1800)),
+    flush_interval=float(os.environ.get('SESSION_FLUSH_INTERVAL', 2.0)),
+    max_age=int(os.environ.get('SESSION_MAX_AGE', 7 * 24 * 3600)),
+    sweep_interval=int(os.environ.get('SESSION_SWEEP_INTERVAL', 3600)),
+)
+
+# Autosaved field changes, coalesced into one session write per AUTOSAVE_INTERVAL
+autosaves = AutosaveBuffer(session_store)
+
+# Request latency, template render time and session cache figures for /metrics
+_render_starts = threading.local()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def flush_autosaved_changes():
+    """Write the session's buffered autosaves before this request reads or replaces the session"""
+    if request.endpoint in ('static', 'api_autosave_step') or not autosaves.has_pending():
+        return
+    session_uuid = session.get('session_uuid')
+    if session_uuid and autosaves.has_pending(session_uuid):
+        autosaves.flush(session_uuid)
+
+@app.after_request
+def record_request_latency(response):
+    """Observe the request's latency by route (and wizard step)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        step = request.view_args.get('step', '') if request.view_args else ''
+        metrics.observe('wfm_http_request_duration_seconds', time.perf_counter() - started,
+                        route=request.endpoint or 'unmatched', step=str(step), method=request.method,
+                        status=str(response.status_code))
+    return response
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    _render_starts.__dict__.setdefault('stack', []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    stack = getattr(_render_starts, 'stack', None)
+    if stack:
+        metrics.observe('wfm_template_render_seconds', time.perf_counter() - stack.pop(),
+                        template=template.name or 'string')
+
+@metrics.registry.collector
+def collect_session_cache(registry):
+    stats = session_store.stats()
+    registry.set('wfm_session_cache_hits_total', stats['hits'])
+    registry.set('wfm_session_cache_misses_total', stats['misses'])
+    registry.set('wfm_session_cache_evictions_total', stats['evictions'])
+    registry.set('wfm_session_cache_bytes', stats['bytes'])
+    registry.set('wfm_session_cache_entries', stats['entries'])
 
 def load_server_session(session_uuid):
-    """Load data from in-memory cache (FAST)"""
-    if session_uuid in _session_cache:
-        return _session_cache[session_uuid].copy()
-    
-    # Fallback to file if not in cache
-    session_path = get_server_session_path(session_uuid)
-    if os.path.exists(session_path):
-        with open(session_path, 'r') as f:
-            data = json.load(f)
-            _session_cache[session_uuid] = data  # Cache it
-            return data.copy()
-    return {}
+    """Load server-side session data (served from the cache when possible)"""
+    return session_store.get(session_uuid)
 
 def save_server_session(session_uuid, data):
-    """Save data to in-memory cache (FAST) - lazy file write"""
-    _session_cache[session_uuid] = data.copy()
-    
-    # Only write to file every 10th save to reduce I/O
-    if len(_session_cache) % 10 == 0:
-        session_path = get_server_session_path(session_uuid)
-        with open(session_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    """Replace the whole server-side session document"""
+    session_store.put(session_uuid, data)
+
+def patch_server_session(session_uuid, fragments, replace=()):
+    """Merge changes into individual session fragments ({fragment: changes})"""
+    session_store.patch(session_uuid, fragments, replace=replace)
+
+def step_fragment(step):
+    """Name of the session fragment holding a wizard step's fields"""
+    return f'step{step}'
+
+def session_form_data(server_data):
+    """Merged view of all step fragments (over any pre-fragment 'form_data')"""
+    form_data = dict(server_data.get('form_data', {}))
+    for step in FORM_STEPS:
+        form_data.update(server_data.get(step_fragment(step), {}))
+    return form_data
+
+def sizing_session_fragment(sizing_data):
+    """Channel volumes/AHT (and any intraday profile) of a sizing submission"""
+    fragment = {channel: {key: sizing_data[channel].get(key) for key in ('annual_calls', 'weekly_calls', 'aht')}
+                for channel in CHANNELS if isinstance(sizing_data.get(channel), dict)}
+    if 'intraday' in sizing_data:
+        fragment['intraday'] = sizing_data['intraday']
+    return fragment
+
+def delete_server_session(session_uuid):
+    """Remove server-side session data from the cache and disk"""
+    autosaves.discard(session_uuid)
+    session_store.delete(session_uuid)
+
+def page_etag():
+    """Weak ETag for a rendered wizard page, or None when the page must be rendered
+
+    Covers everything a GET of a wizard page depends on: the URL, the templates
+    and static assets, the server-side session's version, the CSRF token (and a
+    window shorter than its time limit, so cached pages never hold an expired
+    token) and the date (date choices and ramp plans start from today).
+    """
+    if app.debug or session.get('_flashes') or 'csrf_token' not in session:
+        return None
+    session_uuid = session.get('session_uuid')
+    version = session_store.version(session_uuid) if session_uuid else None
+    csrf_time_limit = app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    csrf_window = int(time.time() // (csrf_time_limit / 2)) if csrf_time_limit else 0
+    parts = (request.full_path, app.extensions.get('template_version'), app.extensions['assets'].get('digest'),
+             session_uuid, version, session['csrf_token'], csrf_window, date.today().isoformat())
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def revalidated_page(view):
+    """Answer GETs with 304 Not Modified when the browser's copy of the page is still current"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        etag = page_etag()
+        if etag is not None and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            # Rendering may have created the session or its CSRF token, so validate against the state after it
+            etag = page_etag()
+            if response.status_code != 200 or etag is None:
+                return response
+        response.set_etag(etag, weak=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
+    return wrapper
+
+# Content-addressed store for uploaded workbooks; the body limit leaves room for both sizing attachments
+upload_store = UploadStore(UPLOADS_DIR, max_bytes=UPLOAD_MAX_BYTES, partial_ttl=UPLOAD_PARTIAL_TTL)
+app.config['MAX_CONTENT_LENGTH'] = 2 * UPLOAD_MAX_BYTES + 1024 * 1024
+
+# Local background jobs for exports, sweeps and workbook imports
+job_queue = JobQueue(JOBS_DIR, workers=JOB_WORKERS, retention=JOB_RETENTION)
+
+@job_queue.handler('export')
+def export_job(job, args, export_format):
+    """Write a submission export to the job's result file"""
+    query = parse_query(args)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    mimetype = XLSX_MIMETYPE if export_format == 'xlsx' else 'text/csv'
+    path = job.result_file(export_format, mimetype, f'submissions-{stamp}.{export_format}')
+
+    def on_record(count):
+        job.check()
+        job.progress(message=f'{count} submissions exported')
+
+    writer = write_xlsx if export_format == 'xlsx' else write_csv
+    count = writer(path, query, on_record=on_record)
+    return {'submissions': count}
+
+@job_queue.handler('scenario_sweep')
+def scenario_sweep_job(job, form_data, sites_config, grid, time_budget=None, limit=50):
+    """Run a what-if sweep in the background"""
+    job.progress(message='Evaluating scenarios', force=True)
+    return run_sweep(form_data, sites_config, grid, time_budget=time_budget, limit=limit)
+
+@job_queue.handler('workbook_import')
+def workbook_import_job(job, sha256, filename, channel='inbound'):
+    """Parse an uploaded volume/AHT workbook in the background"""
+    job.progress(message=f'Reading {filename}', force=True)
+    try:
+        path = upload_store.path(sha256)
+        if path is None:
+            raise ValueError(f'{filename} is no longer stored')
+        return dict(import_workbook(path, channel=channel), filename=filename)
+    finally:
+        upload_store.release(sha256)
+
+def store_form_upload(key):
+    """Blob info for a sizing attachment: a file in the form, or a completed chunked upload id in <key>_upload"""
+    upload_id = request.form.get(f'{key}_upload')
+    if upload_id:
+        return upload_store.claim(upload_id)
+    upload = request.files.get(key)
+    if not upload or not upload.filename:
+        return None
+    return upload_store.put(upload.stream, upload.filename, length=upload.content_length or None)
+
+def job_accepted(job_id):
+    """202 response pointing at a queued job's status endpoint"""
+    response = jsonify(dict(job_queue.get(job_id), status_url=url_for('job_status', job_id=job_id)))
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job_id)
+    return response
 
 def generate_date_choices():
     """Generate date choices for the next 60 days"""
@@ -81,58 +284,56 @@ def generate_date_choices():
 
 # Multi-step form configuration
 FORM_STEPS = {
-    1: {'name': 'Ramp Details', 'template': 'step1_ramp_details.html'},
-    2: {'name': 'Location Details', 'template': 'step5_location_planning.html'},
-    3: {'name': 'Recruitment', 'template': 'step6_recruitment.html'},
-    4: {'name': 'Program Details', 'template': 'step4_language_channel.html'},
-    5: {'name': 'Training Support', 'template': 'step2_training_schedule.html'},
-    6: {'name': 'Operational Support Ratios', 'template': 'step3_operational_assumptions.html'},
-    7: {'name': 'Submit', 'template': 'step7_submit.html'}
+    1: {'name': 'Ramp Details', 'template': 'step1_ramp_details.html', 'partial': 'partials/step1_ramp_details.html'},
+    2: {'name': 'Location Details', 'template': 'step5_location_planning.html', 'partial': 'partials/step2_location_details.html'},
+    3: {'name': 'Recruitment', 'template': 'step6_recruitment.html', 'partial': 'partials/step3_recruitment.html'},
+    4: {'name': 'Program Details', 'template': 'step4_language_channel.html', 'partial': 'partials/step4_program_details.html'},
+    5: {'name': 'Training Support', 'template': 'step2_training_schedule.html', 'partial': 'partials/step5_training_support.html'},
+    6: {'name': 'Operational Support Ratios', 'template': 'step3_operational_assumptions.html', 'partial': 'partials/step6_operational.html'},
+    7: {'name': 'Submit', 'template': 'step7_submit.html', 'partial': 'partials/step7_submit.html'}
 }
 
+# Autosave limits; site table fields are saved by name pattern since the rows are dynamic
+AUTOSAVE_MAX_FIELDS = 500
+AUTOSAVE_MAX_VALUE = 500
+SITE_FIELD_PATTERN = re.compile(
+    r'^(sites_count_[A-Z]{3}|(site_location|agent_profile|lead_time|weekly_capacity|monthly_capacity)_[A-Z]{3}_site\d+)$')
+
+# Country names by code, for the step API's headcount summary
+COUNTRY_NAMES = dict(RampInputForm.geo_country.kwargs['choices'])
+
 def get_form_fields_for_step(step):
     """Get the list of form fields for a specific step"""
-    step_fields = {
-        1: ['business_type', 'existing_business_select', 'client_name', 'ramp_start_date', 'ramp_end_date', 'ramp_requirement', 'ramp_requirement_type'],
-        2: ['requirement_type', 'requirement_value', 'geo_country', 'can_headcount', 'col_headcount',
-            'hkg_headcount', 'ind_headcount', 'mex_headcount', 'pan_headcount', 'phl_headcount', 
-            'pol_headcount', 'tto_headcount', 'usa_headcount'],
-        3: ['recruitment_lead_time', 'hiring_capacity_weekly', 'hiring_capacity_monthly', 'recruitment_notes'],
-        4: ['lob_count', 'lob_names', 'languages_supported', 'specify_languages', 'voice_inbound', 'voice_outbound', 
-            'chat', 'email', 'back_office', 'social_sms', 'others', 'others_text'],
-        5: ['ramp_start_availability', 'ramp_end_availability',
-            'client_trainer', 'internal_trainer', 'total_trainers', 'training_duration',
-            'training_duration_number', 'nesting_duration', 'nesting_duration_number', 'batch_size'],
-        6: ['supervisor_ratio', 'qa_ratio', 'trainer_ratio'],
-        7: []  # Submit step has no form fields, just review and submit
-    }
-    return step_fields.get(step, [])
+    return STEP_FIELDS.get(step, ())
+
+def submitted_formdata():
+    """The posted fields, from a form-encoded or a JSON body"""
+    if request.is_json:
+        return MultiDict(request.get_json(silent=True) or {})
+    return request.form
 
 def save_step_data(step, form):
-    """Save current step data to server-side storage"""
+    """Save current step data to server-side storage as that step's fragment"""
     session_uuid = get_session_uuid()
-    server_data = load_server_session(session_uuid)
-    
-    if 'form_data' not in server_data:
-        server_data['form_data'] = {}
+    step_data = {}
     
-    step_fields = get_form_fields_for_step(step)
-    for field_name in step_fields:
-        if hasattr(form, field_name):
-            field_data = getattr(form, field_name).data
-            if field_data is not None:
-                # Handle date fields
-                if hasattr(getattr(form, field_name), 'data') and hasattr(field_data, 'isoformat'):
-                    server_data['form_data'][field_name] = field_data.isoformat()
-                else:
-                    server_data['form_data'][field_name] = field_data
+    for field_name in get_form_fields_for_step(step):
+        field_data = form[field_name].data
+        if field_data is not None:
+            # Handle date fields
+            if field_name in DATE_FIELDS:
+                step_data[field_name] = field_data.isoformat()
+            else:
+                step_data[field_name] = field_data
     
-    save_server_session(session_uuid, server_data)
+    # Autosaves of this session buffered before the full save (in any worker) are dropped
+    fragments = dict(autosaves.supersede(session_uuid), **{step_fragment(step): step_data})
+    replace = ()
     
-    # For step 3 (Recruitment), save dynamic Sites Configuration fields to server-side storage
+    # For step 3 (Recruitment), save dynamic Sites Configuration fields in the same write
     if step == 3 and request:
-        session_uuid = get_session_uuid()
-        server_data = load_server_session(session_uuid)
+        formdata = submitted_formdata()
+        step_data['site_config_needed'] = formdata.get('site_config_needed') or 'no'
         
         sites_config = {}
         country_codes = ['CAN', 'COL', 'HKG', 'IND', 'MEX', 'PAN', 'PHL', 'POL', 'TTO', 'USA']
@@ -141,18 +342,20 @@ def save_step_data(step, form):
         # Save sites count selection
         for country_code in country_codes:
             sites_count_key = f'sites_count_{country_code}'
-            sites_count_value = request.form.get(sites_count_key)
+            sites_count_value = formdata.get(sites_count_key)
             if sites_count_value:
                 sites_config[sites_count_key] = sites_count_value
         
         # Save all site data (including site-specific fields like _site1, _site2, etc.)
-        for key in request.form.keys():
+        for key in formdata.keys():
             if any(key.startswith(f'{metric}_') for metric in metrics):
-                sites_config[key] = request.form[key]
+                sites_config[key] = formdata[key]
         
-        # Store in server-side session instead of cookie
-        server_data['sites_config'] = sites_config
-        save_server_session(session_uuid, server_data)
+        # The submitted site table replaces the previous one outright
+        fragments['sites_config'] = sites_config
+        replace = ('sites_config',)
+    
+    patch_server_session(session_uuid, fragments, replace=replace)
 
 def load_step_data(step, form):
     """Load step data from server-side storage into form"""
@@ -160,24 +363,23 @@ def load_step_data(step, form):
         return
     
     server_data = load_server_session(session['session_uuid'])
-    form_data = server_data.get('form_data', {})
+    form_data = session_form_data(server_data)
     
     if not form_data:
         return
     
-    step_fields = get_form_fields_for_step(step)
-    for field_name in step_fields:
-        if field_name in form_data and hasattr(form, field_name):
+    for field_name in get_form_fields_for_step(step):
+        if field_name in form_data:
             field_value = form_data[field_name]
             if field_value is not None:
                 # Skip loading geo_country if it contains all countries (old default behavior)
                 if field_name == 'geo_country' and isinstance(field_value, list) and len(field_value) >= 10:
                     continue
                     
-                field = getattr(form, field_name)
+                field = form[field_name]
                 
                 # Handle date fields - parse ISO strings back to date objects
-                if hasattr(field, 'data') and 'date' in field_name and isinstance(field_value, str):
+                if field_name in DATE_FIELDS and isinstance(field_value, str):
                     try:
                         # Try to parse ISO date string
                         field.data = date.fromisoformat(field_value)
@@ -197,15 +399,66 @@ def clear_session():
     """Clear session data to start fresh"""
     # Clear server-side session file if exists
     if 'session_uuid' in session:
-        session_path = get_server_session_path(session['session_uuid'])
-        if os.path.exists(session_path):
-            os.remove(session_path)
+        delete_server_session(session['session_uuid'])
     
     session.clear()
     session.modified = True
     return redirect(url_for('ramp_form_step', step=1))
 
+def step_context(step, form):
+    """Template data a wizard step needs beyond its own fields (JSON-serializable)"""
+    data = {}
+    
+    # For step 2 (Location Planning), pass the selected countries to prevent auto-checking all
+    if step == 2:
+        data['preselected_countries'] = form.geo_country.data or []
+    
+    # For step 3 (Recruitment), pass country headcount data from step 2
+    if step == 3:
+        server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
+        form_data = session_form_data(server_data)
+        selected_countries = form_data.get('geo_country', [])
+        
+        # Country code to headcount field mapping
+        country_field_mapping = {
+            'CAN': 'can_headcount',
+            'COL': 'col_headcount', 
+            'HKG': 'hkg_headcount',
+            'IND': 'ind_headcount',
+            'MEX': 'mex_headcount',
+            'PAN': 'pan_headcount',
+            'PHL': 'phl_headcount',
+            'POL': 'pol_headcount',
+            'TTO': 'tto_headcount',
+            'USA': 'usa_headcount'
+        }
+        
+        # Build country headcount data for selected countries only
+        country_headcounts = {}
+        for country_code in selected_countries:
+            if country_code in country_field_mapping:
+                field_name = country_field_mapping[country_code]
+                headcount_value = form_data.get(field_name, 0)
+                # Convert to int, default to 0 if empty/None
+                try:
+                    country_headcounts[country_code] = int(headcount_value) if headcount_value else 0
+                except (ValueError, TypeError):
+                    country_headcounts[country_code] = 0
+        
+        data['country_headcounts'] = country_headcounts
+        data['site_config_needed'] = form_data.get('site_config_needed', 'no')
+        data['sites_config'] = server_data.get('sites_config', {})
+    
+    # For submit step, include form data for summary
+    if step == 7:
+        server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
+        data['form_data'] = session_form_data(server_data)
+        data['ramp_plan'] = simulate_ramp(data['form_data'], server_data.get('sites_config', {}))
+    
+    return data
+
 @app.route('/ramp-form/step/<int:step>', methods=['GET', 'POST'])
+@revalidated_page
 def ramp_form_step(step):
     """Handle individual form steps"""
     if step not in FORM_STEPS:
@@ -213,7 +466,7 @@ def ramp_form_step(step):
         return redirect(url_for('ramp_form_step', step=1))
     
     
-    form = RampInputForm()
+    form = STEP_FORMS[step]()
     
     if request.method == 'POST':
         action = request.form.get('action')
@@ -222,16 +475,10 @@ def ramp_form_step(step):
         if action in ['save', 'next', 'previous']:
             save_step_data(step, form)
         
-        # For step 3 (Recruitment), also save site configuration state to server storage  
-        if step == 3:
+        # For step 3 (Recruitment), keep the site configuration toggle even when not saving
+        elif step == 3:
             site_config_needed = request.form.get('site_config_needed')
-            session_uuid = get_session_uuid()
-            # FAST: Use cached data instead of file I/O
-            server_data = _session_cache.get(session_uuid, {})
-            if 'form_data' not in server_data:
-                server_data['form_data'] = {}
-            server_data['form_data']['site_config_needed'] = site_config_needed or 'no'
-            save_server_session(session_uuid, server_data)
+            patch_server_session(get_session_uuid(), {step_fragment(3): {'site_config_needed': site_config_needed or 'no'}})
         
         session.modified = True
         
@@ -269,62 +516,170 @@ def ramp_form_step(step):
         'is_last_step': step == len(FORM_STEPS)
     }
     
-    # For step 2 (Location Planning), pass the selected countries to prevent auto-checking all
-    if step == 2:
-        context['preselected_countries'] = form.geo_country.data or []
-    
-    # For step 3 (Recruitment), pass country headcount data from step 2
-    if step == 3:
-        server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
-        form_data = server_data.get('form_data', {})
-        selected_countries = form_data.get('geo_country', [])
-        
-        # Country code to headcount field mapping
-        country_field_mapping = {
-            'CAN': 'can_headcount',
-            'COL': 'col_headcount', 
-            'HKG': 'hkg_headcount',
-            'IND': 'ind_headcount',
-            'MEX': 'mex_headcount',
-            'PAN': 'pan_headcount',
-            'PHL': 'phl_headcount',
-            'POL': 'pol_headcount',
-            'TTO': 'tto_headcount',
-            'USA': 'usa_headcount'
-        }
-        
-        # Build country headcount data for selected countries only
-        country_headcounts = {}
-        for country_code in selected_countries:
-            if country_code in country_field_mapping:
-                field_name = country_field_mapping[country_code]
-                headcount_value = form_data.get(field_name, 0)
-                # Convert to int, default to 0 if empty/None
-                try:
-                    country_headcounts[country_code] = int(headcount_value) if headcount_value else 0
-                except (ValueError, TypeError):
-                    country_headcounts[country_code] = 0
-        
-        context['country_headcounts'] = country_headcounts
-        context['site_config_needed'] = form_data.get('site_config_needed', 'no')
-        context['sites_config'] = server_data.get('sites_config', {})
-    
-    # For submit step, include form data for summary
-    if step == 7:
-        server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
-        context['form_data'] = server_data.get('form_data', {})
+    # Data the step's scripts need from other steps
+    context.update(step_context(step, form))
     
     return render_template(FORM_STEPS[step]['template'], **context)
 
+def step_fragment_payload(step):
+    """JSON body of the step API: a step's partial HTML and the data its scripts need"""
+    form = STEP_FORMS[step](formdata=None)
+    load_step_data(step, form)
+    context = step_context(step, form)
+    html = render_template(FORM_STEPS[step]['partial'], form=form, country_names=COUNTRY_NAMES, **context)
+    return {
+        'step': step,
+        'step_name': FORM_STEPS[step]['name'],
+        'total_steps': len(FORM_STEPS),
+        'is_first_step': step == 1,
+        'is_last_step': step == len(FORM_STEPS),
+        'html': html,
+        'context': context,
+    }
+
+@app.route('/api/ramp-form/step/<int:step>', methods=['GET', 'POST'])
+def api_ramp_form_step(step):
+    """Wizard steps in one round trip: save a step and get the step to show next as JSON
+
+    POST takes the step's fields (form-encoded or JSON, including csrf_token) and
+    an action of 'next', 'previous' or 'save', validates and saves them, and
+    returns the next, previous or same step's partial HTML with its context. GET
+    returns a step without saving anything.
+    """
+    if step not in FORM_STEPS:
+        return jsonify({'error': f'Invalid form step: {step}'}), 404
+    if request.method == 'GET':
+        return jsonify(step_fragment_payload(step))
+
+    action = submitted_formdata().get('action', 'save')
+    if action not in ('next', 'previous', 'save'):
+        return jsonify({'error': "action must be 'next', 'previous' or 'save'"}), 400
+    form = STEP_FORMS[step]()
+    if not form.validate():
+        return jsonify({'error': 'Invalid step data', 'errors': form.errors}), 400
+    save_step_data(step, form)
+
+    if action == 'next' and step == len(FORM_STEPS):
+        return jsonify({'step': None, 'redirect': url_for('ramp_form_submit')})
+    if action == 'next':
+        step += 1
+    elif action == 'previous' and step > 1:
+        step -= 1
+    return jsonify(step_fragment_payload(step))
+
+def autosave_fragments(step, changes):
+    """Validate autosaved {field: value} changes against only those fields of a step
+
+    Returns the valid changes as {fragment: changes}, {field: errors} for the
+    invalid ones and the names the step does not have.
+    """
+    formdata = MultiDict()
+    for name, value in changes.items():
+        for item in (value if isinstance(value, list) else [value]):
+            formdata.add(name, '' if item is None or item is False else 'y' if item is True else str(item))
+    form = STEP_FORMS[step](formdata=formdata, meta={'csrf': False})
+    step_data = {}
+    sites_config = {}
+    errors = {}
+    ignored = []
+    for name in changes:
+        if name in STEP_FIELDS.get(step, ()):
+            field = form[name]
+            if not field.validate(form):
+                errors[name] = field.errors
+            elif name in DATE_FIELDS and field.data is not None:
+                step_data[name] = field.data.isoformat()
+            else:
+                step_data[name] = field.data
+        elif step == 3 and name == 'site_config_needed':
+            step_data[name] = formdata.get(name) or 'no'
+        elif step == 3 and SITE_FIELD_PATTERN.match(name):
+            sites_config[name] = formdata.get(name, '')[:AUTOSAVE_MAX_VALUE]
+        else:
+            ignored.append(name)
+    fragments = {}
+    if step_data:
+        fragments[step_fragment(step)] = step_data
+    if sites_config:
+        fragments['sites_config'] = sites_config
+    return fragments, errors, ignored
+
+@app.route('/api/ramp-form/step/<int:step>/autosave', methods=['POST'])
+def api_autosave_step(step):
+    """Autosave a small batch of changed fields of a wizard step
+
+    Takes JSON {"client": page id, "seq": increasing number, "changes": {field: value}}
+    with the CSRF token in an X-CSRFToken header (or "csrf_token"). Only the
+    changed fields are validated; invalid ones are returned in "errors" and not
+    saved. Batches are buffered and written to the session coalesced, and a batch
+    whose seq is not newer than the client's last one is ignored ("stale").
+    """
+    if step not in FORM_STEPS:
+        return jsonify({'error': f'Invalid form step: {step}'}), 404
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('changes'), dict):
+        return jsonify({'error': 'Expected a JSON object with "changes"'}), 400
+    seq = body.get('seq')
+    if not isinstance(seq, int) or isinstance(seq, bool) or seq < 1:
+        return jsonify({'error': 'seq must be a positive integer'}), 400
+    if len(body['changes']) > AUTOSAVE_MAX_FIELDS:
+        return jsonify({'error': f'At most {AUTOSAVE_MAX_FIELDS} fields per batch'}), 400
+    if app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken') or body.get('csrf_token'))
+        except ValidationError as e:
+            return jsonify({'error': str(e)}), 400
+    client = str(body.get('client') or 'default')[:64]
+
+    fragments, errors, ignored = autosave_fragments(step, body['changes'])
+    accepted = autosaves.add(get_session_uuid(), client, seq, fragments) if fragments else True
+    return jsonify({'seq': seq, 'saved': bool(fragments) and accepted, 'stale': not accepted,
+                    'errors': errors, 'ignored': ignored})
+
+@app.route('/ramp-form/plan')
+def ramp_form_plan():
+    """Week-by-week ramp plan for the current wizard session as JSON"""
+    server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
+    return jsonify(simulate_ramp(session_form_data(server_data), server_data.get('sites_config', {})))
+
+@app.route('/ramp-form/scenarios', methods=['POST'])
+def ramp_form_scenarios():
+    """Rank what-if variants of the current session's ramp plan
+
+    JSON body: grid ({parameter: [values]}), optional time_budget (seconds),
+    limit (number of ranked variants returned) and async (run as a background job).
+    Grids or budgets too large to finish within a request always run as a job.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Expected a JSON object with a grid'}), 400
+    server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
+    form_data = session_form_data(server_data)
+    sites_config = server_data.get('sites_config', {})
+    try:
+        limit = check_limit(int(body.get('limit', 50)))
+        variants = expand_grid(body.get('grid'))
+        if body.get('async') or sweep_needs_job(len(variants), body.get('time_budget')):
+            return job_accepted(job_queue.submit('scenario_sweep', form_data=form_data, sites_config=sites_config,
+                                                 grid=body.get('grid'), time_budget=body.get('time_budget'),
+                                                 limit=limit))
+        result = run_sweep(form_data, sites_config, body.get('grid'), time_budget=body.get('time_budget'),
+                           limit=limit, max_time_budget=MAX_SYNC_TIME_BUDGET)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
 @app.route('/ramp-form/submit', methods=['GET', 'POST'])
+@revalidated_page
 def ramp_form_submit():
     """Handle final form submission"""
     if request.method == 'POST':
         server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
-        if 'form_data' in server_data:
+        form_data = session_form_data(server_data)
+        if form_data:
             # Add timestamp and get all server-side data
-            form_data = server_data['form_data'].copy()
             form_data['timestamp'] = datetime.now().isoformat()
+            form_data['submission_type'] = 'ramp'
             
             # Include sites_config from server-side storage
             if 'sites_config' in server_data:
@@ -334,9 +689,7 @@ def ramp_form_submit():
             
             # Clear session data and server-side data
             if 'session_uuid' in session:
-                session_path = get_server_session_path(session['session_uuid'])
-                if os.path.exists(session_path):
-                    os.remove(session_path)
+                delete_server_session(session['session_uuid'])
             
             # Clear session completely  
             session.clear()
@@ -348,21 +701,94 @@ def ramp_form_submit():
             flash('No form data found', 'error')
             return redirect(url_for('ramp_form_step', step=1))
     
-    # Show summary page
+    # Show summary page; its body is cached per distinct set of answers
     server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
-    form_data = server_data.get('form_data', {})
-    return render_template('form_summary.html', form_data=form_data)
+    form_data = session_form_data(server_data)
+    return render_template('form_summary.html', form=STEP_FORMS[7](), form_data=form_data,
+                           summary_key=data_key(form_data), current_step=7, total_steps=len(FORM_STEPS),
+                           step_name=FORM_STEPS[7]['name'])
 
 @app.route('/submissions')
 def view_submissions():
-    """View all form submissions (for admin purposes)"""
-    submissions = load_submissions()
-    return jsonify(submissions)
+    """Page through form submissions as streamed JSON or NDJSON (for admin purposes)
+
+    Query parameters: cursor, limit, client_name, ramp_start_from, ramp_start_to,
+    geo_country, type (ramp|sizing), fields (comma separated) and format (json|ndjson).
+    """
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    wants_ndjson = (request.args.get('format') == 'ndjson' or
+                    request.accept_mimetypes.best == 'application/x-ndjson')
+    mimetype = 'application/x-ndjson' if wants_ndjson else 'application/json'
+
+    etag = query_etag(f'{mimetype}|{request.query_string.decode()}')
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def generate_json():
+        yield '{"submissions":['
+        next_cursor = None
+        first = True
+        for position, record in iter_page(query):
+            if record is None:
+                next_cursor = encode_cursor(position)
+                break
+            yield ('' if first else ',') + json.dumps(record, default=str)
+            first = False
+        yield '],"next_cursor":' + json.dumps(next_cursor) + '}'
+
+    def generate_ndjson():
+        # The final line carries the cursor for the next page
+        next_cursor = None
+        for position, record in iter_page(query):
+            if record is None:
+                next_cursor = encode_cursor(position)
+                break
+            yield json.dumps(record, default=str) + '\n'
+        yield json.dumps({'next_cursor': next_cursor}) + '\n'
+
+    generate = generate_ndjson if wants_ndjson else generate_json
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.set_etag(etag)
+    return response
+
+@app.route('/submissions/export')
+def export_submissions():
+    """Stream all or filtered submissions as CSV or xlsx (format=csv|xlsx)
+
+    Accepts the same filters as /submissions; nested fields are flattened into columns.
+    With async=1 the export runs as a background job and a job handle is returned.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or xlsx'}), 400
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('async'):
+        args = {key: value for key, value in request.args.items() if key not in ('async', 'format')}
+        return job_accepted(job_queue.submit('export', args=args, export_format=export_format))
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    if export_format == 'xlsx':
+        response = Response(stream_with_context(iter_xlsx(query)), mimetype=XLSX_MIMETYPE)
+    else:
+        response = Response(stream_with_context(iter_csv(query)), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename=submissions-{stamp}.{export_format}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route('/sizing-form', methods=['GET', 'POST'])
+@revalidated_page
 def sizing_form():
     """Sizing Form page"""
-    from forms_sizing import SizingForm
     
     form = SizingForm()
     
@@ -370,6 +796,7 @@ def sizing_form():
         # Process sizing form data
         sizing_data = {
             'timestamp': datetime.now().isoformat(),
+            'submission_type': 'sizing',
             'inbound': {
                 'annual_calls': form.inbound_annual_calls.data,
                 'weekly_calls': form.inbound_weekly_calls.data,
@@ -438,105 +865,305 @@ def sizing_form():
             }
         }
         
-        # Handle file uploads
-        attach_volume = request.files.get('attach_volume')
-        attach_aht = request.files.get('attach_aht')
+        # Store uploads by content hash; a completed chunked upload can be referenced instead of a file
+        import_channel = request.form.get('attach_channel', 'inbound')
+        imports = {}
+        uploads = {}
+        for key, measures in (('attach_aht', ('aht',)), ('attach_volume', ('annual_calls', 'weekly_calls', 'aht'))):
+            try:
+                stored = store_form_upload(key)
+            except UploadError as e:
+                flash(f'Could not upload {key.replace("attach_", "").upper()} file: {e}', 'error')
+                continue
+            if stored is None:
+                continue
+            sizing_data[key] = stored['filename']
+            uploads[key] = stored['sha256']
+            # Fill blank channel figures from the uploaded workbooks; typed values take precedence
+            try:
+                summary = import_workbook(stored['path'], channel=import_channel)
+            except WorkbookImportError as e:
+                flash(f'Could not import {stored["filename"]}: {e}', 'error')
+                continue
+            apply_import(sizing_data, summary, measures)
+            imports[key] = {'layout': summary['layout'], 'rows': summary['rows'], 'channels': sorted(summary['channels'])}
+        if uploads:
+            sizing_data['uploads'] = uploads
+        if imports:
+            sizing_data['imports'] = imports
         
-        if attach_volume and attach_volume.filename:
-            # Create uploads directory if it doesn't exist
-            if not os.path.exists('uploads'):
-                os.makedirs('uploads')
-            # Save volume file
-            volume_filename = secure_filename(attach_volume.filename)
-            attach_volume.save(os.path.join('uploads', volume_filename))
-            sizing_data['attach_volume'] = volume_filename
-            
-        if attach_aht and attach_aht.filename:
-            # Create uploads directory if it doesn't exist
-            if not os.path.exists('uploads'):
-                os.makedirs('uploads')
-            # Save AHT file
-            aht_filename = secure_filename(attach_aht.filename)
-            attach_aht.save(os.path.join('uploads', aht_filename))
-            sizing_data['attach_aht'] = aht_filename
+        # Record the required agents per channel alongside the inputs
+        try:
+            sizing_data['staffing'] = staffing_summary(staffing_plan(sizing_data))
+        except ValueError as e:
+            flash(f'Could not calculate staffing: {e}', 'error')
         
         # Save sizing data
         save_submission(sizing_data)
+        # Keep the channel figures in the session for prefilled template downloads
+        patch_server_session(get_session_uuid(), {'sizing': sizing_session_fragment(sizing_data)}, replace=('sizing',))
         flash('Sizing form submitted successfully!', 'success')
         return redirect(url_for('sizing_form'))
     
     return render_template('sizing_form.html', form=form)
 
+@app.route('/sizing-form/staffing', methods=['POST'])
+def sizing_staffing():
+    """Required agents per half-hour interval and channel for a sizing record (JSON body)
+
+    Query parameters: sl_targets (comma separated percentages, overriding each
+    channel's SL %) and sl_seconds (service level threshold, default 20).
+    """
+    sizing_data = request.get_json(silent=True)
+    if not isinstance(sizing_data, dict):
+        return jsonify({'error': 'Expected a JSON object with the sizing channels'}), 400
+    try:
+        sl_targets = [float(value) for value in request.args.get('sl_targets', '').split(',') if value.strip()]
+        sl_seconds = float(request.args.get('sl_seconds', DEFAULT_SL_SECONDS))
+        if any(not 0 < target < 100 for target in sl_targets) or sl_seconds < 0:
+            raise ValueError('sl_targets must be between 0 and 100 and sl_seconds non-negative')
+        plan = staffing_plan(sizing_data, sl_targets=sl_targets, sl_seconds=sl_seconds)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(plan)
+
+@app.route('/workbook-imports', methods=['POST'])
+def start_workbook_import():
+    """Upload a volume/AHT workbook and parse it in the background (returns a job handle)"""
+    channel = request.form.get('channel', 'inbound')
+    if channel not in CHANNELS:
+        return jsonify({'error': f'Unknown channel {channel!r}'}), 400
+    if request.form.get('upload'):
+        try:
+            stored = upload_store.claim(request.form['upload'])
+        except UploadError as e:
+            return jsonify({'error': str(e)}), 400
+        return job_accepted(job_queue.submit('workbook_import', sha256=stored['sha256'],
+                                             filename=stored['filename'], channel=channel))
+    upload = request.files.get('workbook')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Attach the workbook as "workbook" or give a completed "upload" id'}), 400
+    try:
+        stored = upload_store.put(upload.stream, upload.filename, length=upload.content_length or None)
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    # The job owns the upload's reference and releases it when done
+    return job_accepted(job_queue.submit('workbook_import', sha256=stored['sha256'],
+                                         filename=stored['filename'], channel=channel))
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable chunked upload (JSON body: filename, size in bytes)"""
+    payload = request.get_json(silent=True) or {}
+    try:
+        status = upload_store.create_upload(payload.get('filename'), payload.get('size'))
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(dict(status, upload_url=url_for('upload_status', upload_id=status['id'])))
+    response.status_code = 201
+    response.headers['Location'] = url_for('upload_status', upload_id=status['id'])
+    response.headers['Upload-Offset'] = status['offset']
+    return response
+
+@app.route('/uploads/<upload_id>')
+def upload_status(upload_id):
+    """Offset reached by a resumable upload, to resume from after an interruption"""
+    status = upload_store.upload_status(upload_id)
+    if status is None:
+        abort(404)
+    response = jsonify(status)
+    response.headers['Upload-Offset'] = status['offset']
+    return response
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    """Append the request body to a resumable upload at the offset given in the Upload-Offset header"""
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset header must be an integer'}), 400
+    try:
+        status = upload_store.append(upload_id, offset, request.stream)
+    except UploadOffsetMismatch as e:
+        response = jsonify({'error': str(e), 'offset': e.offset})
+        response.status_code = 409
+        response.headers['Upload-Offset'] = e.offset
+        return response
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    if status is None:
+        abort(404)
+    response = jsonify(status)
+    response.headers['Upload-Offset'] = status['offset']
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    if job['status'] == 'succeeded':
+        job['result_url'] = url_for('job_result', job_id=job_id)
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Result of a finished job: its file download, or its JSON result"""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    if job['status'] != 'succeeded':
+        return jsonify(dict(job, error=job['error'] or f"Job is {job['status']}")), 409
+    result, path, mimetype, filename = job_queue.result(job_id)
+    if path:
+        if not os.path.exists(path):
+            abort(410)
+        return send_file(os.path.abspath(path), mimetype=mimetype, as_attachment=True, download_name=filename)
+    return jsonify(result)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Request cancellation of a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job)
+
 @app.route('/download-template/<template_type>')
 def download_template(template_type):
-    """Download Excel templates for Monthly, Weekly, or Intraday data"""
-    import io
-    import xlsxwriter
-    
-    # Create an in-memory Excel file
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-    
-    if template_type == 'monthly':
-        worksheet = workbook.add_worksheet('Monthly Volume and AHT')
-        
-        # Add headers
-        headers = ['Month', 'Inbound Calls', 'Outbound Calls', 'Back-Office Tasks', 
-                  'Social Media', 'Chat', 'Email', 'Inbound AHT', 'Outbound AHT', 
-                  'Back-Office AHT', 'Social Media AHT', 'Chat AHT', 'Email AHT']
-        
-        # Write headers
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header)
-            
-        # Add sample months
-        months = ['January', 'February', 'March', 'April', 'May', 'June',
-                 'July', 'August', 'September', 'October', 'November', 'December']
-        
-        for row, month in enumerate(months, 1):
-            worksheet.write(row, 0, month)
-    
-    elif template_type == 'weekly':
-        worksheet = workbook.add_worksheet('Weekly Volume and AHT')
-        
-        # Add headers
-        headers = ['Week', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 
-                  'Saturday', 'Sunday', 'Total Volume', 'Average AHT']
-        
-        # Write headers
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header)
-            
-        # Add sample weeks
-        for week in range(1, 53):
-            worksheet.write(week, 0, f'Week {week}')
-    
-    elif template_type == 'intraday':
-        worksheet = workbook.add_worksheet('Intraday Volume and AHT')
-        
-        # Add headers
-        headers = ['Time Interval', 'Volume', 'AHT (minutes)', 'Service Level %', 
-                  'Abandonment %', 'Calls Answered', 'Calls Offered']
-        
-        # Write headers
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header)
-            
-        # Add hourly intervals
-        for hour in range(24):
-            for interval in ['00', '30']:
-                time_str = f'{hour:02d}:{interval}'
-                row = hour * 2 + (1 if interval == '30' else 0) + 1
-                worksheet.write(row, 0, time_str)
-    
-    workbook.close()
-    output.seek(0)
-    
-    # Return the file
-    filename = f'{template_type}_template.xlsx'
-    return send_file(
+    """Download the blank Monthly, Weekly, or Intraday Excel template"""
+    if template_type not in TEMPLATES:
+        abort(404)
+    data, etag = static_template(template_type)
+    response = send_file(
+        io.BytesIO(data),
+        as_attachment=True,
+        download_name=f'{template_type}_template.xlsx',
+        mimetype=XLSX_MIMETYPE,
+        etag=etag,
+        max_age=3600
+    )
+    return response.make_conditional(request)
+
+@app.route('/download-template/<template_type>/prefilled')
+def download_prefilled_template(template_type):
+    """Download a template prefilled with the sizing figures saved in this session
+
+    Query parameters: channel (weekly/intraday layouts, default inbound) and
+    days (intraday rows per interval, starting today).
+    """
+    if template_type not in TEMPLATES:
+        abort(404)
+    server_data = load_server_session(session.get('session_uuid', '')) if 'session_uuid' in session else {}
+    try:
+        output = prefilled_template(template_type, server_data.get('sizing', {}),
+                                    channel=request.args.get('channel', 'inbound'),
+                                    days=int(request.args.get('days', 1)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = send_file(
         output,
         as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        download_name=f'{template_type}_prefilled.xlsx',
+        mimetype=XLSX_MIMETYPE,
+        etag=False
     )
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# Warm-up phases run by create_app (in the master under gunicorn --preload)
+@warmup.phase('forms')
+def build_form_classes(app):
+    """Bind every wizard form once so WTForms builds and caches each class's field list"""
+    with app.test_request_context():
+        for form_class in (*STEP_FORMS.values(), RampInputForm, SizingForm):
+            form_class(meta={'csrf': False})
+
+@warmup.phase('workbooks')
+def build_static_workbooks(app):
+    """Build the blank template workbooks served by /download-template"""
+    for template_type in TEMPLATES:
+        static_template(template_type)
+
+@warmup.phase('sessions')
+def preload_sessions(app):
+    """Cache the most recently used sessions (coherent backends only)"""
+    loaded = session_store.preload(warmup.WARMUP_SESSIONS)
+    app.logger.info('Preloaded %d sessions', loaded)
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress the static files into static/dist"""
+    manifest = build_assets(app.static_folder)
+    print(f"Built {len(manifest['files'])} assets")
+
+
+@app.cli.command('startup-timings')
+def startup_timings_command():
+    """Print how long each start-up and warm-up phase took when the app was created"""
+    timings = app.extensions['startup'].stats()
+    for name, ms in timings['phases_ms'].items():
+        print(f'{name:<20} {ms:>10.1f} ms')
+    print(f"{'total':<20} {timings['total_ms']:>10.1f} ms")
+
+
+@app.cli.command('sweep-uploads')
+def sweep_uploads_command():
+    """Delete stale partial uploads and release expired completed ones"""
+    count = upload_store.cleanup()
+    print(f'Removed {count} uploads')
+
+
+@app.cli.command('rebuild-indexes')
+def rebuild_indexes_command():
+    """Regenerate the submission indexes from the raw submission log"""
+    count = rebuild_index()
+    print(f'Indexed {count} submissions')
+
+
+@app.cli.command('export-submissions')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default=None, help='Defaults to the output file extension.')
+@click.option('--type', 'submission_kind', type=click.Choice(SUBMISSION_TYPES), default=None, help='Only export one submission type.')
+@click.option('--client-name', default=None, help='Only export submissions for this client.')
+@click.option('--ramp-start-from', default=None, help='Earliest ramp start date (YYYY-MM-DD).')
+@click.option('--ramp-start-to', default=None, help='Latest ramp start date (YYYY-MM-DD).')
+def export_submissions_command(output, export_format, submission_kind, client_name, ramp_start_from, ramp_start_to):
+    """Export submissions to a CSV or xlsx file"""
+    export_format = export_format or ('xlsx' if output.lower().endswith('.xlsx') else 'csv')
+    query = parse_query({'type': submission_kind, 'client_name': client_name,
+                         'ramp_start_from': ramp_start_from, 'ramp_start_to': ramp_start_to})
+    count = write_xlsx(output, query) if export_format == 'xlsx' else write_csv(output, query)
+    print(f'Exported {count} submissions to {output}')
+
+
+@app.cli.command('sweep-sessions')
+@click.option('--max-age-days', type=float, default=None, help='Expire sessions not saved for this many days (default: SESSION_MAX_AGE).')
+@click.option('--compact', is_flag=True, help='Also remove empty shard directories / vacuum the session database.')
+def sweep_sessions_command(max_age_days, compact):
+    """Delete abandoned server-side sessions and report reclaimed space"""
+    max_age = max_age_days * 24 * 3600 if max_age_days is not None else None
+    result = session_store.sweep(max_age, compact=compact)
+    print(f"Removed {result['sessions']} sessions, reclaimed {result['bytes']} bytes")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request, storage, template and session cache metrics of all workers in Prometheus text format"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/startup-stats')
+def startup_stats():
+    """Start-up phase timings and time to first response of the worker answering (for admin purposes)"""
+    return jsonify(app.extensions['startup'].stats())
+
+@app.route('/session-cache-stats')
+def session_cache_stats():
+    """Session cache hit/miss/eviction counters (for admin purposes)"""
+    return jsonify(session_store.stats())
@@ -0,0 +1,268 @@
+"""What-if sweeps over ramp plan parameters.
+
+A sweep takes the wizard's form data plus a grid of alternative values (batch
+size, training/nesting length, hiring capacity, lead time, support ratios) and
+simulates every combination with ``ramp_plan.simulate_ramp``. Variants are
+evaluated in chunks on a small process pool (``SWEEP_POOL_WORKERS`` per web
+worker), bounded by a time budget; each variant's summary is cached under a
+hash of its inputs, so repeating or refining a sweep only simulates the
+combinations not seen before.
+
+Sweeps run inside a request are capped at ``SWEEP_MAX_SYNC_TIME_BUDGET``
+seconds, well below gunicorn's 30 second worker timeout. Grids of more than
+``SWEEP_SYNC_MAX_SCENARIOS`` variants, or longer budgets, go to the job queue
+(``sweep_needs_job``).
+"""
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from ramp_plan import simulate_ramp
+
+logger = logging.getLogger(__name__)
+
+# Form fields a sweep may vary, plus a multiplier applied to every hiring capacity
+SWEEP_PARAMETERS = ('batch_size', 'training_duration', 'training_duration_number', 'nesting_duration',
+                    'nesting_duration_number', 'hiring_capacity_weekly', 'hiring_capacity_monthly',
+                    'recruitment_lead_time', 'trainer_ratio', 'supervisor_ratio', 'qa_ratio', 'capacity_scale')
+CAPACITY_FIELDS = ('hiring_capacity_weekly', 'hiring_capacity_monthly')
+CAPACITY_PREFIXES = ('weekly_capacity_', 'monthly_capacity_')
+
+MAX_SCENARIOS = int(os.environ.get('SWEEP_MAX_SCENARIOS', 5000))
+DEFAULT_TIME_BUDGET = float(os.environ.get('SWEEP_TIME_BUDGET', 10))
+MAX_TIME_BUDGET = float(os.environ.get('SWEEP_MAX_TIME_BUDGET', 60))
+MAX_SYNC_TIME_BUDGET = float(os.environ.get('SWEEP_MAX_SYNC_TIME_BUDGET', 10))
+SYNC_MAX_SCENARIOS = int(os.environ.get('SWEEP_SYNC_MAX_SCENARIOS', 500))
+POOL_WORKERS = int(os.environ.get('SWEEP_POOL_WORKERS', min(os.cpu_count() or 1, 2)))
+CACHE_SIZE = int(os.environ.get('SWEEP_CACHE_SIZE', 50000))
+CHUNK_SIZE = 25
+INLINE_MAX = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def expand_grid(grid):
+    """List of {parameter: value} overrides for every combination in the grid"""
+    if not isinstance(grid, dict):
+        raise ValueError('grid must be an object of parameter: [values]')
+    unknown = sorted(set(grid) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError(f'Unknown sweep parameters: {", ".join(unknown)}')
+    names = sorted(grid)
+    values = []
+    count = 1
+    for name in names:
+        options = grid[name] if isinstance(grid[name], list) else [grid[name]]
+        if not options:
+            raise ValueError(f'No values given for {name}')
+        count *= len(options)
+        values.append(options)
+    if count > MAX_SCENARIOS:
+        raise ValueError(f'Grid expands to {count} scenarios; the limit is {MAX_SCENARIOS}')
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def check_limit(limit):
+    """Validate the number of ranked variants to return"""
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return limit
+
+
+def sweep_needs_job(scenarios, time_budget=None):
+    """Whether a sweep is too large or asks for too long a budget to run inside a request"""
+    return scenarios > SYNC_MAX_SCENARIOS or float(time_budget or DEFAULT_TIME_BUDGET) > MAX_SYNC_TIME_BUDGET
+
+
+def apply_overrides(form_data, sites_config, overrides):
+    """Form data and site configuration for one variant"""
+    overrides = dict(overrides)
+    scale = overrides.pop('capacity_scale', None)
+    form_data = dict(form_data, **overrides)
+    if scale is None:
+        return form_data, sites_config
+    scale = float(scale)
+    for name in CAPACITY_FIELDS:
+        if form_data.get(name) not in (None, ''):
+            form_data[name] = float(form_data[name]) * scale
+    sites_config = {key: float(value) * scale if key.startswith(CAPACITY_PREFIXES) and value not in (None, '') else value
+                    for key, value in sites_config.items()}
+    return form_data, sites_config
+
+
+def scenario_hash(form_data, sites_config, overrides):
+    """Stable hash of everything a variant's plan depends on"""
+    payload = json.dumps([form_data, sites_config, overrides], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def summarize(plan):
+    """Ranking figures for one simulated plan"""
+    totals = plan['totals']
+    return {
+        'ready_date': plan['ready_date'],
+        'ready_week': plan['ready_week'],
+        'on_track': plan['on_track'],
+        'peak_trainers': max(totals['trainers'], default=0),
+        'peak_supervisors': max(totals['supervisors'], default=0),
+        'peak_qa': max(totals['qa'], default=0),
+        'peak_in_training': max(totals['in_training'], default=0),
+    }
+
+
+def evaluate(form_data, sites_config, overrides):
+    """Simulate one variant and return its summary"""
+    variant_form, variant_sites = apply_overrides(form_data, sites_config, overrides)
+    return summarize(simulate_ramp(variant_form, variant_sites))
+
+
+def _evaluate_or_error(form_data, sites_config, overrides):
+    """Summary of one variant, or {'error': ...} so a bad variant doesn't abort the sweep"""
+    try:
+        return evaluate(form_data, sites_config, overrides)
+    except Exception as e:
+        logger.warning('Scenario %s failed: %r', overrides, e)
+        return {'error': str(e) or type(e).__name__}
+
+
+def _evaluate_chunk(form_data, sites_config, chunk):
+    """Worker entry point: summaries for a list of (hash, overrides) pairs"""
+    return [(key, _evaluate_or_error(form_data, sites_config, overrides)) for key, overrides in chunk]
+
+
+def _cache_get(key):
+    with _cache_lock:
+        summary = _cache.get(key)
+        if summary is not None:
+            _cache.move_to_end(key)
+        return summary
+
+
+def _cache_put(results):
+    with _cache_lock:
+        for key, summary in results:
+            _cache[key] = summary
+            _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def get_pool():
+    """The process pool for this worker process, created on first use"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # forkserver children don't inherit the web worker's threads and sqlite handles
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=max(POOL_WORKERS, 1), mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool():
+    """Drop a broken pool so the next sweep starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _rank_key(item):
+    summary = item['summary']
+    if 'error' in summary:
+        return (2, 0, 0, 0)
+    ready = summary['ready_week']
+    return (0 if ready is not None else 1, ready or 0, summary['peak_trainers'], summary['peak_in_training'])
+
+
+def run_sweep(form_data, sites_config, grid, time_budget=None, limit=50, max_time_budget=MAX_TIME_BUDGET):
+    """Evaluate every grid variant within the time budget and rank them
+
+    Variants are ranked by earliest full-productivity week, then by peak
+    trainer need. Variants not finished within the budget are reported as
+    pending; late results still land in the cache for the next sweep.
+    """
+    started = time.monotonic()
+    check_limit(limit)
+    budget = min(float(time_budget or DEFAULT_TIME_BUDGET), max_time_budget)
+    variants = expand_grid(grid)
+    keys = [scenario_hash(form_data, sites_config, overrides) for overrides in variants]
+
+    results = {}
+    todo = []
+    queued = set()
+    for key, overrides in zip(keys, variants):
+        if key in results or key in queued:
+            # The same variant listed twice in the grid is only evaluated once
+            continue
+        summary = _cache_get(key)
+        if summary is not None:
+            results[key] = summary
+        else:
+            todo.append((key, overrides))
+            queued.add(key)
+    cached = len(results)
+
+    if len(todo) <= INLINE_MAX:
+        for key, overrides in todo:
+            if time.monotonic() - started > budget:
+                break
+            results.update(_evaluate_chunk(form_data, sites_config, [(key, overrides)]))
+        _cache_put([(key, results[key]) for key, _ in todo if key in results])
+    elif todo:
+        try:
+            pool = get_pool()
+            futures = [pool.submit(_evaluate_chunk, form_data, sites_config, todo[i:i + CHUNK_SIZE])
+                       for i in range(0, len(todo), CHUNK_SIZE)]
+        except BrokenProcessPool:
+            _reset_pool()
+            raise
+        for future in futures:
+            future.add_done_callback(_cache_future)
+        done, not_done = wait(futures, timeout=max(budget - (time.monotonic() - started), 0))
+        for future in not_done:
+            future.cancel()
+        broken = False
+        for future in done:
+            if future.exception() is None:
+                results.update(future.result())
+            elif isinstance(future.exception(), BrokenProcessPool):
+                broken = True
+            else:
+                logger.error('Scenario sweep chunk failed: %s', future.exception())
+        if broken:
+            _reset_pool()
+            logger.error('Scenario sweep pool broke; it will be restarted')
+
+    ranked = [{'overrides': overrides, 'scenario': key, 'summary': results[key]}
+              for key, overrides in zip(keys, variants) if key in results]
+    ranked.sort(key=_rank_key)
+    return {
+        'baseline': _evaluate_or_error(form_data, sites_config, {}),
+        'scenarios': len(variants),
+        'evaluated': len(results) - cached,
+        'cached': cached,
+        'pending': len(variants) - len(ranked),
+        'elapsed': round(time.monotonic() - started, 3),
+        'results': ranked[:limit],
+    }
+
+
+def _cache_future(future):
+    """Cache a finished chunk, including ones that complete after the request's budget"""
+    if not future.cancelled() and future.exception() is None:
+        _cache_put(future.result())
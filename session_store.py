@@ -0,0 +1,686 @@
+"""Server-side wizard sessions: a bounded per-process cache over a pluggable backend.
+
+A session is a document made of independent fragments (one per wizard step,
+plus ``sites_config``), each a flat dict. ``SessionStore.patch`` merges changes
+into just the fragments that changed, so saving a step does not copy or
+re-serialize the rest of the session. Changes are applied as a JSON merge patch
+(RFC 7396, SQLite's ``json_patch``): a ``None`` value removes the key and
+nested dicts are merged. ``merge_patch`` applies the same rules to cached and
+write-behind sessions, so every worker sees the same document.
+
+Sessions live in an LRU cache limited by an approximate memory budget (the size of
+each session's JSON encoding) and an idle TTL, in front of one of two backends:
+
+``SqliteSessionBackend`` (default)
+    One shared SQLite database in WAL mode with one row per fragment, each with
+    its own version. Patches are written through and merged inside SQLite, so only
+    the changed fragment is written. Every session also has a generation number
+    that is bumped on each write, and a cache hit is only served after a
+    primary-key lookup confirms the cached generation is still current, so all
+    gunicorn workers see each other's writes without an external service and
+    without re-parsing unchanged sessions.
+
+``FileSessionBackend``
+    One JSON file per session holding the whole document. Saves only touch memory and mark the session dirty;
+    a background thread writes dirty sessions every ``flush_interval`` seconds via
+    a temp file + rename. Files are sharded into subdirectories by UUID prefix. This
+    is not coherent across processes, so it only suits single-worker deployments.
+
+In write-behind mode a dirty session is always written out before it is evicted,
+and any remaining dirty sessions are flushed at interpreter exit. Sessions that
+have not been saved for ``max_age`` seconds are removed by ``SessionStore.sweep``,
+which runs from the background thread and from ``flask sweep-sessions``.
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def encode(value):
+    """Serialize a document or fragment as compact JSON bytes"""
+    return json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def record_write(backend, size):
+    """Count a session write and its bytes in the metrics"""
+    metrics.inc('wfm_storage_writes_total', store='sessions', backend=backend)
+    metrics.inc('wfm_storage_write_bytes_total', size, store='sessions', backend=backend)
+
+
+def merge_patch(target, changes):
+    """Apply changes to a fragment like SQLite's json_patch: None removes a key, dicts merge recursively"""
+    if not isinstance(changes, dict):
+        return changes
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in changes.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+
+def fragment_sizes(document):
+    """Approximate in-memory cost of each fragment, by its encoded size"""
+    return {name: len(encode(fragment)) for name, fragment in document.items()}
+
+
+def atomic_write(path, payload):
+    """Write bytes to path via a temp file in the same directory and an atomic rename"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class FileSessionBackend:
+    """One JSON file per session, sharded into subdirectories by UUID prefix
+
+    Generations are file modification times. Files written before sharding
+    (directly in ``directory``) are still read and deleted.
+    """
+
+    coherent = False
+    shard_chars = 2
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._known_dirs = set()
+
+    def path(self, session_uuid):
+        """Get path for a session's file"""
+        return os.path.join(self.directory, session_uuid[:self.shard_chars], f'{session_uuid}.json')
+
+    def _flat_path(self, session_uuid):
+        """Get the pre-sharding path for a session's file"""
+        return os.path.join(self.directory, f'{session_uuid}.json')
+
+    def _ensure_dir(self, path):
+        """Create a shard directory once per process instead of on every write"""
+        directory = os.path.dirname(path)
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._known_dirs.add(directory)
+
+    def read(self, session_uuid):
+        """Return (document, fragment sizes, generation) or None if the session does not exist"""
+        for path in (self.path(session_uuid), self._flat_path(session_uuid)):
+            try:
+                with open(path, 'rb') as f:
+                    document = json.loads(f.read())
+                    return document, fragment_sizes(document), os.fstat(f.fileno()).st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return None
+
+    def write(self, session_uuid, document):
+        """Persist a whole document and return its new generation"""
+        payload = encode(document)
+        path = self.path(session_uuid)
+        self._ensure_dir(path)
+        try:
+            atomic_write(path, payload)
+        except FileNotFoundError:
+            # The sweeper removed an empty shard directory under us
+            self._known_dirs.discard(os.path.dirname(path))
+            self._ensure_dir(path)
+            atomic_write(path, payload)
+        record_write('file', len(payload))
+        return os.stat(path).st_mtime_ns
+
+    def delete(self, session_uuid):
+        """Remove a session"""
+        for path in (self.path(session_uuid), self._flat_path(session_uuid)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def generation(self, session_uuid):
+        """Current generation of a session, or None if it does not exist"""
+        try:
+            return os.stat(self.path(session_uuid)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def sweep(self, max_age, compact=False):
+        """Delete session files (and stray temp files) not modified within max_age seconds"""
+        cutoff = time.time() - max_age
+        removed = 0
+        reclaimed = 0
+        if not os.path.isdir(self.directory):
+            return {'sessions': 0, 'bytes': 0}
+
+        directories = [self.directory]
+        with os.scandir(self.directory) as entries:
+            directories.extend(entry.path for entry in entries if entry.is_dir())
+
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    is_session = entry.name.endswith('.json') or entry.name.startswith('.tmp-')
+                    if not is_session or not entry.is_file():
+                        continue
+                    info = entry.stat()
+                    if info.st_mtime >= cutoff:
+                        continue
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    removed += 1
+                    reclaimed += info.st_size
+            if compact and directory != self.directory:
+                try:
+                    os.rmdir(directory)
+                    self._known_dirs.discard(directory)
+                except OSError:
+                    pass  # Not empty
+
+        return {'sessions': removed, 'bytes': reclaimed}
+
+
+class SqliteSessionBackend:
+    """Sessions shared by all worker processes through one SQLite database in WAL mode
+
+    ``sessions`` holds each session's generation and a base document (sessions
+    saved before fragments existed, otherwise ``{}``); ``session_fragments``
+    holds one independently versioned row per fragment, overlaid on the base.
+    """
+
+    coherent = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_uuid TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        generation INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+    CREATE TABLE IF NOT EXISTS session_fragments (
+        session_uuid TEXT NOT NULL,
+        fragment TEXT NOT NULL,
+        data TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (session_uuid, fragment)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path, legacy_dir=None):
+        self.db_path = db_path
+        # Sessions written by the file backend are imported on first read
+        self.legacy = FileSessionBackend(legacy_dir) if legacy_dir else None
+        self._local = threading.local()
+
+    def _conn(self):
+        """Get this thread's connection, reconnecting after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def read(self, session_uuid):
+        """Return (document, fragment sizes, generation) or None if the session does not exist"""
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT data, generation FROM sessions WHERE session_uuid = ?', (session_uuid,)).fetchone()
+        if row is None:
+            return self._import_legacy(session_uuid)
+
+        document = json.loads(row[0])
+        sizes = fragment_sizes(document) if document else {}
+        for name, data in conn.execute(
+                'SELECT fragment, data FROM session_fragments WHERE session_uuid = ?', (session_uuid,)):
+            document[name] = json.loads(data)
+            sizes[name] = len(data)
+        return document, sizes, row[1]
+
+    def _import_legacy(self, session_uuid):
+        """Move a session file left by the file backend into the database"""
+        if self.legacy is None:
+            return None
+        legacy = self.legacy.read(session_uuid)
+        if legacy is None:
+            return None
+        generation = self.write(session_uuid, legacy[0])
+        self.legacy.delete(session_uuid)
+        return legacy[0], legacy[1], generation
+
+    def _bump(self, conn, session_uuid):
+        """Create the session row or advance its generation; returns the new generation"""
+        return conn.execute(
+            "INSERT INTO sessions (session_uuid, data, generation, updated_at) VALUES (?, '{}', 1, ?) "
+            'ON CONFLICT (session_uuid) DO UPDATE SET '
+            'generation = sessions.generation + 1, updated_at = excluded.updated_at '
+            'RETURNING generation',
+            (session_uuid, time.time())).fetchone()[0]
+
+    def write(self, session_uuid, document):
+        """Replace a whole document and return its new generation"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            generation = self._bump(conn, session_uuid)
+            conn.execute("UPDATE sessions SET data = '{}' WHERE session_uuid = ?", (session_uuid,))
+            conn.execute('DELETE FROM session_fragments WHERE session_uuid = ?', (session_uuid,))
+            rows = [(session_uuid, name, encode(fragment).decode('utf-8')) for name, fragment in document.items()]
+            conn.executemany(
+                'INSERT INTO session_fragments (session_uuid, fragment, data, version) VALUES (?, ?, ?, 1)', rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        record_write('sqlite', sum(len(row[2]) for row in rows))
+        return generation
+
+    def patch(self, session_uuid, fragments, replace=()):
+        """Merge {fragment: changes} into the stored fragments and return the new generation
+
+        Merging happens inside SQLite with json_patch, so only the changed
+        fragments are read or written. Fragments named in ``replace`` are
+        overwritten instead of merged.
+        """
+        conn = self._conn()
+        written = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            generation = self._bump(conn, session_uuid)
+            for name, changes in fragments.items():
+                # A new fragment is the patch applied to {}, so it drops None values like merge_patch
+                if name in replace:
+                    value, merge = '?', '?'
+                else:
+                    value, merge = "json_patch('{}', ?)", 'json_patch(session_fragments.data, ?)'
+                data = encode(changes).decode('utf-8')
+                written += len(data)
+                conn.execute(
+                    f'INSERT INTO session_fragments (session_uuid, fragment, data, version) VALUES (?, ?, {value}, 1) '
+                    f'ON CONFLICT (session_uuid, fragment) DO UPDATE SET data = {merge}, '
+                    'version = session_fragments.version + 1',
+                    (session_uuid, name, data, data))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        record_write('sqlite', written)
+        return generation
+
+    def delete(self, session_uuid):
+        """Remove a session"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM session_fragments WHERE session_uuid = ?', (session_uuid,))
+            conn.execute('DELETE FROM sessions WHERE session_uuid = ?', (session_uuid,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if self.legacy is not None:
+            self.legacy.delete(session_uuid)
+
+    def generation(self, session_uuid):
+        """Current generation of a session, or None if it does not exist"""
+        row = self._conn().execute(
+            'SELECT generation FROM sessions WHERE session_uuid = ?', (session_uuid,)).fetchone()
+        return row[0] if row else None
+
+    def recent(self, limit):
+        """UUIDs of the most recently written sessions, newest first"""
+        rows = self._conn().execute(
+            'SELECT session_uuid FROM sessions ORDER BY updated_at DESC LIMIT ?', (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+    def sweep(self, max_age, compact=False):
+        """Delete sessions not written within max_age seconds, optionally vacuuming the database"""
+        conn = self._conn()
+        cutoff = time.time() - max_age
+        expired = 'SELECT session_uuid FROM sessions WHERE updated_at < ?'
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            removed, reclaimed = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions WHERE updated_at < ?',
+                (cutoff,)).fetchone()
+            reclaimed += conn.execute(
+                f'SELECT COALESCE(SUM(LENGTH(data)), 0) FROM session_fragments WHERE session_uuid IN ({expired})',
+                (cutoff,)).fetchone()[0]
+            conn.execute(f'DELETE FROM session_fragments WHERE session_uuid IN ({expired})', (cutoff,))
+            conn.execute('DELETE FROM sessions WHERE updated_at < ?', (cutoff,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if compact:
+            conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+        result = {'sessions': removed, 'bytes': reclaimed}
+        if self.legacy is not None:
+            legacy = self.legacy.sweep(max_age, compact=compact)
+            result = {key: result[key] + legacy[key] for key in result}
+        return result
+
+
+class SessionStore:
+    """LRU + idle-TTL session cache in front of a session backend"""
+
+    def __init__(self, backend, max_bytes=64 * 1024 * 1024, idle_ttl=1800, flush_interval=2.0,
+                 max_age=7 * 24 * 3600, sweep_interval=3600):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        # Abandoned sessions older than max_age are swept every sweep_interval seconds (0 disables)
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        # Coherent backends are written through; the others use write-behind
+        self.write_behind = not backend.coherent
+
+        # session_uuid -> [document, fragment sizes, last_access, generation]
+        self._entries = OrderedDict()
+        # Unwritten write-behind changes get process-local generations
+        self._local_generations = itertools.count(1)
+        self._instance = f'{os.getpid()}-{time.time_ns()}'
+        # Sessions changed in the cache but not yet written (write-behind only)
+        self._dirty = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._flusher = None
+        self._flusher_pid = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+        self.writes = 0
+        self.swept_sessions = 0
+        self.swept_bytes = 0
+
+        atexit.register(self.flush)
+
+    def get(self, session_uuid):
+        """Return the session document ({fragment: dict}), reading it from the backend on a miss
+
+        The returned dict is a copy, but fragments are shared with the cache and
+        must be treated as read-only; change them through ``patch``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_uuid)
+            if entry is not None:
+                if now - entry[2] > self.idle_ttl and self._evict(session_uuid):
+                    # Idle too long: persisted and dropped, reloaded below
+                    self.expirations += 1
+                elif self.write_behind or self.backend.generation(session_uuid) == entry[3]:
+                    self.hits += 1
+                    entry[2] = now
+                    self._entries.move_to_end(session_uuid)
+                    return dict(entry[0])
+                else:
+                    # Another worker saved this session since we cached it
+                    self._discard(session_uuid)
+                    self.stale += 1
+            self.misses += 1
+
+        stored = self.backend.read(session_uuid)
+        if stored is None:
+            return {}
+        document, sizes, generation = stored
+
+        with self._lock:
+            # A concurrent save wins over what we just read
+            if session_uuid not in self._dirty:
+                self._store(session_uuid, document, sizes, now, generation)
+        return dict(document)
+
+    def preload(self, limit):
+        """Cache the most recently written sessions, up to limit and the memory budget; returns how many
+
+        Only coherent backends are preloaded: their cached copies are checked
+        against the backend's generation on every read, so sessions loaded in a
+        preloading master stay correct in the workers forked from it.
+        """
+        if self.write_behind or limit <= 0:
+            return 0
+        loaded = 0
+        # Oldest first, so the newest sessions end up most recently used
+        for session_uuid in reversed(self.backend.recent(limit)):
+            stored = self.backend.read(session_uuid)
+            if stored is None:
+                continue
+            document, sizes, generation = stored
+            with self._lock:
+                if session_uuid not in self._entries:
+                    self._store(session_uuid, document, sizes, time.monotonic(), generation)
+                    loaded += 1
+        return loaded
+
+    def patch(self, session_uuid, fragments, replace=()):
+        """Merge {fragment: changes} into the session, touching only those fragments
+
+        Fragments named in ``replace`` are replaced outright instead of merged.
+        """
+        if not self.write_behind:
+            generation = self.backend.patch(session_uuid, fragments, replace)
+            with self._lock:
+                self.writes += 1
+                entry = self._entries.get(session_uuid)
+                if entry is not None and entry[3] == generation - 1:
+                    # Nobody else wrote in between, so merging locally matches the database
+                    self._merge(session_uuid, entry, fragments, replace, generation)
+                elif entry is None and generation == 1:
+                    self._merge(session_uuid, None, fragments, replace, generation)
+                else:
+                    self._discard(session_uuid)
+            self._ensure_flusher()
+            return
+
+        with self._lock:
+            cached = session_uuid in self._entries
+        if not cached:
+            self.get(session_uuid)
+        with self._lock:
+            self._merge(session_uuid, self._entries.get(session_uuid), fragments, replace, self._local_generation())
+            self._dirty.add(session_uuid)
+        self._ensure_flusher()
+
+    def version(self, session_uuid):
+        """Token that changes whenever the session is saved, without loading it (None if it does not exist)"""
+        if self.write_behind:
+            with self._lock:
+                entry = self._entries.get(session_uuid)
+                if entry is not None:
+                    return entry[3]
+        return self.backend.generation(session_uuid)
+
+    def put(self, session_uuid, document):
+        """Replace the whole session document"""
+        document = dict(document)
+        if not self.write_behind:
+            generation = self.backend.write(session_uuid, document)
+            with self._lock:
+                self.writes += 1
+                self._store(session_uuid, document, fragment_sizes(document), time.monotonic(), generation)
+            self._ensure_flusher()
+            return
+
+        with self._lock:
+            self._store(session_uuid, document, fragment_sizes(document), time.monotonic(), self._local_generation())
+            self._dirty.add(session_uuid)
+        self._ensure_flusher()
+
+    def delete(self, session_uuid):
+        """Drop a session from the cache and the backend"""
+        with self._lock:
+            self._discard(session_uuid)
+            self._dirty.discard(session_uuid)
+            self.backend.delete(session_uuid)
+
+    def flush(self):
+        """Write every dirty session to the backend"""
+        with self._lock:
+            pending = list(self._dirty)
+        written = False
+        for session_uuid in pending:
+            # Write under the lock so a concurrent delete cannot be undone by a stale flush
+            with self._lock:
+                if session_uuid in self._dirty:
+                    self._dirty.discard(session_uuid)
+                    self._write(session_uuid)
+                    written = True
+        if written:
+            self.flushes += 1
+
+    def stats(self):
+        """Counters describing cache effectiveness and size"""
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'dirty': len(self._dirty),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'flushes': self.flushes,
+                'writes': self.writes,
+                'swept_sessions': self.swept_sessions,
+                'swept_bytes': self.swept_bytes,
+            }
+
+    def sweep(self, max_age=None, compact=False):
+        """Expire sessions not saved within max_age seconds; returns counts and reclaimed bytes"""
+        self.flush()
+        result = self.backend.sweep(self.max_age if max_age is None else max_age, compact=compact)
+        with self._lock:
+            self.swept_sessions += result['sessions']
+            self.swept_bytes += result['bytes']
+        return result
+
+    def _local_generation(self):
+        return f'{self._instance}-{next(self._local_generations)}'
+
+    def _merge(self, session_uuid, entry, fragments, replace, generation):
+        """Apply fragment changes to a cached entry (copy-on-write per fragment)"""
+        document = dict(entry[0]) if entry is not None else {}
+        sizes = dict(entry[1]) if entry is not None else {}
+        for name, changes in fragments.items():
+            merged = dict(changes) if name in replace else merge_patch(document.get(name, {}), changes)
+            document[name] = merged
+            sizes[name] = len(encode(merged))
+        self._store(session_uuid, document, sizes, time.monotonic(), generation)
+
+    def _store(self, session_uuid, document, sizes, now, generation):
+        """Insert or replace a cache entry and evict down to the memory budget"""
+        self._discard(session_uuid)
+        self._entries[session_uuid] = [document, sizes, now, generation]
+        self._bytes += sum(sizes.values())
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if not self._evict(oldest):
+                break
+            self.evictions += 1
+
+    def _discard(self, session_uuid):
+        """Remove an entry from the cache without touching the backend"""
+        entry = self._entries.pop(session_uuid, None)
+        if entry is not None:
+            self._bytes -= sum(entry[1].values())
+
+    def _evict(self, session_uuid):
+        """Remove an entry from the cache, persisting it first if it is dirty
+
+        Returns False (and keeps the entry) if the dirty data could not be written.
+        """
+        if session_uuid in self._dirty:
+            self._dirty.discard(session_uuid)
+            self._write(session_uuid)
+            if session_uuid in self._dirty:
+                return False
+        self._discard(session_uuid)
+        return True
+
+    def _expire_idle(self):
+        """Evict sessions that have not been touched within the idle TTL"""
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            # Entries are in access order, so stop at the first fresh one
+            while self._entries:
+                session_uuid, entry = next(iter(self._entries.items()))
+                if entry[2] > cutoff or not self._evict(session_uuid):
+                    break
+                self.expirations += 1
+
+    def _write(self, session_uuid):
+        """Persist one dirty cached session"""
+        entry = self._entries.get(session_uuid)
+        if entry is None:
+            return
+        try:
+            self.backend.write(session_uuid, entry[0])
+            self.writes += 1
+        except (OSError, sqlite3.Error):
+            logger.exception('Failed to persist session %s', session_uuid)
+            # Keep it dirty so the next flush retries
+            self._dirty.add(session_uuid)
+
+    def _ensure_flusher(self):
+        """Start the background thread in this process if it is not running"""
+        # Threads do not survive a fork, so gunicorn --preload workers start their own
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._run_flusher, name='session-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        """Background loop: flush dirty sessions, expire idle ones and sweep abandoned ones"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                self._expire_idle()
+                if self.sweep_interval and time.monotonic() - self._last_sweep >= self.sweep_interval:
+                    self._last_sweep = time.monotonic()
+                    result = self.sweep()
+                    if result['sessions']:
+                        logger.info('Swept %d expired sessions (%d bytes)', result['sessions'], result['bytes'])
+            except Exception:
+                logger.exception('Session flusher iteration failed')
@@ -0,0 +1,267 @@
+"""Erlang C / Erlang A staffing engine for the sizing form.
+
+Turns per-channel volume, AHT, SL %, ASA and abandon % into the number of agents
+required in each half-hour interval. Channels with an imported intraday profile
+use it; the others spread their weekly volume evenly over 7 x 48 intervals.
+
+Each interval is solved for every SL target in one pass: agents are searched
+upward from the stable minimum with an exponential + binary search over a
+shared Erlang B recurrence, and solutions are memoized by their (rounded)
+inputs, so the repeated traffic values of a week of intervals are computed once.
+
+When both abandon % and ASA are given, Erlang A (M/M/n+M) is used with the
+average patience estimated as ASA / abandon rate; otherwise Erlang C. Channels
+without an SL target are sized on workload at ``MAX_OCCUPANCY``.
+"""
+import math
+import os
+from functools import lru_cache
+
+from workbook_import import CHANNELS, INTERVALS_PER_DAY, WEEKS_PER_YEAR
+
+INTERVAL_SECONDS = 1800
+DAYS_PER_WEEK = 7
+DEFAULT_SL_SECONDS = float(os.environ.get('STAFFING_SL_SECONDS', 20))
+MAX_OCCUPANCY = float(os.environ.get('STAFFING_MAX_OCCUPANCY', 0.85))
+MAX_AGENTS = 100000
+
+INTERVAL_LABELS = tuple(f'{i // 2:02d}:{(i % 2) * 30:02d}' for i in range(INTERVALS_PER_DAY))
+
+
+def parse_duration(value):
+    """Seconds from a number or an 'mm:ss' / 'hh:mm:ss' string; None when blank"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(':')
+        try:
+            numbers = [float(part) for part in parts]
+        except ValueError:
+            raise ValueError(f'Invalid duration {value!r}')
+        if len(numbers) > 3:
+            raise ValueError(f'Invalid duration {value!r}')
+        seconds = 0.0
+        for number in numbers:
+            seconds = seconds * 60 + number
+    if seconds < 0 or math.isnan(seconds):
+        raise ValueError(f'Invalid duration {value!r}')
+    return seconds
+
+
+def _percent(value):
+    """Fraction from a percentage value; None when blank"""
+    if value is None or value == '':
+        return None
+    return float(value) / 100
+
+
+def _log_gamma_p(a, x):
+    """Log of the regularized lower incomplete gamma function P(a, x)"""
+    if x <= 0:
+        return -math.inf
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series expansion
+        term = total = 1 / a
+        denominator = a
+        for _ in range(100000):
+            denominator += 1
+            term *= x / denominator
+            total += term
+            if term < total * 1e-15:
+                break
+        return log_prefix + math.log(total)
+    # Continued fraction for Q(a, x) = 1 - P(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 100000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.log1p(-min(math.exp(log_prefix) * h, 1 - 1e-16))
+
+
+def _service(agents, traffic, aht, sl_seconds, patience, blocking):
+    """(service level, average wait, abandon rate) for agents given Erlang B blocking"""
+    if patience is None:
+        # Erlang C
+        if agents <= traffic:
+            return 0.0, math.inf, 0.0
+        wait_probability = blocking * agents / (agents - traffic * (1 - blocking))
+        service_level = 1 - wait_probability * math.exp(-(agents - traffic) * sl_seconds / aht)
+        return service_level, wait_probability * aht / (agents - traffic), 0.0
+
+    # Erlang A: x = n*mu/theta, y = lambda/theta
+    if blocking <= 0:
+        return 1.0, 0.0, 0.0
+    x = agents * patience / aht
+    y = traffic * patience / aht
+    log_gamma = _log_gamma_p(x, y)
+    log_a = math.log(x) + y - x * math.log(y) + math.lgamma(x) + log_gamma
+    wait_probability = 1 / (1 + math.exp(math.log1p(-blocking) - log_a - math.log(blocking)))
+    utilization = traffic / agents
+    abandon = wait_probability * (1 - (1 - math.exp(-log_a)) / utilization)
+    abandon = min(max(abandon, 0.0), 1.0)
+    late = math.exp(_log_gamma_p(x, y * math.exp(-sl_seconds / patience)) - log_gamma)
+    return 1 - wait_probability * late, abandon * patience, abandon
+
+
+@lru_cache(maxsize=65536)
+def solve_interval(traffic, aht, sl_targets, sl_seconds, asa_target=None, abandon_target=None, patience=None):
+    """Minimum agents meeting each SL target for one interval's offered traffic (Erlangs)
+
+    Returns one (agents, service level, average wait, abandon rate) tuple per
+    target, in the order of ``sl_targets``.
+    """
+    if traffic <= 0:
+        return tuple((0, 1.0, 0.0, 0.0) for _ in sl_targets)
+
+    blocking = [1.0]
+
+    def metrics(agents):
+        while len(blocking) <= agents:
+            k = len(blocking)
+            blocking.append(traffic * blocking[-1] / (k + traffic * blocking[-1]))
+        return _service(agents, traffic, aht, sl_seconds, patience, blocking[agents])
+
+    def meets(agents, target):
+        service_level, wait, abandon = metrics(agents)
+        return (service_level >= target and
+                (asa_target is None or wait <= asa_target) and
+                (abandon_target is None or abandon <= abandon_target))
+
+    results = {}
+    low = 1 if patience is not None else int(traffic) + 1
+    if low > MAX_AGENTS:
+        raise ValueError('Staffing requirement exceeds the supported maximum')
+    for target in sorted(set(sl_targets)):
+        # Requirements grow with the target, so each search starts where the last ended
+        step = 1
+        high = low
+        while not meets(high, target):
+            if high >= MAX_AGENTS:
+                raise ValueError('Staffing requirement exceeds the supported maximum')
+            low = high + 1
+            high = min(high + step, MAX_AGENTS)
+            step *= 2
+        while low < high:
+            middle = (low + high) // 2
+            if meets(middle, target):
+                high = middle
+            else:
+                low = middle + 1
+        results[target] = (high,) + tuple(round(value, 4) for value in metrics(high))
+    return tuple(results[target] for target in sl_targets)
+
+
+def workload_agents(traffic):
+    """Agents needed to carry the traffic at the maximum occupancy"""
+    return math.ceil(round(traffic / MAX_OCCUPANCY, 6)) if traffic > 0 else 0
+
+
+def channel_inputs(sizing_data, channel):
+    """Per-interval volumes and AHTs plus service targets for one channel, or None"""
+    data = sizing_data.get(channel) or {}
+    aht = parse_duration(data.get('aht'))
+    if not aht:
+        return None
+
+    intraday = sizing_data.get('intraday') or {}
+    if intraday.get('channel') == channel and any(intraday.get('volume') or ()):
+        profile = 'intraday'
+        labels = list(intraday['intervals'])
+        volumes = list(intraday['volume'])
+        ahts = [interval_aht or aht for interval_aht in intraday['aht']]
+    else:
+        weekly = data.get('weekly_calls') or (data.get('annual_calls') or 0) / WEEKS_PER_YEAR
+        if not weekly:
+            return None
+        profile = 'flat'
+        labels = list(INTERVAL_LABELS) * DAYS_PER_WEEK
+        volumes = [weekly / (DAYS_PER_WEEK * INTERVALS_PER_DAY)] * len(labels)
+        ahts = [aht] * len(labels)
+
+    asa = parse_duration(data.get('asa'))
+    abandon = _percent(data.get('abandon'))
+    return {
+        'profile': profile,
+        'intervals': labels,
+        'volume': volumes,
+        'aht': ahts,
+        'sl': _percent(data.get('sl')),
+        'asa': asa,
+        'abandon': abandon,
+        'patience': asa / abandon if asa and abandon else None,
+    }
+
+
+def staffing_plan(sizing_data, sl_targets=None, sl_seconds=DEFAULT_SL_SECONDS):
+    """Required agents per interval for every channel of a sizing record
+
+    ``sl_targets`` (percentages) overrides each channel's own SL %, so several
+    targets can be compared at once.
+    """
+    targets = tuple(_percent(target) for target in sl_targets) if sl_targets else None
+    channels = {}
+    for channel in CHANNELS:
+        inputs = channel_inputs(sizing_data, channel)
+        if inputs is None:
+            continue
+        channel_targets = targets or ((inputs['sl'],) if inputs['sl'] else None)
+        traffic = [round(volume * aht / INTERVAL_SECONDS, 3) for volume, aht in zip(inputs['volume'], inputs['aht'])]
+
+        plan = {
+            'model': 'workload' if not channel_targets else 'erlang_a' if inputs['patience'] else 'erlang_c',
+            'profile': inputs['profile'],
+            'intervals': inputs['intervals'],
+            'volume': [round(volume, 2) for volume in inputs['volume']],
+            'targets': {},
+        }
+        if inputs['patience']:
+            plan['patience'] = round(inputs['patience'], 1)
+
+        if not channel_targets:
+            agents = [workload_agents(value) for value in traffic]
+            plan['targets']['workload'] = _summarize(agents)
+        else:
+            solutions = [solve_interval(value, round(aht, 1), channel_targets, sl_seconds,
+                                        inputs['asa'], inputs['abandon'], inputs['patience'])
+                         for value, aht in zip(traffic, inputs['aht'])]
+            for i, target in enumerate(channel_targets):
+                agents = [solution[i][0] for solution in solutions]
+                summary = _summarize(agents)
+                summary['service_level'] = [solution[i][1] for solution in solutions]
+                plan['targets'][f'{target * 100:g}'] = summary
+        channels[channel] = plan
+    return {'interval_seconds': INTERVAL_SECONDS, 'sl_seconds': sl_seconds, 'channels': channels}
+
+
+def _summarize(agents):
+    """Per-interval agents plus peak and total agent hours"""
+    return {
+        'agents': agents,
+        'peak': max(agents, default=0),
+        'agent_hours': sum(agents) * INTERVAL_SECONDS / 3600,
+    }
+
+
+def staffing_summary(plan):
+    """Peak agents and agent hours per channel and target, without the interval arrays"""
+    return {
+        channel: {target: {'peak': values['peak'], 'agent_hours': values['agent_hours']}
+                  for target, values in channel_plan['targets'].items()}
+        for channel, channel_plan in plan['channels'].items()
+    }
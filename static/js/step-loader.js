@@ -1,85 +1,94 @@
 /**
  * Smart Step-Specific JavaScript Loader
- * Only loads functionality needed for the current step
+ * Only loads the script bundle for the current step (static/js/steps/stepN.js)
  */
 
 // Get current step from body class or URL
 const currentStep = document.body.className.match(/step-(\d+)/)?.[1] || '1';
 
-console.log(`Loading JS for step ${currentStep}`);
+// Bundle URL rendered by base_step.html (fingerprinted when assets are built)
+const stepBundle = document.currentScript?.dataset.stepBundle;
 
-// Step-specific functionality loaders
-const stepLoaders = {
-    '1': () => {
-        // Ramp Details - minimal functionality
-        const form = document.querySelector('form');
-        if (!form) return;
-        
-        // Only setup date availability for this step
-        const startAvailability = document.getElementById('ramp_start_availability');
-        const startDateContainer = document.getElementById('ramp-start-date-container');
-        
-        if (startAvailability && startDateContainer) {
-            startAvailability.addEventListener('change', (e) => {
-                startDateContainer.style.display = e.target.value === 'available' ? 'block' : 'none';
-            });
-        }
-    },
-    
-    '2': () => {
-        // Training Details - only training specific code
-        console.log('Training step loaded');
-    },
-    
-    '3': () => {
-        // Operational Assumptions - only operational code
-        console.log('Operational step loaded');
-    },
-    
-    '4': () => {
-        // Language & Channel Support - only language code
-        console.log('Language step loaded');
-    },
-    
-    '5': () => {
-        // Location Planning - only location code
-        console.log('Location step loaded');
-    },
-    
-    '6': () => {
-        // Recruitment - Sites configuration
-        const sitesCount = document.getElementById('sites_count');
-        const sitesContainer = document.getElementById('sites-container');
-        
-        if (sitesCount && sitesContainer) {
-            const updateSites = () => {
-                const count = parseInt(sitesCount.value) || 0;
-                sitesContainer.innerHTML = '';
-                
-                for (let i = 1; i <= count; i++) {
-                    const siteDiv = document.createElement('div');
-                    siteDiv.innerHTML = `<label>Site ${i} Location</label><select name="site_location_site${i}" class="form-select"><option value="">Select location...</option></select>`;
-                    sitesContainer.appendChild(siteDiv);
-                }
-            };
-            
-            sitesCount.addEventListener('change', updateSites);
-            updateSites(); // Initial load
-        }
-    },
-    
-    '7': () => {
-        // Sizing Requisition - only sizing code
-        console.log('Sizing step loaded');
+// Run fn once the page is parsed; bundles load after DOMContentLoaded may have fired
+function whenStepReady(fn) {
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', fn);
+    } else {
+        fn();
     }
-};
+}
 
-// Load only the current step's functionality
-if (stepLoaders[currentStep]) {
-    stepLoaders[currentStep]();
+// Load only the current step's bundle
+if (stepBundle) {
+    const script = document.createElement('script');
+    script.src = stepBundle;
+    script.async = false;
+    script.onerror = () => console.error(`Failed to load JS for step ${currentStep}`);
+    document.body.appendChild(script);
 }
 
-// Minimal universal functionality for all steps
-document.addEventListener('DOMContentLoaded', () => {
-    console.log(`Step ${currentStep} JS loaded - FAST MODE`);
-});
\ No newline at end of file
+// Autosave: changed fields are sent in small debounced batches; the server coalesces the writes
+const AUTOSAVE_DELAY = 800;
+const stepForm = document.querySelector('form.form-container');
+const csrfInput = stepForm?.querySelector('input[name="csrf_token"]');
+
+if (stepForm && csrfInput) {
+    const autosave = {
+        url: `/api/ramp-form/step/${currentStep}/autosave`,
+        client: Math.random().toString(36).slice(2) + Date.now().toString(36),
+        seq: 0,
+        dirty: new Set(),
+        timer: null
+    };
+
+    const fieldValue = (name) => {
+        const inputs = Array.from(stepForm.elements).filter(input => input.name === name);
+        if (!inputs.length) return null;
+        if (inputs[0].type === 'radio') return inputs.find(input => input.checked)?.value ?? null;
+        if (inputs[0].type === 'checkbox') {
+            return inputs.length > 1 ? inputs.filter(input => input.checked).map(input => input.value) : inputs[0].checked;
+        }
+        if (inputs[0].multiple) return Array.from(inputs[0].selectedOptions).map(option => option.value);
+        return inputs[0].value;
+    };
+
+    const sendAutosave = () => {
+        clearTimeout(autosave.timer);
+        autosave.timer = null;
+        if (!autosave.dirty.size) return;
+        const changes = {};
+        autosave.dirty.forEach(name => { changes[name] = fieldValue(name); });
+        autosave.dirty.clear();
+        autosave.seq += 1;
+        fetch(autosave.url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            keepalive: true,
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfInput.value},
+            body: JSON.stringify({client: autosave.client, seq: autosave.seq, changes})
+        }).then(response => {
+            if (response.status >= 500) throw new Error(`Autosave failed: ${response.status}`);
+        }).catch(() => {
+            // Network or server error: resend these fields (with their current values) later
+            Object.keys(changes).forEach(name => autosave.dirty.add(name));
+            autosave.timer = setTimeout(sendAutosave, AUTOSAVE_DELAY * 5);
+        });
+    };
+
+    const markDirty = (event) => {
+        const name = event.target.name;
+        if (!name || name === 'csrf_token' || name === 'action') return;
+        autosave.dirty.add(name);
+        clearTimeout(autosave.timer);
+        autosave.timer = setTimeout(sendAutosave, AUTOSAVE_DELAY);
+    };
+
+    stepForm.addEventListener('input', markDirty);
+    stepForm.addEventListener('change', markDirty);
+    // A regular save/next posts every field, so pending autosaves are redundant
+    stepForm.addEventListener('submit', () => {
+        autosave.dirty.clear();
+        clearTimeout(autosave.timer);
+    });
+    window.addEventListener('pagehide', sendAutosave);
+}
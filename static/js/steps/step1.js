@@ -0,0 +1,318 @@
+// Step 1 (ramp details) - loaded by step-loader.js
+// Toggle main form content and client sections based on business type selection
+function toggleBusinessType() {
+    const selectedBusinessType = document.querySelector('input[name="business_type"]:checked');
+    const mainFormContent = document.getElementById('main-form-content');
+    const existingBusinessSection = document.getElementById('existing-business-section');
+    const clientNameSection = document.getElementById('client-name-section');
+    const existingBusinessSelect = document.getElementById('existing-business-select');
+    const clientNameInput = document.getElementById('client-name-input');
+    
+    if (selectedBusinessType) {
+        // Show main form content
+        mainFormContent.style.display = 'block';
+        
+        if (selectedBusinessType.value === 'new_business') {
+            // Show client name field, hide existing business dropdown
+            clientNameSection.style.display = 'block';
+            existingBusinessSection.style.display = 'none';
+            // Clear existing business selection
+            if (existingBusinessSelect) existingBusinessSelect.value = '';
+            
+        } else if (selectedBusinessType.value === 'existing_business') {
+            // Show existing business dropdown, hide client name field
+            existingBusinessSection.style.display = 'block';
+            clientNameSection.style.display = 'none';
+            // Clear client name
+            if (clientNameInput) clientNameInput.value = '';
+        }
+    } else {
+        // Hide main form content when no business type is selected
+        mainFormContent.style.display = 'none';
+        existingBusinessSection.style.display = 'none';
+        clientNameSection.style.display = 'none';
+        // Clear both fields
+        if (existingBusinessSelect) existingBusinessSelect.value = '';
+        if (clientNameInput) clientNameInput.value = '';
+    }
+}
+
+whenStepReady(function() {
+    // Get date input elements first
+    const rampStartDateInput = document.getElementById('ramp-start-date');
+    const rampEndDateInput = document.getElementById('ramp-end-date');
+    const rampStartAvailability = document.getElementById('ramp_start_availability');
+    const rampEndAvailability = document.getElementById('ramp_end_availability');
+    
+    // Validate ramp end date function
+    function updateEndDateMin() {
+        if (rampStartDateInput && rampEndDateInput && rampStartDateInput.value) {
+            rampEndDateInput.min = rampStartDateInput.value;
+            
+            // If end date is less than start date, clear it
+            if (rampEndDateInput.value && rampEndDateInput.value < rampStartDateInput.value) {
+                rampEndDateInput.value = '';
+                showDateValidationError('Ramp End Date cannot be earlier than Ramp Start Date');
+            }
+        }
+    }
+    
+    // Show/hide date containers based on availability selection
+    function setupDateAvailability(availabilityId, containerId) {
+        const availability = document.getElementById(availabilityId);
+        const container = document.getElementById(containerId);
+        
+        // Get help text element
+        const helpTextId = availabilityId === 'ramp_start_availability' ? 'ramp-start-help-text' : 'ramp-end-help-text';
+        const helpText = document.getElementById(helpTextId);
+        
+        if (availability && container) {
+            function toggleDateContainer() {
+                if (availability.value === 'available') {
+                    container.style.display = 'block';
+                    if (helpText) helpText.style.display = 'block';
+                    
+                    // Set default date to 60 days from today for Ramp Start Date
+                    if (availabilityId === 'ramp_start_availability') {
+                        const rampStartInput = document.getElementById('ramp-start-date');
+                        if (rampStartInput && !rampStartInput.value) {
+                            const today = new Date();
+                            const defaultDate = new Date(today);
+                            defaultDate.setDate(today.getDate() + 60);
+                            rampStartInput.value = formatDate(defaultDate);
+                            updateEndDateMin(); // Update min date for end date
+                        }
+                    }
+                } else {
+                    container.style.display = 'none';
+                    if (helpText) helpText.style.display = 'none';
+                    // Clear the date input when hiding
+                    const dateInput = container.querySelector('input[type="date"]');
+                    if (dateInput) {
+                        dateInput.value = '';
+                        if (availabilityId === 'ramp_start_availability') {
+                            updateEndDateMin(); // Update min date for end date
+                        }
+                    }
+                }
+            }
+            
+            availability.addEventListener('change', toggleDateContainer);
+            toggleDateContainer(); // Initial call
+        }
+    }
+    
+    setupDateAvailability('ramp_start_availability', 'ramp-start-date-container');
+    setupDateAvailability('ramp_end_availability', 'ramp-end-date-container');
+    
+    // Get current date and date utilities
+    function getCurrentDate() {
+        const today = new Date();
+        return today;
+    }
+    
+    // Format date for input field (YYYY-MM-DD)
+    function formatDate(date) {
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        return `${year}-${month}-${day}`;
+    }
+    
+    // Calculate minimum date based on lead time
+    function calculateMinDate(leadTimeDays) {
+        const currentDate = getCurrentDate();
+        const minDate = new Date(currentDate);
+        minDate.setDate(currentDate.getDate() + parseInt(leadTimeDays));
+        return minDate;
+    }
+    
+    // Lead time selection logic
+    const leadTimeSelect = document.getElementById('lead-time-selection');
+    
+    function updateDateAvailability() {
+        const selection = leadTimeSelect ? leadTimeSelect.value : '';
+        const dateSelectionRow = document.getElementById('date-selection-row');
+        
+        if (selection === 'not_available') {
+            // Hide entire date selection row
+            if (dateSelectionRow) {
+                dateSelectionRow.style.display = 'none';
+            }
+            
+        } else if (selection === 'current_date' || selection === '30' || selection === '60') {
+            // Show date selection row
+            if (dateSelectionRow) {
+                dateSelectionRow.style.display = 'block';
+            }
+            
+            // Enable date selections
+            if (rampStartAvailability) {
+                rampStartAvailability.disabled = false;
+                rampStartAvailability.value = 'available';
+            }
+            if (rampEndAvailability) {
+                rampEndAvailability.disabled = false;
+            }
+            
+            // Set date logic based on selection
+            if (rampStartDateInput) {
+                let minDate;
+                if (selection === '30') {
+                    // Current date + 30 days
+                    minDate = calculateMinDate('30');
+                } else if (selection === '60') {
+                    // Current date + 60 days
+                    minDate = calculateMinDate('60');
+                } else if (selection === 'current_date') {
+                    // From today
+                    minDate = getCurrentDate();
+                }
+                
+                const formattedDate = formatDate(minDate);
+                rampStartDateInput.min = formattedDate;
+                
+                // Auto-set the ramp start date to the minimum date for lead time selections
+                if (selection === '30' || selection === '60') {
+                    rampStartDateInput.value = formattedDate;
+                } else if (selection === 'current_date') {
+                    // For current date, only set if no value exists
+                    if (!rampStartDateInput.value) {
+                        rampStartDateInput.value = formattedDate;
+                    }
+                }
+                
+                updateEndDateMin();
+            }
+            
+            // Show date containers
+            const startContainer = document.getElementById('ramp-start-date-container');
+            if (startContainer) startContainer.style.display = 'block';
+            
+        } else {
+            // Hide date selection row when no valid option selected
+            if (dateSelectionRow) {
+                dateSelectionRow.style.display = 'none';
+            }
+            
+            // Reset to default state
+            if (rampStartAvailability) {
+                rampStartAvailability.disabled = false;
+                rampStartAvailability.value = '';
+            }
+            if (rampEndAvailability) {
+                rampEndAvailability.disabled = false;
+                rampEndAvailability.value = '';
+            }
+        }
+    }
+    
+    if (leadTimeSelect) {
+        leadTimeSelect.addEventListener('change', updateDateAvailability);
+    }
+    
+    
+    // Show validation error
+    function showDateValidationError(message) {
+        // Remove existing error
+        const existingError = document.getElementById('date-validation-error');
+        if (existingError) {
+            existingError.remove();
+        }
+        
+        // Add new error message
+        const errorDiv = document.createElement('div');
+        errorDiv.id = 'date-validation-error';
+        errorDiv.className = 'alert alert-danger mt-2';
+        errorDiv.innerHTML = `<i class="fas fa-exclamation-triangle me-2"></i>${message}`;
+        
+        const endDateContainer = rampEndDateInput.closest('.col-md-6');
+        if (endDateContainer) {
+            endDateContainer.appendChild(errorDiv);
+            
+            // Auto-remove after 5 seconds
+            setTimeout(() => {
+                if (errorDiv.parentNode) {
+                    errorDiv.remove();
+                }
+            }, 5000);
+        }
+    }
+    
+    // Add event listener for start date changes
+    if (rampStartDateInput) {
+        rampStartDateInput.addEventListener('change', updateEndDateMin);
+    }
+    
+    // Add event listener for end date validation
+    if (rampEndDateInput) {
+        rampEndDateInput.addEventListener('change', function() {
+            if (this.value && rampStartDateInput.value && this.value < rampStartDateInput.value) {
+                this.value = '';
+                showDateValidationError('Ramp End Date cannot be earlier than Ramp Start Date');
+            }
+        });
+    }
+    
+    // Show/hide FTE/HC dropdown based on ramp requirement input
+    function setupRequirementTypeDropdown() {
+        const rampRequirementInput = document.getElementById('ramp-requirement-input');
+        const requirementTypeContainer = document.getElementById('requirement-type-container');
+        
+        if (rampRequirementInput && requirementTypeContainer) {
+            function toggleRequirementType() {
+                if (rampRequirementInput.value && rampRequirementInput.value.trim() !== '') {
+                    requirementTypeContainer.style.display = 'block';
+                } else {
+                    requirementTypeContainer.style.display = 'none';
+                    // Reset dropdown when hiding
+                    const requirementTypeSelect = document.getElementById('ramp-requirement-type');
+                    if (requirementTypeSelect) {
+                        requirementTypeSelect.value = '';
+                    }
+                }
+            }
+            
+            // Listen for both input and change events
+            rampRequirementInput.addEventListener('input', function() {
+                toggleRequirementType();
+                // Save to session storage for other steps to access
+                if (rampRequirementInput.value) {
+                    window.sessionStorage.setItem('ramp_requirement', rampRequirementInput.value);
+                } else {
+                    window.sessionStorage.removeItem('ramp_requirement');
+                }
+            });
+            rampRequirementInput.addEventListener('change', function() {
+                toggleRequirementType();
+                // Save to session storage for other steps to access
+                if (rampRequirementInput.value) {
+                    window.sessionStorage.setItem('ramp_requirement', rampRequirementInput.value);
+                } else {
+                    window.sessionStorage.removeItem('ramp_requirement');
+                }
+            });
+            
+            // Initial check on page load
+            toggleRequirementType();
+            
+            // Save initial value if it exists
+            if (rampRequirementInput.value) {
+                window.sessionStorage.setItem('ramp_requirement', rampRequirementInput.value);
+            }
+        }
+    }
+    
+    setupRequirementTypeDropdown();
+    
+    // Initialize business type functionality
+    const businessTypeRadios = document.querySelectorAll('input[name="business_type"]');
+    businessTypeRadios.forEach(radio => {
+        radio.addEventListener('change', toggleBusinessType);
+    });
+    
+    // Initialize on page load if business type is already selected
+    toggleBusinessType();
+    
+    // Form initialized
+});
@@ -0,0 +1,65 @@
+// Step 2 (training schedule) - loaded by step-loader.js
+// Toggle Training Support Details based on availability selection
+function toggleTrainingDetails() {
+    const selectedRadio = document.querySelector('input[name="training-availability"]:checked');
+    const availability = selectedRadio ? selectedRadio.value : '';
+    const content = document.getElementById('training-support-content');
+    const trainerDetails = document.getElementById('trainer-details');
+    
+    if (availability === 'available') {
+        content.style.display = 'block';
+        trainerDetails.style.display = 'block';
+    } else {
+        content.style.display = 'none';
+        trainerDetails.style.display = 'none';
+        // Clear all form data when hiding
+        clearTrainingFormData();
+    }
+}
+
+// Clear all training form data
+function clearTrainingFormData() {
+    // Clear all select fields
+    document.querySelectorAll('select[name="client_trainer"], select[name="internal_trainer"]').forEach(function(select) {
+        select.value = '';
+    });
+    
+    // Clear total trainers fields
+    document.querySelectorAll('input[name="total_trainers"]').forEach(function(input) {
+        input.value = '0';
+    });
+}
+
+whenStepReady(function() {
+    // Calculate total trainers based on trainer selections
+    function calculateTotalTrainers() {
+        let total = 0;
+        
+        // Get values from both trainer fields
+        const clientField = document.querySelector('#trainer-details select[name="client_trainer"]');
+        const internalField = document.querySelector('#trainer-details select[name="internal_trainer"]');
+        
+        const client = parseInt(clientField?.value) || 0;
+        const internal = parseInt(internalField?.value) || 0;
+        total = client + internal;
+        
+        // Update total trainer field
+        const totalField = document.querySelector('#trainer-details input[name="total_trainers"]');
+        if (totalField) {
+            totalField.value = total;
+        }
+    }
+    
+    // Bind change listeners to trainer selects
+    document.querySelectorAll('select[name="client_trainer"], select[name="internal_trainer"]').forEach(el => {
+        el.addEventListener('change', calculateTotalTrainers);
+    });
+    
+    // Initialize visibility if "Available" is already selected
+    const selectedAvailability = document.querySelector('input[name="training-availability"]:checked');
+    if (selectedAvailability && selectedAvailability.value === 'available') {
+        document.getElementById('training-support-content').style.display = 'block';
+        document.getElementById('trainer-details').style.display = 'block';
+        calculateTotalTrainers();
+    }
+});
@@ -0,0 +1,38 @@
+// Step 3 (operational assumptions) - loaded by step-loader.js
+whenStepReady(function() {
+    // Validate ratio format
+    function validateRatio(input) {
+        const ratioPattern = /^\d+:\d+$/;
+        
+        input.addEventListener('blur', function() {
+            const value = this.value.trim();
+            if (value && !ratioPattern.test(value)) {
+                this.classList.add('is-invalid');
+                
+                // Add/update error message
+                let errorMsg = this.parentNode.parentNode.querySelector('.invalid-feedback');
+                if (!errorMsg) {
+                    errorMsg = document.createElement('div');
+                    errorMsg.className = 'invalid-feedback';
+                    this.parentNode.parentNode.appendChild(errorMsg);
+                }
+                errorMsg.textContent = 'Please use format like "1:10" (number:number)';
+            } else {
+                this.classList.remove('is-invalid');
+                const errorMsg = this.parentNode.parentNode.querySelector('.invalid-feedback');
+                if (errorMsg) {
+                    errorMsg.remove();
+                }
+            }
+        });
+        
+        input.addEventListener('input', function() {
+            this.classList.remove('is-invalid');
+        });
+    }
+    
+    // Apply validation to all ratio inputs
+    validateRatio(document.getElementById('supervisor_ratio'));
+    validateRatio(document.getElementById('qa_ratio'));
+    validateRatio(document.getElementById('trainer_ratio'));
+});
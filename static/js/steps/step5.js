@@ -0,0 +1,170 @@
+// Step 5 (location planning) - loaded by step-loader.js
+// Toggle Location Details based on availability selection
+function toggleLocationDetails() {
+    const selectedRadio = document.querySelector('input[name="location-availability"]:checked');
+    const availability = selectedRadio ? selectedRadio.value : '';
+    const content = document.getElementById('location-details-content');
+    
+    if (availability === 'available') {
+        content.style.display = 'block';
+    } else {
+        content.style.display = 'none';
+        // Clear all form data when hiding
+        document.querySelectorAll('input[name="geo_country"]').forEach(function(checkbox) {
+            checkbox.checked = false;
+        });
+        document.querySelectorAll('.country-headcount').forEach(function(input) {
+            input.value = '';
+        });
+    }
+    
+    // Update counters when visibility changes
+    if (window.updateCountryCount) updateCountryCount();
+    if (window.updateResourceSummary) updateResourceSummary();
+}
+
+whenStepReady(function() {
+    // Update country selection count and distribution display
+    function updateCountryCount() {
+        const checkboxes = document.querySelectorAll('input[name="geo_country"]:checked');
+        const countDisplay = document.querySelector('.country-count-display');
+        
+        if (countDisplay) {
+            countDisplay.textContent = `${checkboxes.length} Countries Selected`;
+            countDisplay.className = checkboxes.length > 0 ? 'badge bg-success country-count-display' : 'badge bg-info country-count-display';
+        }
+        
+        // Update distribution section visibility
+        updateDistributionDisplay();
+    }
+    
+    // Update distribution section based on selected countries
+    function updateDistributionDisplay() {
+        const checkboxes = document.querySelectorAll('input[name="geo_country"]:checked');
+        const selectedCountries = Array.from(checkboxes).map(cb => cb.value);
+        const noCountriesMessage = document.getElementById('no-countries-message');
+        
+        // Hide all country items first
+        document.querySelectorAll('.country-item').forEach(function(item) {
+            item.style.display = 'none';
+        });
+        
+        // Show selected countries
+        selectedCountries.forEach(function(countryCode) {
+            const countryItem = document.querySelector(`.country-item[data-country="${countryCode}"]`);
+            if (countryItem) {
+                countryItem.style.display = 'block';
+            }
+        });
+        
+        // Show/hide no countries message
+        if (selectedCountries.length === 0) {
+            noCountriesMessage.style.display = 'block';
+        } else {
+            noCountriesMessage.style.display = 'none';
+        }
+    }
+    
+    // Add event listeners to country checkboxes
+    document.querySelectorAll('input[name="geo_country"]').forEach(function(checkbox) {
+        checkbox.addEventListener('change', function() {
+            updateCountryCount();
+            updateResourceSummary();
+        });
+    });
+    
+    // Update resource summary with balance calculation (only for visible countries)
+    function updateResourceSummary() {
+        // Get the requirement from Step 1 Ramp Details
+        const rampRequirementInput = document.getElementById('ramp-requirement-input');
+        let totalRequired = 0;
+        
+        if (rampRequirementInput && rampRequirementInput.value) {
+            totalRequired = parseInt(rampRequirementInput.value) || 0;
+        } else {
+            // Fallback: try to get from session data or use 0 if not available
+            const sessionData = window.sessionStorage.getItem('ramp_requirement');
+            totalRequired = sessionData ? parseInt(sessionData) : 0;
+        }
+        
+        let totalAllocated = 0;
+        document.querySelectorAll('.country-headcount').forEach(function(input) {
+            // Only count visible country inputs
+            const countryItem = input.closest('.country-item');
+            if (countryItem && countryItem.style.display !== 'none') {
+                totalAllocated += parseInt(input.value) || 0;
+            }
+        });
+        
+        const balance = totalRequired - totalAllocated;
+        
+        // Format numbers with thousands separator for professional look
+        document.getElementById('total-required').textContent = totalRequired.toLocaleString();
+        document.getElementById('total-allocated').textContent = totalAllocated.toLocaleString();
+        document.getElementById('balance').textContent = Math.abs(balance).toLocaleString() + (balance < 0 ? ' Over' : '');
+        
+        // Style balance based on value with corporate colors
+        const balanceElement = document.getElementById('balance');
+        balanceElement.className = 'kpi-value h4 fw-semibold numeric';
+        if (balance >= 0) {
+            balanceElement.classList.add('text-success');
+        } else {
+            balanceElement.classList.add('text-danger');
+        }
+        
+        // Calculate percentage for progress bar
+        const actualPercentage = totalRequired > 0 ? (totalAllocated / totalRequired) * 100 : 0;
+        const displayPercentage = Math.min(actualPercentage, 100);
+        
+        // Update progress bar
+        const progressBar = document.getElementById('allocation-progress');
+        const progressContainer = progressBar.closest('.progress');
+        const percentElement = document.getElementById('allocation-percent');
+        
+        progressBar.style.width = `${displayPercentage}%`;
+        percentElement.textContent = `${Math.round(actualPercentage)}%`;
+        
+        // Update ARIA attributes
+        progressContainer.setAttribute('aria-valuenow', Math.round(actualPercentage));
+        
+        // Corporate color coding for progress bar
+        progressBar.className = 'progress-bar';
+        if (actualPercentage > 100) {
+            progressBar.classList.add('bg-danger'); // Over-allocated
+        } else if (actualPercentage >= 90) {
+            progressBar.classList.add('bg-success'); // Near complete
+        } else if (actualPercentage >= 50) {
+            progressBar.classList.add('bg-primary'); // Good progress
+        } else {
+            progressBar.classList.add('bg-info'); // Starting
+        }
+    }
+    
+    // Add event listeners to headcount inputs
+    document.querySelectorAll('.country-headcount').forEach(function(input) {
+        input.addEventListener('input', updateResourceSummary);
+    });
+    
+    // Reset function
+    window.resetLocationForm = function() {
+        document.querySelectorAll('.country-headcount').forEach(function(input) {
+            input.value = '';
+        });
+        document.querySelectorAll('input[name="geo_country"]').forEach(function(checkbox) {
+            checkbox.checked = false;
+        });
+        updateCountryCount();
+        updateResourceSummary();
+    };
+    
+    // Set checkboxes based on server-provided data
+    window.preselectedCountries = JSON.parse(document.getElementById('preselected-countries').textContent);
+    const preselected = window.preselectedCountries || [];
+    document.querySelectorAll('input[name="geo_country"]').forEach(function(checkbox) {
+        checkbox.checked = preselected.includes(checkbox.value);
+    });
+    
+    // Initial updates
+    updateCountryCount();
+    updateResourceSummary();
+});
@@ -0,0 +1,723 @@
+// Step 6 (recruitment) - loaded by step-loader.js
+whenStepReady(function() {
+    // Handle site configuration toggle - FIXED: Show both sections only after selection
+    function handleSiteConfigToggle() {
+        const yesRadio = document.getElementById('site_config_yes');
+        const noRadio = document.getElementById('site_config_no');
+        const sitesSection = document.getElementById('sites-configuration-section');
+        const headcountSection = document.getElementById('headcount-summary-section');
+        
+        // Only show both sections if either Yes or No is selected
+        if (yesRadio.checked || noRadio.checked) {
+            sitesSection.style.display = 'block';
+            headcountSection.style.display = 'block';
+        } else {
+            sitesSection.style.display = 'none';
+            headcountSection.style.display = 'none';
+        }
+        
+        if (yesRadio.checked) {
+            // Show full table with all fields including Site Location and Agent Profile
+            initializeSitesConfiguration(true); // true = full configuration
+        } else {
+            // Show simplified table with only capacity fields (no Site Location, no Agent Profile)
+            initializeSitesConfiguration(false); // false = simplified configuration
+        }
+    }
+    
+    // Add event listeners to radio buttons
+    document.getElementById('site_config_yes').addEventListener('change', handleSiteConfigToggle);
+    document.getElementById('site_config_no').addEventListener('change', handleSiteConfigToggle);
+    
+    // Initialize headcount summary on page load
+    initializeHeadcountSummary();
+    
+    // Restore saved site configuration state
+    restoreSiteConfigurationState();
+    
+    // Function to populate beautiful headcount summary cards
+    function initializeHeadcountSummary() {
+        // Parse country headcount data from server
+        let countryHeadcounts = {};
+        try {
+            const headcountData = document.getElementById('country-headcounts');
+            if (headcountData) {
+                countryHeadcounts = JSON.parse(headcountData.textContent || '{}');
+            }
+        } catch (e) {
+            console.warn('Could not parse country headcount data for summary:', e);
+        }
+        
+        const cardsContainer = document.getElementById('headcount-cards-container');
+        const noDataCard = document.getElementById('no-data-card');
+        
+        // Country code to short names (2 words max)
+        const countryNames = {
+            'CAN': 'Canada',
+            'COL': 'Colombia', 
+            'HKG': 'Hong Kong',
+            'IND': 'India',
+            'MEX': 'Mexico',
+            'PAN': 'Panama',
+            'PHL': 'Philippines',
+            'POL': 'Poland',
+            'TTO': 'Trinidad Tobago',
+            'USA': 'USA'
+        };
+        
+        // Country flag emojis for visual appeal
+        const countryFlags = {
+            'CAN': '🇨🇦', 'COL': '🇨🇴', 'HKG': '🇭🇰', 'IND': '🇮🇳', 
+            'MEX': '🇲🇽', 'PAN': '🇵🇦', 'PHL': '🇵🇭', 'POL': '🇵🇱', 
+            'TTO': '🇹🇹', 'USA': '🇺🇸'
+        };
+        
+        if (Object.keys(countryHeadcounts).length > 0) {
+            // Hide no data card
+            noDataCard.style.display = 'none';
+            
+            // Create beautiful cards for each country
+            Object.entries(countryHeadcounts).forEach(([countryCode, headcount]) => {
+                const countryName = countryNames[countryCode] || countryCode;
+                const flag = countryFlags[countryCode] || '🌍';
+                
+                const simpleItem = document.createElement('div');
+                simpleItem.className = 'd-inline-block text-center me-4 mb-2';
+                simpleItem.innerHTML = `
+                    <div style="font-size: 1.2rem;">${flag}</div>
+                    <div style="font-size: 1rem; font-weight: bold; color: #666;">${headcount || 0}</div>
+                `;
+                cardsContainer.appendChild(simpleItem);
+            });
+        } else {
+            // Show no data card
+            noDataCard.style.display = 'block';
+        }
+    }
+    
+    // Reset function (simplified since we removed the form fields)
+    window.resetRecruitmentForm = function() {
+        // Reset radio buttons to unselected (user must choose)
+        document.getElementById('site_config_no').checked = false;
+        document.getElementById('site_config_yes').checked = false;
+        handleSiteConfigToggle();
+        console.log('Recruitment form reset');
+    };
+    
+    // Initialize Sites Configuration - FIXED: Accept fullConfig parameter
+    function initializeSitesConfiguration(fullConfig = true) {
+        // Parse country headcount data from server
+        let countryHeadcounts = {};
+        try {
+            const headcountData = document.getElementById('country-headcounts');
+            if (headcountData) {
+                countryHeadcounts = JSON.parse(headcountData.textContent || '{}');
+            }
+        } catch (e) {
+            console.warn('Could not parse country headcount data:', e);
+        }
+        
+        // If we have headcount data, use those countries. Otherwise show all countries.
+        const selectedCountries = Object.keys(countryHeadcounts);
+        if (selectedCountries.length > 0) {
+            buildSitesConfigurationTable(countryHeadcounts, fullConfig);
+        } else {
+            // Fallback: show message that no countries are selected in Location Details
+            showNoCountriesMessage();
+        }
+    }
+    
+    // Build sites configuration table with country headcount data - FIXED: Accept fullConfig
+    function buildSitesConfigurationTable(countryHeadcounts, fullConfig = true) {
+        const headerRow = document.getElementById('sites-header-row');
+        const tableBody = document.getElementById('sites-table-body');
+        
+        if (!headerRow || !tableBody) return;
+        
+        // Country names mapping
+        const countryNames = {
+            'CAN': 'CAN', 'COL': 'COL', 'HKG': 'HKG', 'IND': 'IND',
+            'MEX': 'MEX', 'PAN': 'PAN', 'PHL': 'PHL', 'POL': 'POL',
+            'TTO': 'TTO', 'USA': 'USA'
+        };
+        
+        // Clear existing content
+        headerRow.innerHTML = '<th class="metrics-header text-center">Metrics</th>';
+        tableBody.innerHTML = '';
+        
+        // Get country codes and build headers
+        const countryCodes = Object.keys(countryHeadcounts);
+        countryCodes.forEach(countryCode => {
+            const countryHeader = document.createElement('th');
+            countryHeader.className = 'country-header text-center';
+            countryHeader.textContent = countryNames[countryCode] || countryCode;
+            headerRow.appendChild(countryHeader);
+        });
+        
+        // Site location options for each country
+        const countrySites = {
+            'CAN': [
+                { value: 'montreal', text: 'Montreal' },
+                { value: 'toronto-02', text: 'Toronto 02' }
+            ],
+            'COL': [
+                { value: 'medellin', text: 'Medellin' }
+            ],
+            'HKG': [
+                { value: 'hong-kong', text: 'Hong Kong' }
+            ],
+            'IND': [
+                { value: 'noida', text: 'Noida' },
+                { value: 'noida-02', text: 'Noida 02' }
+            ],
+            'MEX': [
+                { value: 'mexico-city-02', text: 'Mexico City 02' },
+                { value: 'mexico-city-03', text: 'Mexico City 03' }
+            ],
+            'PAN': [
+                { value: 'panama-city', text: 'Panama City' }
+            ],
+            'PHL': [
+                { value: 'bacolod-city', text: 'Bacolod City' },
+                { value: 'clark-01', text: 'Clark 01' },
+                { value: 'clark-02', text: 'Clark 02' },
+                { value: 'clark-03', text: 'Clark 03' },
+                { value: 'clark-05', text: 'Clark 05' },
+                { value: 'dasmarinas-01', text: 'Dasmarinas 01' },
+                { value: 'dasmarinas-02', text: 'Dasmarinas 02' },
+                { value: 'davao', text: 'Davao' },
+                { value: 'davao-02', text: 'Davao 02' },
+                { value: 'fairview', text: 'Fairview' },
+                { value: 'fairview-02', text: 'Fairview 02' },
+                { value: 'iloilo', text: 'Iloilo' },
+                { value: 'iloilo-02', text: 'Iloilo 02' },
+                { value: 'iloilo-03', text: 'Iloilo 03' },
+                { value: 'santa-rosa', text: 'Santa Rosa' },
+                { value: 'santa-rosa-02', text: 'Santa Rosa 02' },
+                { value: 'talisay-city', text: 'Talisay City' }
+            ],
+            'POL': [
+                { value: 'warsaw', text: 'Warsaw' }
+            ],
+            'TTO': [
+                { value: 'barataria', text: 'Barataria' },
+                { value: 'chaguanas', text: 'Chaguanas' },
+                { value: 'waterfield', text: 'Waterfield' }
+            ],
+            'USA': [
+                { value: 'allentown', text: 'Allentown' },
+                { value: 'atlanta', text: 'Atlanta' },
+                { value: 'buffalo', text: 'Buffalo' },
+                { value: 'charlotte', text: 'Charlotte' },
+                { value: 'east-hartford', text: 'East Hartford' },
+                { value: 'fort-lauderdale-02', text: 'Fort Lauderdale 02' },
+                { value: 'houston-01', text: 'Houston 01' },
+                { value: 'meridian', text: 'Meridian' },
+                { value: 'naperville', text: 'Naperville' },
+                { value: 'phoenix', text: 'Phoenix' },
+                { value: 'richfield', text: 'Richfield' },
+                { value: 'tempe', text: 'Tempe' },
+                { value: 'west-des-moines', text: 'West Des Moines' }
+            ]
+        };
+        
+        // FIXED: Only add sites count selection row when fullConfig is true (Yes selected)
+        if (fullConfig) {
+            const sitesCountRow = document.createElement('tr');
+            const sitesCountMetricsCell = document.createElement('td');
+            sitesCountMetricsCell.className = 'text-center fw-semibold bg-light';
+            sitesCountMetricsCell.innerHTML = `
+                <div class="d-flex align-items-center justify-content-center">
+                    <i class="fas fa-cog me-2" style="color: #6c757d;"></i>
+                    <div>
+                        <small class="d-block fw-bold text-uppercase" style="font-size: 0.65rem; line-height: 1.2;">
+                            SITES COUNT
+                        </small>
+                    </div>
+                </div>
+            `;
+            sitesCountRow.appendChild(sitesCountMetricsCell);
+            
+            // Add sites count dropdowns for each country
+            countryCodes.forEach(countryCode => {
+                const sitesCountCell = document.createElement('td');
+                sitesCountCell.className = 'text-center p-2';
+                sitesCountCell.innerHTML = `
+                    <select class="form-select form-select-sm sites-count-select" 
+                            name="sites_count_${countryCode}" 
+                            data-country="${countryCode}"
+                            style="min-width: 120px;"
+                            onchange="updateSitesConfiguration()">
+                        <option value="1">1 Site</option>
+                        <option value="2">2 Sites</option>
+                        <option value="3" selected>3 Sites</option>
+                    </select>
+                `;
+                sitesCountRow.appendChild(sitesCountCell);
+            });
+            
+            tableBody.appendChild(sitesCountRow);
+        }
+        
+        // Build dynamic site rows based on sites count (default 3)
+        buildSiteRows(countryCodes, countrySites, 3, fullConfig);
+    }
+    
+    // Function to build site rows dynamically - FIXED: Filter metrics based on fullConfig
+    function buildSiteRows(countryCodes, countrySites, sitesCount, fullConfig = true) {
+        const tableBody = document.getElementById('sites-table-body');
+        
+        // Clear existing site rows efficiently
+        const firstRow = tableBody.firstElementChild; // Sites count row
+        tableBody.innerHTML = '';
+        if (firstRow) {
+            tableBody.appendChild(firstRow);
+        }
+        
+        // Pre-build country-specific site options
+        const siteOptionsCache = {};
+        countryCodes.forEach(countryCode => {
+            const sites = countrySites[countryCode] || [];
+            siteOptionsCache[countryCode] = '<option value="" selected>Select Site</option>' + 
+                sites.map(site => `<option value="${site.value}">${site.text}</option>`).join('');
+        });
+        
+        // Agent profile options (pre-built)
+        const agentProfileOptions = '<option value="Select Tier" selected>Select Tier</option>' +
+            '<option value="Tier 1">Tier 1</option>' +
+            '<option value="Tier 2">Tier 2</option>' +
+            '<option value="Tier 3">Tier 3</option>';
+        
+        // Build all HTML content at once
+        let htmlContent = '';
+        
+        if (fullConfig) {
+            // When "Yes" is selected, show full site configuration with site headers
+            for (let siteNum = 1; siteNum <= sitesCount; siteNum++) {
+                // Site header row
+                htmlContent += `
+                    <tr>
+                        <td colspan="${countryCodes.length + 1}" class="text-center fw-semibold bg-info text-white">
+                            <div class="d-flex align-items-center justify-content-center">
+                                <i class="fas fa-building me-2"></i>
+                                <span class="fw-bold">Site ${siteNum}</span>
+                            </div>
+                        </td>
+                    </tr>
+                `;
+                
+                // Metrics rows - FIXED: Filter based on fullConfig parameter
+                const allMetrics = [
+                    { label: 'SITE LOCATION', type: 'site_location' },
+                    { label: 'AGENT PROFILE', type: 'agent_profile' },
+                    { label: 'LEAD TIME (DAYS)', type: 'lead_time' },
+                    { label: 'WEEKLY CAPACITY', type: 'weekly_capacity' },
+                    { label: 'MONTHLY CAPACITY', type: 'monthly_capacity' }
+                ];
+                
+                // When fullConfig is false (No selected), only show capacity fields
+                const metrics = fullConfig ? allMetrics : allMetrics.filter(m => 
+                    m.type !== 'site_location' && m.type !== 'agent_profile'
+                );
+                
+                metrics.forEach(metric => {
+                    htmlContent += `
+                        <tr>
+                            <td class="text-center fw-semibold bg-light">
+                                <div class="d-flex align-items-center justify-content-center">
+                                    <i class="fas fa-tag me-2" style="color: #6c757d; font-size: 0.8rem;"></i>
+                                    <div>
+                                        <small class="d-block fw-bold text-uppercase" style="font-size: 0.65rem; line-height: 1.2;">
+                                            ${metric.label}
+                                        </small>
+                                    </div>
+                                </div>
+                            </td>
+                    `;
+                    
+                    // Country columns
+                    countryCodes.forEach(countryCode => {
+                        if (metric.type === 'site_location') {
+                            htmlContent += `
+                                <td class="text-center p-2">
+                                    <select class="form-select form-select-sm" 
+                                            name="site_location_${countryCode}_site${siteNum}" 
+                                            style="min-width: 120px;">
+                                        ${siteOptionsCache[countryCode]}
+                                    </select>
+                                </td>
+                            `;
+                        } else if (metric.type === 'agent_profile') {
+                            htmlContent += `
+                                <td class="text-center p-2">
+                                    <select class="form-select form-select-sm" 
+                                            name="agent_profile_${countryCode}_site${siteNum}" 
+                                            style="min-width: 120px;">
+                                        ${agentProfileOptions}
+                                    </select>
+                                </td>
+                            `;
+                        } else {
+                            htmlContent += `
+                                <td class="text-center p-2">
+                                    <input type="number" 
+                                           class="form-control form-control-sm text-center" 
+                                           name="${metric.type}_${countryCode}_site${siteNum}"
+                                           placeholder="0"
+                                           min="0"
+                                           value="0"
+                                           style="min-width: 80px;">
+                                </td>
+                            `;
+                        }
+                    });
+                    
+                    htmlContent += '</tr>';
+                });
+            }
+        } else {
+            // When "No" is selected, show only capacity fields WITHOUT site headers
+            const capacityMetrics = [
+                { label: 'LEAD TIME (DAYS)', type: 'lead_time' },
+                { label: 'WEEKLY CAPACITY', type: 'weekly_capacity' },
+                { label: 'MONTHLY CAPACITY', type: 'monthly_capacity' }
+            ];
+            
+            capacityMetrics.forEach(metric => {
+                htmlContent += `
+                    <tr>
+                        <td class="text-center fw-semibold bg-light">
+                            <div class="d-flex align-items-center justify-content-center">
+                                <i class="fas fa-tag me-2" style="color: #6c757d; font-size: 0.8rem;"></i>
+                                <div>
+                                    <small class="d-block fw-bold text-uppercase" style="font-size: 0.65rem; line-height: 1.2;">
+                                        ${metric.label}
+                                    </small>
+                                </div>
+                            </div>
+                        </td>
+                `;
+                
+                // Country columns
+                countryCodes.forEach(countryCode => {
+                    htmlContent += `
+                        <td class="text-center p-2">
+                            <input type="number" 
+                                   class="form-control form-control-sm text-center" 
+                                   name="${metric.type}_${countryCode}"
+                                   placeholder="0"
+                                   min="0"
+                                   value="0"
+                                   style="min-width: 80px;">
+                        </td>
+                    `;
+                });
+                
+                htmlContent += '</tr>';
+            });
+        }
+        
+        // Insert all HTML at once for better performance
+        tableBody.insertAdjacentHTML('beforeend', htmlContent);
+    }
+    
+    // PROPERLY FIXED: Update sites configuration based on individual country selections
+    window.updateSitesConfiguration = function() {
+        console.log('🔧 Rebuilding sites configuration with individual country selections...');
+        
+        // Get country data
+        let countryHeadcounts = {};
+        try {
+            const headcountData = document.getElementById('country-headcounts');
+            if (headcountData) {
+                countryHeadcounts = JSON.parse(headcountData.textContent || '{}');
+            }
+        } catch (e) {
+            console.warn('Could not parse country headcount data:', e);
+        }
+        
+        const countryCodes = Object.keys(countryHeadcounts);
+        if (countryCodes.length === 0) return;
+        
+        // Get individual country site selections
+        const countrySiteCounts = {};
+        countryCodes.forEach(countryCode => {
+            const dropdown = document.querySelector(`select[data-country="${countryCode}"]`);
+            countrySiteCounts[countryCode] = dropdown ? parseInt(dropdown.value) || 1 : 1;
+            console.log(`${countryCode}: ${countrySiteCounts[countryCode]} sites`);
+        });
+        
+        // Get max sites count needed to rebuild table
+        const maxSites = Math.max(...Object.values(countrySiteCounts));
+        console.log(`Max sites needed: ${maxSites}`);
+        
+        // Country sites data (same as in buildSiteRows)
+        const countrySites = {
+            'CAN': [
+                { value: 'montreal', text: 'Montreal' },
+                { value: 'toronto-02', text: 'Toronto 02' }
+            ],
+            'COL': [
+                { value: 'medellin', text: 'Medellin' }
+            ],
+            'HKG': [
+                { value: 'hong-kong', text: 'Hong Kong' }
+            ],
+            'IND': [
+                { value: 'noida', text: 'Noida' },
+                { value: 'noida-02', text: 'Noida 02' }
+            ],
+            'MEX': [
+                { value: 'mexico-city-02', text: 'Mexico City 02' },
+                { value: 'mexico-city-03', text: 'Mexico City 03' }
+            ],
+            'PAN': [
+                { value: 'panama-city', text: 'Panama City' }
+            ],
+            'PHL': [
+                { value: 'bacolod-city', text: 'Bacolod City' },
+                { value: 'clark-01', text: 'Clark 01' },
+                { value: 'clark-02', text: 'Clark 02' },
+                { value: 'clark-03', text: 'Clark 03' },
+                { value: 'clark-05', text: 'Clark 05' },
+                { value: 'dasmarinas-01', text: 'Dasmarinas 01' },
+                { value: 'dasmarinas-02', text: 'Dasmarinas 02' },
+                { value: 'davao', text: 'Davao' },
+                { value: 'davao-02', text: 'Davao 02' },
+                { value: 'fairview', text: 'Fairview' },
+                { value: 'fairview-02', text: 'Fairview 02' },
+                { value: 'iloilo', text: 'Iloilo' },
+                { value: 'iloilo-02', text: 'Iloilo 02' },
+                { value: 'iloilo-03', text: 'Iloilo 03' },
+                { value: 'santa-rosa', text: 'Santa Rosa' },
+                { value: 'santa-rosa-02', text: 'Santa Rosa 02' },
+                { value: 'talisay-city', text: 'Talisay City' }
+            ],
+            'POL': [
+                { value: 'warsaw', text: 'Warsaw' }
+            ],
+            'TTO': [
+                { value: 'barataria', text: 'Barataria' },
+                { value: 'chaguanas', text: 'Chaguanas' },
+                { value: 'waterfield', text: 'Waterfield' }
+            ],
+            'USA': [
+                { value: 'allentown', text: 'Allentown' },
+                { value: 'atlanta', text: 'Atlanta' },
+                { value: 'buffalo', text: 'Buffalo' },
+                { value: 'charlotte', text: 'Charlotte' },
+                { value: 'east-hartford', text: 'East Hartford' },
+                { value: 'fort-lauderdale-02', text: 'Fort Lauderdale 02' },
+                { value: 'houston-01', text: 'Houston 01' },
+                { value: 'meridian', text: 'Meridian' },
+                { value: 'naperville', text: 'Naperville' },
+                { value: 'phoenix', text: 'Phoenix' },
+                { value: 'richfield', text: 'Richfield' },
+                { value: 'tempe', text: 'Tempe' },
+                { value: 'west-des-moines', text: 'West Des Moines' }
+            ]
+        };
+        
+        // Rebuild with custom logic for individual countries - check current config mode
+        const yesRadio = document.getElementById('site_config_yes');
+        const fullConfig = yesRadio && yesRadio.checked;
+        buildCustomSiteRows(countryCodes, countrySites, countrySiteCounts, fullConfig);
+    };
+    
+    // LIGHTWEIGHT: Simple and fast site rows builder - FIXED: Filter rows based on fullConfig
+    function buildCustomSiteRows(countryCodes, countrySites, countrySiteCounts, fullConfig = true) {
+        const tableBody = document.getElementById('sites-table-body');
+        
+        // Clear existing site rows (keep sites count row)
+        const firstRow = tableBody.firstElementChild; 
+        tableBody.innerHTML = '';
+        if (firstRow) {
+            tableBody.appendChild(firstRow);
+        }
+        
+        const maxSites = Math.max(...Object.values(countrySiteCounts));
+        let html = '';
+        
+        // Simple site options
+        const getSiteOptions = (countryCode) => {
+            const sites = countrySites[countryCode] || [];
+            return '<option value="">Select Site</option>' + 
+                sites.map(s => `<option value="${s.value}">${s.text}</option>`).join('');
+        };
+        
+        if (fullConfig) {
+            // Build full table with site headers when "Yes" is selected
+            for (let site = 1; site <= maxSites; site++) {
+                // Site header
+                html += `<tr><td colspan="${countryCodes.length + 1}" class="bg-info text-white text-center fw-bold">Site ${site}</td></tr>`;
+                
+                // Simple rows - FIXED: Filter based on fullConfig parameter
+                const allRows = [
+                    {label: 'Location', field: 'site_location', type: 'select'},
+                    {label: 'Profile', field: 'agent_profile', type: 'profile'},
+                    {label: 'Lead Time', field: 'lead_time', type: 'number'},
+                    {label: 'Weekly', field: 'weekly_capacity', type: 'number'},
+                    {label: 'Monthly', field: 'monthly_capacity', type: 'number'}
+                ];
+                
+                // When fullConfig is false (No selected), only show capacity fields
+                const rows = fullConfig ? allRows : allRows.filter(r => 
+                    r.field !== 'site_location' && r.field !== 'agent_profile'
+                );
+                
+                rows.forEach(row => {
+                    html += `<tr><td class="bg-light fw-semibold">${row.label}</td>`;
+                    
+                    countryCodes.forEach(code => {
+                        const count = countrySiteCounts[code] || 1;
+                        if (site <= count) {
+                            // Active site
+                            if (row.type === 'select') {
+                                html += `<td><select name="${row.field}_${code}_site${site}" class="form-select form-select-sm">${getSiteOptions(code)}</select></td>`;
+                            } else if (row.type === 'profile') {
+                                html += `<td><select name="${row.field}_${code}_site${site}" class="form-select form-select-sm">
+                                    <option>Select Tier</option><option>Tier 1</option><option>Tier 2</option><option>Tier 3</option>
+                                </select></td>`;
+                            } else {
+                                html += `<td><input type="number" name="${row.field}_${code}_site${site}" class="form-control form-control-sm" placeholder="0" min="0"></td>`;
+                            }
+                        } else {
+                            // Blank site
+                            html += '<td class="bg-light text-muted text-center">-</td>';
+                        }
+                    });
+                    html += '</tr>';
+                });
+            }
+        } else {
+            // Build simplified table WITHOUT site headers when "No" is selected
+            const capacityRows = [
+                {label: 'Lead Time', field: 'lead_time', type: 'number'},
+                {label: 'Weekly', field: 'weekly_capacity', type: 'number'},
+                {label: 'Monthly', field: 'monthly_capacity', type: 'number'}
+            ];
+            
+            capacityRows.forEach(row => {
+                html += `<tr><td class="bg-light fw-semibold">${row.label}</td>`;
+                
+                countryCodes.forEach(code => {
+                    html += `<td><input type="number" name="${row.field}_${code}" class="form-control form-control-sm" placeholder="0" min="0"></td>`;
+                });
+                html += '</tr>';
+            });
+        }
+        
+        tableBody.insertAdjacentHTML('beforeend', html);
+        console.log('✅ Lightweight sites table built');
+    }
+    
+    // Show message when no countries are selected
+    function showNoCountriesMessage() {
+        const tableBody = document.getElementById('sites-table-body');
+        if (!tableBody) return;
+        
+        tableBody.innerHTML = `
+            <tr>
+                <td colspan="100%" class="text-center p-4">
+                    <div class="alert alert-warning mb-0">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        <strong>No Countries Selected</strong><br>
+                        Please go back to <strong>Location Details</strong> step and select countries with headcount distribution first.
+                    </div>
+                </td>
+            </tr>
+        `;
+    }
+    
+    // Update sites table based on selected countries (recruitment specific)
+    function updateSitesTableForRecruitment(selectedCountries) {
+        const sitesTable = document.getElementById('sites-table');
+        if (!sitesTable) return;
+        
+        // Update column visibility
+        const headers = sitesTable.querySelectorAll('th.country-header');
+        headers.forEach(header => {
+            const country = header.getAttribute('data-country');
+            if (selectedCountries.includes(country)) {
+                header.style.display = 'table-cell';
+            } else {
+                header.style.display = 'none';
+            }
+        });
+        
+        // Sites rows generation handled by step-loader.js
+    }
+    
+    // Add event listeners to country site selectors
+    document.querySelectorAll('.country-sites-select').forEach(select => {
+        select.addEventListener('change', function() {
+            const selectedCountries = [];
+            document.querySelectorAll('.country-header').forEach(header => {
+                if (header.style.display !== 'none') {
+                    selectedCountries.push(header.getAttribute('data-country'));
+                }
+            });
+            // Sites rows generation handled by step-specific loader
+        });
+    });
+    
+    // Initialize the toggle state
+    handleSiteConfigToggle();
+    
+    // Function to restore saved site configuration state
+    function restoreSiteConfigurationState() {
+        // Parse site config needed state from server
+        let siteConfigNeeded = 'no';
+        try {
+            const siteConfigData = document.getElementById('site-config-needed');
+            if (siteConfigData) {
+                siteConfigNeeded = JSON.parse(siteConfigData.textContent || '"no"');
+            }
+        } catch (e) {
+            console.warn('Could not parse site config needed state:', e);
+        }
+        
+        // Restore radio button state
+        if (siteConfigNeeded === 'yes') {
+            document.getElementById('site_config_yes').checked = true;
+            document.getElementById('site_config_no').checked = false;
+        } else {
+            document.getElementById('site_config_yes').checked = false;
+            document.getElementById('site_config_no').checked = false;
+        }
+        
+        // Trigger the toggle to show/hide the sites section
+        handleSiteConfigToggle();
+        
+        // If sites configuration is enabled, restore field values
+        if (siteConfigNeeded === 'yes') {
+            restoreSitesConfigurationData();
+        }
+    }
+    
+    // Function to restore sites configuration table data
+    function restoreSitesConfigurationData() {
+        // Parse sites config data from server
+        let sitesConfigData = {};
+        try {
+            const sitesData = document.getElementById('sites-config-data');
+            if (sitesData) {
+                sitesConfigData = JSON.parse(sitesData.textContent || '{}');
+            }
+        } catch (e) {
+            console.warn('Could not parse sites config data:', e);
+            return;
+        }
+        
+        // Wait for DOM elements to be available
+        setTimeout(() => {
+            // Restore field values
+            Object.entries(sitesConfigData).forEach(([fieldName, fieldValue]) => {
+                const field = document.querySelector(`[name="${fieldName}"]`);
+                if (field && fieldValue) {
+                    field.value = fieldValue;
+                }
+            });
+        }, 100); // Small delay to ensure DOM is ready
+    }
+});
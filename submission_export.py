@@ -0,0 +1,193 @@
+"""Bulk CSV / xlsx export of submissions.
+
+Records are read from the log one at a time and flattened into a fixed column
+layout per submission type: nested dicts become dotted columns
+(``inbound.aht``, ``sites_config.weekly_capacity_PHL_site1``) and lists of
+values are joined. Because the columns are known before the first record is
+read, CSV rows are streamed as soon as they are produced. xlsx exports use
+xlsxwriter's ``constant_memory`` mode, one sheet per submission type, written
+to a temporary file and streamed out in chunks once the workbook is closed.
+Keys outside the layout are kept as JSON in a trailing ``extra`` column.
+
+Submitted text is never turned into spreadsheet formulas: xlsx cells are
+written as strings, and CSV cells starting with ``=``, ``+``, ``-`` or ``@``
+(other than plain numbers) get a leading apostrophe.
+"""
+import csv
+import io
+import json
+import tempfile
+
+import xlsxwriter
+
+from form_schema import STEP_FIELDS
+from ramp_plan import COUNTRY_CODES, SITE_METRICS
+from submission_query import iter_matching
+from submission_store import SUBMISSION_TYPES, submission_type
+from workbook_import import CHANNELS
+
+COMMON_COLUMNS = ['timestamp', 'submission_type']
+MAX_SITES = 3
+# Site metrics that also exist per country when no per-site table was filled in
+COUNTRY_SITE_METRICS = ('lead_time', 'weekly_capacity', 'monthly_capacity')
+SIZING_MEASURES = ('annual_calls', 'weekly_calls', 'aht', 'sl', 'asa', 'abandon', 'ccr', 'tat', 'cross_skill')
+CHUNK_BYTES = 64 * 1024
+XLSX_MAX_ROWS = 1048576
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _site_columns():
+    """Flattened sites_config columns for every country and site slot"""
+    columns = []
+    for code in COUNTRY_CODES:
+        columns.append(f'sites_config.sites_count_{code}')
+        columns.extend(f'sites_config.{metric}_{code}' for metric in COUNTRY_SITE_METRICS)
+        for site in range(1, MAX_SITES + 1):
+            columns.extend(f'sites_config.{metric}_{code}_site{site}' for metric in SITE_METRICS)
+    return columns
+
+
+COLUMNS = {
+    'ramp': COMMON_COLUMNS + [name for step in sorted(STEP_FIELDS) for name in STEP_FIELDS[step]]
+            + ['site_config_needed'] + _site_columns(),
+    'sizing': COMMON_COLUMNS + [f'{channel}.{measure}' for channel in CHANNELS for measure in SIZING_MEASURES]
+              + ['attach_volume', 'attach_aht', 'uploads.attach_volume', 'uploads.attach_aht'],
+}
+SHEET_NAMES = {'ramp': 'Ramp', 'sizing': 'Sizing'}
+
+
+def export_columns(kind):
+    """Column layout for one submission type, or the union of all when kind is None"""
+    if kind:
+        return COLUMNS[kind] + ['extra']
+    columns = []
+    for name in SUBMISSION_TYPES:
+        columns.extend(column for column in COLUMNS[name] if column not in columns)
+    return columns + ['extra']
+
+
+def flatten(record, prefix=''):
+    """Flatten nested dicts into dotted keys and lists of scalars into joined strings"""
+    flat = {}
+    for key, value in record.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{name}.'))
+        elif isinstance(value, list):
+            if all(item is None or isinstance(item, (str, int, float, bool)) for item in value):
+                flat[name] = ', '.join('' if item is None else str(item) for item in value)
+            else:
+                flat[name] = json.dumps(value, default=str)
+        else:
+            flat[name] = value
+    return flat
+
+
+def export_row(record, columns):
+    """Values of a record in column order, with leftover keys as JSON in the last column"""
+    flat = flatten(record)
+    flat['submission_type'] = submission_type(record)
+    row = [flat.pop(column, None) for column in columns[:-1]]
+    row.append(json.dumps(flat, sort_keys=True, default=str) if flat else None)
+    return row
+
+
+def csv_safe(value):
+    """Prefix text a spreadsheet would evaluate as a formula with an apostrophe"""
+    if not isinstance(value, str) or not value.startswith(FORMULA_PREFIXES):
+        return value
+    try:
+        float(value)
+        return value
+    except ValueError:
+        return "'" + value
+
+
+def csv_row(record, columns):
+    """export_row with formula-like text neutralized"""
+    return [csv_safe(value) for value in export_row(record, columns)]
+
+
+def iter_csv(query):
+    """Yield CSV text in chunks of roughly CHUNK_BYTES as matching records are read"""
+    columns = export_columns(query['type'])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for _, record in iter_matching(query):
+        writer.writerow(csv_row(record, columns))
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_csv(path, query, on_record=None):
+    """Write matching records to a CSV file and return how many were exported
+
+    ``on_record`` is called with the running count after each record.
+    """
+    columns = export_columns(query['type'])
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for _, record in iter_matching(query):
+            writer.writerow(csv_row(record, columns))
+            count += 1
+            if on_record:
+                on_record(count)
+    return count
+
+
+def write_xlsx(output, query, on_record=None):
+    """Write matching records to an xlsx workbook in constant memory, one sheet per type"""
+    kinds = [query['type']] if query['type'] else list(SUBMISSION_TYPES)
+    # Submitted text is stored as text, never as a formula or hyperlink
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_numbers': False,
+                                            'strings_to_formulas': False, 'strings_to_urls': False})
+    bold = workbook.add_format({'bold': True})
+    sheets = {}
+
+    def new_sheet(kind):
+        number = sheets[kind]['number'] + 1 if kind in sheets else 1
+        name = SHEET_NAMES[kind] if number == 1 else f'{SHEET_NAMES[kind]} ({number})'
+        worksheet = workbook.add_worksheet(name)
+        columns = export_columns(kind)
+        worksheet.write_row(0, 0, columns, bold)
+        sheets[kind] = {'sheet': worksheet, 'row': 1, 'number': number, 'columns': columns}
+
+    for kind in kinds:
+        new_sheet(kind)
+    count = 0
+    for _, record in iter_matching(query):
+        kind = submission_type(record)
+        if kind not in sheets:
+            continue
+        if sheets[kind]['row'] >= XLSX_MAX_ROWS:
+            new_sheet(kind)
+        sheet = sheets[kind]
+        # Rows are mostly blank; skipping empty cells avoids most of xlsxwriter's per-cell work
+        for column, value in enumerate(export_row(record, sheet['columns'])):
+            if value is not None and value != '':
+                sheet['sheet'].write(sheet['row'], column, value)
+        sheet['row'] += 1
+        count += 1
+        if on_record:
+            on_record(count)
+    workbook.close()
+    return count
+
+
+def iter_xlsx(query):
+    """Build the workbook in a temporary file, then yield it in chunks"""
+    with tempfile.TemporaryFile() as output:
+        write_xlsx(output, query)
+        output.seek(0)
+        while True:
+            chunk = output.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
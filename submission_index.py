@@ -0,0 +1,222 @@
+"""SQLite secondary indexes over the submission log.
+
+The append-only log in ``submission_store`` stays the source of truth; this
+database only maps client, ramp dates, type and per-country headcount to record
+positions so lookups don't need a full scan. Records are indexed as they are
+written, and ``sync_index`` indexes every record after the ``synced`` mark in
+``index_meta``. That mark is only advanced by scanning the log, so every record
+before it is known to be indexed. A record whose index write failed, or that a
+crash left unindexed, is picked up even if later records were indexed.
+``rebuild_index`` regenerates everything from the raw log.
+"""
+import os
+import sqlite3
+import threading
+
+from submission_store import SUBMISSIONS_DIR, iter_submissions, submission_type
+
+INDEX_DB = os.path.join(SUBMISSIONS_DIR, 'index.sqlite3')
+HEADCOUNT_SUFFIX = '_headcount'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    submission_type TEXT,
+    client_name TEXT,
+    ramp_start_date TEXT,
+    ramp_end_date TEXT,
+    timestamp TEXT,
+    PRIMARY KEY (segment, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_submissions_client ON submissions (client_name, segment, offset);
+CREATE INDEX IF NOT EXISTS idx_submissions_start ON submissions (ramp_start_date);
+CREATE INDEX IF NOT EXISTS idx_submissions_end ON submissions (ramp_end_date);
+CREATE INDEX IF NOT EXISTS idx_submissions_type ON submissions (submission_type, segment, offset);
+CREATE TABLE IF NOT EXISTS submission_countries (
+    country TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    selected INTEGER NOT NULL DEFAULT 0,
+    headcount INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (country, segment, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_countries_headcount ON submission_countries (country, headcount);
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_local = threading.local()
+
+
+def get_connection():
+    """Get this thread's connection to the index database"""
+    conn = getattr(_local, 'conn', None)
+    # A connection inherited across a fork (gunicorn --preload) must not be shared with the parent
+    if conn is None or _local.pid != os.getpid():
+        os.makedirs(os.path.dirname(INDEX_DB) or '.', exist_ok=True)
+        conn = sqlite3.connect(INDEX_DB, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def _to_int(value):
+    """Convert a headcount value to int, treating blanks and junk as 0"""
+    try:
+        return int(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def _index_rows(position, record):
+    """Build the submissions row and country rows for one record"""
+    segment, offset = position
+    client_name = (record.get('client_name') or '').strip().lower() or None
+    row = (segment, offset, submission_type(record), client_name,
+           record.get('ramp_start_date') or None, record.get('ramp_end_date') or None,
+           record.get('timestamp'))
+
+    selected = record.get('geo_country') or []
+    if isinstance(selected, str):
+        selected = [selected]
+    countries = {code: [1, 0] for code in selected}
+    for key, value in record.items():
+        if key.endswith(HEADCOUNT_SUFFIX) and _to_int(value) > 0:
+            code = key[:-len(HEADCOUNT_SUFFIX)].upper()
+            countries.setdefault(code, [0, 0])[1] = _to_int(value)
+
+    country_rows = [(code, segment, offset, flags[0], flags[1]) for code, flags in countries.items()]
+    return row, country_rows
+
+
+def _write(conn, entries):
+    """Insert or replace index rows for a batch of (position, record) pairs"""
+    rows = []
+    country_rows = []
+    for position, record in entries:
+        row, countries = _index_rows(position, record)
+        rows.append(row)
+        country_rows.extend(countries)
+    conn.executemany('INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.executemany('INSERT OR REPLACE INTO submission_countries VALUES (?, ?, ?, ?, ?)', country_rows)
+
+
+def index_submission(position, record):
+    """Index one freshly appended record"""
+    conn = get_connection()
+    with conn:
+        _write(conn, [(position, record)])
+
+
+def _write_batch(conn, batch):
+    """Index a batch and advance the synced mark to its last position in one transaction"""
+    segment, offset = batch[-1][0]
+    with conn:
+        _write(conn, batch)
+        conn.execute("INSERT OR REPLACE INTO index_meta VALUES ('synced', ?)", (f'{segment} {offset}',))
+
+
+def _index_from(conn, start, batch_size=1000):
+    """Index every record from a log position onward, in batches"""
+    count = 0
+    batch = []
+    for position, record in iter_submissions(start):
+        batch.append((position, record))
+        if len(batch) >= batch_size:
+            _write_batch(conn, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        _write_batch(conn, batch)
+        count += len(batch)
+    return count
+
+
+def synced_position(conn):
+    """Position of the last record up to which the whole log is indexed, or None"""
+    row = conn.execute("SELECT value FROM index_meta WHERE key = 'synced'").fetchone()
+    if row is None:
+        return None
+    segment, offset = row[0].split()
+    return int(segment), int(offset)
+
+
+def sync_index():
+    """Index every record after the synced mark, including ones index_submission missed"""
+    conn = get_connection()
+    # A fresh database (or one only fed by index_submission) needs a full pass first
+    if conn.execute("SELECT 1 FROM index_meta WHERE key = 'built'").fetchone() is None:
+        return rebuild_index()
+    start = synced_position(conn)
+    if start is None:
+        return _index_from(conn, None)
+    # Re-indexing the record at the mark is harmless and keeps the scan short
+    return max(_index_from(conn, start) - 1, 0)
+
+
+def rebuild_index():
+    """Drop and regenerate all indexes from the raw submission log"""
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM submissions')
+        conn.execute('DELETE FROM submission_countries')
+        conn.execute("DELETE FROM index_meta WHERE key = 'synced'")
+    count = _index_from(conn, None)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO index_meta VALUES ('built', datetime('now'))")
+    return count
+
+
+def find_positions(query, after=None, limit=None):
+    """Return log positions of records matching the query's indexed filters, in log order"""
+    clauses = []
+    params = []
+
+    if query.get('type'):
+        clauses.append('s.submission_type = ?')
+        params.append(query['type'])
+    if query.get('client_name'):
+        clauses.append('s.client_name = ?')
+        params.append(query['client_name'])
+    if query.get('ramp_start_from'):
+        clauses.append('s.ramp_start_date >= ?')
+        params.append(query['ramp_start_from'])
+    if query.get('ramp_start_to'):
+        clauses.append('s.ramp_start_date <= ?')
+        params.append(query['ramp_start_to'])
+    if query.get('ramp_end_from'):
+        clauses.append('s.ramp_end_date >= ?')
+        params.append(query['ramp_end_from'])
+    if query.get('ramp_end_to'):
+        clauses.append('s.ramp_end_date <= ?')
+        params.append(query['ramp_end_to'])
+
+    join = ''
+    if query.get('geo_country'):
+        join = 'JOIN submission_countries c ON c.segment = s.segment AND c.offset = s.offset AND c.country = ?'
+        params.insert(0, query['geo_country'])
+        if query.get('min_headcount'):
+            clauses.append('c.headcount >= ?')
+            params.append(query['min_headcount'])
+        else:
+            clauses.append('c.selected = 1')
+
+    if after:
+        clauses.append('(s.segment > ? OR (s.segment = ? AND s.offset >= ?))')
+        params.extend([after[0], after[0], after[1]])
+
+    sql = f'SELECT s.segment, s.offset FROM submissions s {join}'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY s.segment, s.offset'
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+    return [tuple(row) for row in get_connection().execute(sql, params)]
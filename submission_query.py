@@ -0,0 +1,169 @@
+"""Filtering, projection and cursor pagination over the submission log"""
+import hashlib
+import logging
+import sqlite3
+
+from submission_index import find_positions, sync_index
+from submission_store import SUBMISSION_TYPES, iter_submissions, read_submission, store_version, submission_type
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Filters answered by the SQLite index instead of a scan of the log
+INDEXED_FILTERS = ('type', 'client_name', 'ramp_start_from', 'ramp_start_to',
+                   'ramp_end_from', 'ramp_end_to', 'geo_country')
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(position):
+    """Encode a (segment, offset) position as an opaque cursor string"""
+    return f'{position[0]}-{position[1]}'
+
+
+def decode_cursor(cursor):
+    """Decode a cursor string back into a (segment, offset) position"""
+    try:
+        segment, offset = cursor.split('-', 1)
+        position = (int(segment), int(offset))
+    except (AttributeError, ValueError):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    if position[0] < 0 or position[1] < 0:
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return position
+
+
+def parse_query(args):
+    """Build a query dict from request arguments, raising ValueError on bad input"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    submission_kind = args.get('type') or None
+    if submission_kind and submission_kind not in SUBMISSION_TYPES:
+        raise ValueError(f'type must be one of {", ".join(SUBMISSION_TYPES)}')
+
+    try:
+        min_headcount = int(args['min_headcount']) if args.get('min_headcount') else None
+    except ValueError:
+        raise ValueError('min_headcount must be an integer')
+
+    cursor = args.get('cursor')
+    fields = args.get('fields')
+
+    return {
+        'limit': limit,
+        'cursor': decode_cursor(cursor) if cursor else None,
+        'client_name': (args.get('client_name') or '').strip().lower() or None,
+        'ramp_start_from': args.get('ramp_start_from') or None,
+        'ramp_start_to': args.get('ramp_start_to') or None,
+        'ramp_end_from': args.get('ramp_end_from') or None,
+        'ramp_end_to': args.get('ramp_end_to') or None,
+        'geo_country': (args.get('geo_country') or '').strip().upper() or None,
+        'min_headcount': min_headcount,
+        'type': submission_kind,
+        'fields': [f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+    }
+
+
+def matches(record, query):
+    """Check whether a record passes every filter in the query"""
+    if query['type'] and submission_type(record) != query['type']:
+        return False
+
+    if query['client_name']:
+        if (record.get('client_name') or '').strip().lower() != query['client_name']:
+            return False
+
+    # ISO dates compare correctly as strings
+    start_date = record.get('ramp_start_date') or ''
+    if query['ramp_start_from'] and not (start_date and start_date >= query['ramp_start_from']):
+        return False
+    if query['ramp_start_to'] and not (start_date and start_date <= query['ramp_start_to']):
+        return False
+
+    end_date = record.get('ramp_end_date') or ''
+    if query['ramp_end_from'] and not (end_date and end_date >= query['ramp_end_from']):
+        return False
+    if query['ramp_end_to'] and not (end_date and end_date <= query['ramp_end_to']):
+        return False
+
+    if query['geo_country'] and query['min_headcount']:
+        try:
+            headcount = int(record.get(f"{query['geo_country'].lower()}_headcount") or 0)
+        except (ValueError, TypeError):
+            headcount = 0
+        if headcount < query['min_headcount']:
+            return False
+    elif query['geo_country']:
+        countries = record.get('geo_country') or []
+        if isinstance(countries, str):
+            countries = [countries]
+        if query['geo_country'] not in countries:
+            return False
+
+    return True
+
+
+def project(record, fields):
+    """Keep only the requested top-level fields of a record"""
+    if not fields:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+
+def _iter_indexed_page(query, positions):
+    """Read the records behind a page of index hits"""
+    for i, position in enumerate(positions):
+        if i == query['limit']:
+            yield position, None
+            return
+        record = read_submission(position)
+        if record is not None:
+            yield position, project(record, query['fields'])
+
+
+def iter_page(query):
+    """Yield (position, record) for matching records, then (next_position, None) if more remain"""
+    if any(query[name] for name in INDEXED_FILTERS):
+        try:
+            sync_index()
+            positions = find_positions(query, after=query['cursor'], limit=query['limit'] + 1)
+        except sqlite3.Error:
+            logger.exception('Submission index unavailable, falling back to a full scan')
+        else:
+            yield from _iter_indexed_page(query, positions)
+            return
+
+    returned = 0
+    for position, record in iter_submissions(query['cursor']):
+        if not matches(record, query):
+            continue
+        if returned == query['limit']:
+            yield position, None
+            return
+        returned += 1
+        yield position, project(record, query['fields'])
+
+
+def iter_matching(query):
+    """Yield (position, record) for every matching record from the query's cursor on, page by page"""
+    page_query = dict(query, limit=MAX_PAGE_SIZE)
+    while True:
+        next_position = None
+        for position, record in iter_page(page_query):
+            if record is None:
+                next_position = position
+            else:
+                yield position, record
+        if next_position is None:
+            return
+        page_query['cursor'] = next_position
+
+
+def query_etag(query_string):
+    """Strong ETag for a query against the current state of the log"""
+    digest = hashlib.sha1(f'{store_version()}|{query_string}'.encode('utf-8')).hexdigest()
+    return digest[:32]
@@ -0,0 +1,198 @@
+"""Segmented, append-only storage for form submissions.
+
+Each submission is written as one JSON line at the end of the newest segment
+file under ``SUBMISSIONS_DIR``. Appends are serialized across processes with an
+exclusive ``flock`` on a lock file, so concurrent gunicorn workers never lose
+each other's writes, and the cost of a write does not depend on how many
+submissions already exist. A segment rolls over to a new file once it grows past
+``SEGMENT_MAX_BYTES``. A partial last line left by a writer that crashed is
+truncated before the next append, so it cannot corrupt the following record.
+
+Records are addressed by their position: a ``(segment, offset)`` tuple where
+``offset`` is the byte offset of the line inside the segment. Submissions from
+the original ``form_submissions.json`` list are exposed read-only as segment 0,
+addressed by list index.
+"""
+import fcntl
+import json
+import logging
+import os
+
+import metrics
+
+SUBMISSIONS_DIR = os.environ.get('SUBMISSIONS_DIR', 'submissions')
+LEGACY_FILE = 'form_submissions.json'
+SEGMENT_MAX_BYTES = int(os.environ.get('SUBMISSIONS_SEGMENT_MAX_BYTES', 16 * 1024 * 1024))
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.jsonl'
+LOCK_NAME = '.append.lock'
+TAIL_SCAN_BYTES = 64 * 1024
+SUBMISSION_TYPES = ('ramp', 'sizing')
+
+logger = logging.getLogger(__name__)
+
+# The legacy list never changes in place, so parse it once per mtime
+_legacy_cache = (None, [])
+
+
+def segment_path(number):
+    """Get path for a numbered segment file"""
+    return os.path.join(SUBMISSIONS_DIR, f'{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}')
+
+
+def list_segments():
+    """Return the sorted segment numbers currently on disk"""
+    if not os.path.isdir(SUBMISSIONS_DIR):
+        return []
+    numbers = []
+    for name in os.listdir(SUBMISSIONS_DIR):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            try:
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+def submission_type(record):
+    """Classify a record as a ramp or sizing submission"""
+    if record.get('submission_type') in SUBMISSION_TYPES:
+        return record['submission_type']
+    # Older records carry no type; sizing records are keyed by channel
+    return 'sizing' if 'inbound' in record else 'ramp'
+
+
+def encode_record(record):
+    """Serialize one record as a compact JSON line"""
+    return (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+def _repair_tail(path, size):
+    """Cut off a partial last line left by a writer that died mid-append; returns the new size
+
+    Only called under the append lock, so a line without its newline cannot be
+    an append still in progress. Its writer never got a position back, so the
+    fragment is dropped rather than letting the next record run into it.
+    """
+    if not size:
+        return size
+    with open(path, 'rb') as f:
+        end = size
+        while end > 0:
+            start = max(end - TAIL_SCAN_BYTES, 0)
+            f.seek(start)
+            chunk = f.read(end - start)
+            if end == size and chunk.endswith(b'\n'):
+                return size
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+    logger.warning('Truncating %d bytes of a partial submission record at the end of %s', size - end, path)
+    os.truncate(path, end)
+    return end
+
+
+def append_submission(record):
+    """Append one record to the log and return its (segment, offset) position"""
+    os.makedirs(SUBMISSIONS_DIR, exist_ok=True)
+    line = encode_record(record)
+
+    with open(os.path.join(SUBMISSIONS_DIR, LOCK_NAME), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            segments = list_segments()
+            number = segments[-1] if segments else 1
+            path = segment_path(number)
+            offset = _repair_tail(path, os.path.getsize(path)) if os.path.exists(path) else 0
+
+            # Roll over to a fresh segment once the current one is full
+            if offset and offset + len(line) > SEGMENT_MAX_BYTES:
+                number += 1
+                path = segment_path(number)
+                offset = 0
+
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                written = 0
+                while written < len(line):
+                    written += os.write(fd, line[written:])
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    metrics.inc('wfm_storage_writes_total', store='submissions', backend='log')
+    metrics.inc('wfm_storage_write_bytes_total', len(line), store='submissions', backend='log')
+    return (number, offset)
+
+
+def _iter_legacy(start_index=0):
+    """Yield records from the original single-file JSON list"""
+    global _legacy_cache
+    try:
+        mtime = os.stat(LEGACY_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return
+    if _legacy_cache[0] != mtime:
+        with open(LEGACY_FILE, 'r') as f:
+            _legacy_cache = (mtime, json.load(f))
+    records = _legacy_cache[1]
+    for index in range(start_index, len(records)):
+        yield (0, index), records[index]
+
+
+def _iter_segment(number, start_offset=0):
+    """Yield (position, record) pairs from one segment, starting at a byte offset"""
+    path = segment_path(number)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            position = (number, offset)
+            offset += len(line)
+            # A line without its newline is an append still in flight
+            if not line.endswith(b'\n'):
+                break
+            try:
+                yield position, json.loads(line)
+            except ValueError:
+                logger.warning('Skipping corrupt submission record at %s:%d', path, position[1])
+
+
+def iter_submissions(start=None):
+    """Stream (position, record) pairs in write order, optionally from a position onward"""
+    start_segment, start_offset = start if start else (0, 0)
+
+    if start_segment == 0:
+        yield from _iter_legacy(start_offset)
+        start_offset = 0
+
+    for number in list_segments():
+        if number < start_segment:
+            continue
+        yield from _iter_segment(number, start_offset if number == start_segment else 0)
+
+
+def read_submission(position):
+    """Read the single record stored at a (segment, offset) position"""
+    for _, record in iter_submissions(position):
+        return record
+    return None
+
+
+def store_version():
+    """Cheap token that changes whenever a record is appended"""
+    parts = []
+    if os.path.exists(LEGACY_FILE):
+        parts.append(f'0:{os.stat(LEGACY_FILE).st_mtime_ns}')
+    segments = list_segments()
+    if segments:
+        parts.append(f'{segments[-1]}:{os.path.getsize(segment_path(segments[-1]))}')
+    return '|'.join(parts)
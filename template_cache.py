@@ -0,0 +1,125 @@
+"""Jinja bytecode cache and fragment cache for the large templates.
+
+Compiled templates are kept in ``JINJA_CACHE_DIR`` (Jinja's
+``FileSystemBytecodeCache``, keyed by a checksum of the source), so a freshly
+started worker loads bytecode instead of parsing and compiling the 50-60KB step
+and sizing templates again.
+
+``{% cache 'name', key... %}...{% endcache %}`` renders its body once per
+process and reuses the HTML afterwards. The cache key is the template name,
+the template file's mtime when it was compiled, and the given key values, so
+only regions that depend on nothing else (static option grids) or on the key
+values alone (the summary page, keyed by a hash of the session data) may be
+wrapped. Entries live in an LRU bounded by ``FRAGMENT_CACHE_MAX_BYTES``.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+import metrics
+
+JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', 'jinja_cache')
+FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+
+class FragmentCache:
+    """Per-process LRU of rendered template fragments, bounded by their total size"""
+
+    def __init__(self, max_bytes=FRAGMENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        if len(html) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = html
+            self._bytes += len(html)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+fragments = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache key, ... %}...{% endcache %}`` tag"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        keys = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        try:
+            mtime = os.path.getmtime(parser.filename) if parser.filename else 0
+        except OSError:
+            mtime = 0
+        args = [nodes.Const(parser.name), nodes.Const(mtime), nodes.List(keys)]
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template_name, mtime, keys, caller):
+        key = (template_name, mtime, *keys)
+        html = fragments.get(key)
+        if html is None:
+            metrics.inc('wfm_fragment_cache_misses_total', template=template_name)
+            html = str(caller())
+            fragments.put(key, html)
+        else:
+            metrics.inc('wfm_fragment_cache_hits_total', template=template_name)
+        return Markup(html)
+
+
+def data_key(data):
+    """Stable hash of a JSON-like value, for keying fragments on session data"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def template_version(template_folder):
+    """Hash of the template files' names, sizes and mtimes, for validating pages browsers have cached"""
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f'{os.path.relpath(os.path.join(root, name), template_folder)}:{stat.st_size}:'
+                          f'{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def configure_templates(app):
+    """Install the bytecode cache and the fragment cache tag on the app's Jinja environment"""
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.extensions['template_version'] = template_version(os.path.join(app.root_path, app.template_folder))
@@ -0,0 +1,24 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory, so the relative data paths (submissions/, ...) start out empty"""
+    import submission_index
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(submission_index, '_local', threading.local())
+    return tmp_path
+
+
+@pytest.fixture
+def client(data_dir, monkeypatch):
+    """Test client of the app with CSRF checks off, its data files under data_dir"""
+    from main import app
+    monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', False)
+    return app.test_client()
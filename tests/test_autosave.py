@@ -0,0 +1,54 @@
+import pytest
+
+from autosave import AutosaveBuffer
+from session_store import SessionStore, SqliteSessionBackend
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two workers' session stores and autosave buffers over one database"""
+    path = str(tmp_path / 'sessions.db')
+    stores = [SessionStore(SqliteSessionBackend(path), sweep_interval=0) for _ in range(2)]
+    return [(store, AutosaveBuffer(store, interval=60)) for store in stores]
+
+
+def test_first_batch_creates_the_session(workers):
+    (store, autosaves), _ = workers
+    assert autosaves.add('s1', 'page', 1, {'step1': {'client_name': 'Acme'}})
+    assert not autosaves.has_pending('s1')
+    assert store.get('s1')['step1'] == {'client_name': 'Acme'}
+
+
+def test_batches_are_coalesced_and_stale_ones_ignored(workers):
+    (store, autosaves), _ = workers
+    autosaves.add('s1', 'page', 1, {'step1': {'client_name': 'Acme'}})
+    assert autosaves.add('s1', 'page', 2, {'step1': {'client_name': 'Acme Corp'}})
+    assert autosaves.add('s1', 'page', 3, {'step1': {'lob': 'Sales'}})
+    assert not autosaves.add('s1', 'page', 3, {'step1': {'lob': 'Care'}})
+    assert autosaves.flush('s1')
+    assert store.get('s1')['step1'] == {'client_name': 'Acme Corp', 'lob': 'Sales'}
+    assert store.get('s1')['autosave'] == {'page': 3}
+
+
+def test_full_save_in_another_worker_wins_over_older_buffered_batch(workers):
+    (store_a, autosaves_a), (store_b, autosaves_b) = workers
+    autosaves_a.add('s1', 'page', 1, {'step1': {'client_name': 'Acme'}})
+    autosaves_a.add('s1', 'page', 2, {'step1': {'client_name': 'Acme Co'}})
+    # The page's full POST of step 1 lands in worker B before worker A flushes
+    store_b.patch('s1', dict(autosaves_b.supersede('s1'), step1={'client_name': 'Acme Corporation'}))
+    assert not autosaves_a.flush('s1')
+    assert store_a.get('s1')['step1'] == {'client_name': 'Acme Corporation'}
+    assert autosaves_a.stats()['superseded'] == 1
+    # Batches buffered after the full save are written as usual
+    assert autosaves_a.add('s1', 'page', 3, {'step1': {'lob': 'Sales'}})
+    assert autosaves_a.flush('s1')
+    assert store_b.get('s1')['step1'] == {'client_name': 'Acme Corporation', 'lob': 'Sales'}
+
+
+def test_batch_is_not_written_to_a_deleted_session(workers):
+    (store_a, autosaves_a), (store_b, _) = workers
+    autosaves_a.add('s1', 'page', 1, {'step1': {'client_name': 'Acme'}})
+    autosaves_a.add('s1', 'page', 2, {'step2': {'lob': 'Sales'}})
+    store_b.delete('s1')
+    assert not autosaves_a.flush('s1')
+    assert store_a.get('s1') == {}
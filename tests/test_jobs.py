@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+from jobs import JobQueue
+
+
+def make_queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs'), workers=1)
+
+    @queue.handler('echo')
+    def echo(job, value):
+        return {'value': value}
+
+    return queue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        # A finished status is never visible without its result
+        if job['status'] == 'succeeded':
+            assert queue.result(job_id)[0] is not None
+        if job['status'] not in ('queued', 'running'):
+            return job
+    raise AssertionError('job did not finish')
+
+
+def test_succeeded_job_has_its_result(tmp_path):
+    queue = make_queue(tmp_path)
+    job = wait_for(queue, queue.submit('echo', value=3))
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == 1.0
+    assert queue.result(job['id'])[0] == {'value': 3}
+
+
+def test_job_of_exited_worker_is_failed_when_read(tmp_path):
+    queue = make_queue(tmp_path)
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    conn = queue._connection()
+    with conn:
+        conn.execute("INSERT INTO jobs (id, kind, status, owner_pid, created_at) VALUES ('orphan', 'echo', 'running', ?, ?)",
+                     (exited.pid, time.time()))
+    job = queue.get('orphan')
+    assert job['status'] == 'failed'
+    assert 'Interrupted' in job['error']
+
+
+def test_forked_process_opens_its_own_connection(tmp_path):
+    queue = make_queue(tmp_path)
+    parent = queue._connection()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if queue._connection() is not parent else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,34 @@
+import pytest
+
+from ramp_plan import country_sites, simulate_ramp, split_target
+
+FORM = {'phl_headcount': '30', 'geo_country': ['PHL'], 'ramp_start_date': '2025-01-06',
+        'training_duration': 'weeks', 'training_duration_number': '2'}
+
+
+@pytest.mark.parametrize('sites_config, form_extra', [
+    # Monthly capacities only: fractional weekly capacities
+    ({'sites_count_PHL': '2', 'monthly_capacity_PHL_site1': '40', 'monthly_capacity_PHL_site2': '20'}, {}),
+    # One weekly and one monthly site
+    ({'sites_count_PHL': '2', 'weekly_capacity_PHL_site1': '5', 'monthly_capacity_PHL_site2': '20'}, {}),
+    # No site capacities: the form's monthly default applies to every site
+    ({'sites_count_PHL': '3'}, {'hiring_capacity_monthly': '25'}),
+])
+def test_site_shares_are_whole_and_add_up(sites_config, form_extra):
+    plan = simulate_ramp(dict(FORM, **form_extra), sites_config)
+    sites = plan['countries']['PHL']['sites']
+    assert all(isinstance(site['target'], int) for site in sites)
+    assert sum(site['target'] for site in sites) == 30
+    assert plan['totals']['production'][-1] == 30
+    assert plan['ready_week'] is not None
+
+
+def test_monthly_capacity_is_spread_over_weeks():
+    sites = country_sites('PHL', {'monthly_capacity_PHL': '26'}, {})
+    assert sites[0]['weekly_capacity'] == pytest.approx(6)
+
+
+def test_split_target_follows_capacity():
+    assert split_target(10, [40 / 4.33, 20 / 4.33]) == [7, 3]
+    assert split_target(7, [0, 0]) == [4, 3]
+    assert split_target(0, [1.5, 2.5]) == [0, 0]
@@ -0,0 +1,147 @@
+import re
+
+import pytest
+
+
+@pytest.fixture
+def csrf_client(client, monkeypatch):
+    """Client with CSRF checks on, as in production (wizard pages only send ETags with a CSRF token)"""
+    from main import app
+    monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', True)
+    return client
+
+
+def csrf_token(response):
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', response.get_data(as_text=True)).group(1)
+
+
+def test_unchanged_wizard_page_is_revalidated(csrf_client):
+    page = csrf_client.get('/ramp-form/step/1')
+    etag = page.headers['ETag']
+    assert etag.startswith('W/')
+    assert 'no-cache' in page.headers['Cache-Control']
+
+    response = csrf_client.get('/ramp-form/step/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert csrf_client.get('/ramp-form/step/2', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_etag_changes_when_the_session_is_saved(csrf_client):
+    page = csrf_client.get('/ramp-form/step/1')
+    for client_name in ('Acme', 'Globex'):
+        etag = page.headers['ETag']
+        response = csrf_client.post('/ramp-form/step/1', data={
+            'csrf_token': csrf_token(page), 'action': 'save', 'client_name': client_name})
+        assert response.status_code == 200
+
+        # Same session cookie, newer session data
+        page = csrf_client.get('/ramp-form/step/1', headers={'If-None-Match': etag})
+        assert page.status_code == 200
+        assert page.headers['ETag'] != etag
+        assert client_name in page.get_data(as_text=True)
+
+
+def submit(count, **fields):
+    import routes
+    for n in range(count):
+        routes.save_submission(dict({'submission_type': 'ramp', 'client_name': 'Acme', 'seq': n}, **fields))
+
+
+def all_pages(client, url):
+    """Follow next_cursor through every page; returns the pages"""
+    pages = []
+    cursor = None
+    while True:
+        page = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        pages.append(page)
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('url', [
+    '/submissions?limit=3',
+    # Filtered queries page through the index instead of scanning the log
+    '/submissions?limit=3&client_name=acme',
+])
+def test_submission_pages_are_continuous(client, url):
+    submit(8)
+    submit(2, client_name='Globex')
+    pages = all_pages(client, url)
+    seqs = [record['seq'] for page in pages for record in page['submissions']
+            if record['client_name'] == 'Acme']
+    assert seqs == list(range(8))
+    assert all(len(page['submissions']) == 3 for page in pages[:-1])
+    assert pages[-1]['next_cursor'] is None
+
+
+def test_last_page_has_no_cursor(client):
+    submit(2)
+    page = client.get('/submissions?limit=2').get_json()
+    assert len(page['submissions']) == 2
+    assert page['next_cursor'] is None
+    assert client.get('/submissions').get_json() == {'submissions': page['submissions'], 'next_cursor': None}
+
+
+@pytest.mark.parametrize('cursor', ['bogus', '1-x', '-1-0', '3'])
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get(f'/submissions?cursor={cursor}')
+    assert response.status_code == 400
+    assert 'cursor' in response.get_json()['error']
+
+
+def test_fields_projection(client):
+    submit(1, ramp_requirement=100)
+    page = client.get('/submissions?fields=client_name,seq,missing').get_json()
+    assert page['submissions'] == [{'client_name': 'Acme', 'seq': 0}]
+    lines = client.get('/submissions?fields=seq&format=ndjson').get_data(as_text=True).splitlines()
+    assert lines == ['{"seq": 0}', '{"next_cursor": null}']
+
+
+def test_step_api_rejects_invalid_fields(client):
+    response = client.post('/api/ramp-form/step/1', json={'action': 'next', 'ramp_requirement': 0})
+    assert response.status_code == 400
+    assert list(response.get_json()['errors']) == ['ramp_requirement']
+    assert client.post('/api/ramp-form/step/1', json={'action': 'jump'}).status_code == 400
+    assert client.get('/api/ramp-form/step/99').status_code == 404
+
+
+def test_step_api_moves_through_the_wizard(client):
+    response = client.post('/api/ramp-form/step/1', json={'action': 'next', 'client_name': 'Acme'})
+    assert response.status_code == 200
+    assert response.get_json()['step'] == 2
+    payload = client.post('/api/ramp-form/step/2', json={'action': 'previous'}).get_json()
+    assert payload['step'] == 1
+    assert payload['is_first_step']
+    assert 'Acme' in payload['html']
+    assert client.post('/api/ramp-form/step/1', json={'action': 'save'}).get_json()['step'] == 1
+
+    last = client.get('/api/ramp-form/step/7').get_json()['total_steps']
+    assert client.post(f'/api/ramp-form/step/{last}', json={'action': 'next'}).get_json() == {
+        'step': None, 'redirect': '/ramp-form/submit'}
+
+
+def autosave(client, seq, changes, step=1):
+    return client.post(f'/api/ramp-form/step/{step}/autosave', json={'client': 'page', 'seq': seq, 'changes': changes})
+
+
+def test_autosave_ignores_stale_batches(client):
+    assert autosave(client, 2, {'client_name': 'Acme Corp'}).get_json()['saved']
+    stale = autosave(client, 1, {'client_name': 'Acme'}).get_json()
+    assert stale['stale'] and not stale['saved']
+    response = autosave(client, 3, {'ramp_requirement': 0, 'bogus': 1}).get_json()
+    assert list(response['errors']) == ['ramp_requirement']
+    assert response['ignored'] == ['bogus']
+    assert autosave(client, 1, {}, step=99).status_code == 404
+    assert client.post('/api/ramp-form/step/1/autosave', json={'seq': 0, 'changes': {}}).status_code == 400
+    assert 'Acme Corp' in client.get('/api/ramp-form/step/1').get_json()['html']
+
+
+def test_full_save_wins_over_buffered_autosave(client):
+    import routes
+    autosave(client, 1, {'client_name': 'Acme'})
+    autosave(client, 2, {'client_name': 'Acme Co'})
+    client.post('/api/ramp-form/step/1', json={'action': 'save', 'client_name': 'Acme Corporation'})
+    routes.autosaves.flush_all()
+    assert 'Acme Corporation' in client.get('/api/ramp-form/step/1').get_json()['html']
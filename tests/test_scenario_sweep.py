@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+import pytest
+
+import scenario_sweep
+from scenario_sweep import SYNC_MAX_SCENARIOS, run_sweep, sweep_needs_job
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    """Record the overrides of every simulated variant instead of simulating the ramp"""
+    calls = []
+
+    def evaluate(form_data, sites_config, overrides):
+        calls.append(overrides)
+        return {'ready_week': overrides.get('batch_size', 0), 'peak_trainers': 1, 'peak_in_training': 1}
+
+    monkeypatch.setattr(scenario_sweep, 'evaluate', evaluate)
+    monkeypatch.setattr(scenario_sweep, '_cache', OrderedDict())
+    return calls
+
+
+def test_duplicate_variants_are_evaluated_once(evaluated):
+    result = run_sweep({}, {}, {'batch_size': [12, 10, 12]})
+    # One baseline plus the two distinct variants
+    assert len(evaluated) == 3
+    assert result['scenarios'] == 3
+    assert result['evaluated'] == 2
+    assert result['pending'] == 0
+
+
+def test_limit_must_be_positive(evaluated):
+    with pytest.raises(ValueError):
+        run_sweep({}, {}, {'batch_size': [10]}, limit=0)
+
+
+def test_large_or_slow_sweeps_go_to_the_job_queue():
+    assert not sweep_needs_job(SYNC_MAX_SCENARIOS)
+    assert sweep_needs_job(SYNC_MAX_SCENARIOS + 1)
+    assert sweep_needs_job(1, time_budget=60)
+
+
+MONTHLY_FORM = {'phl_headcount': '30', 'geo_country': ['PHL'], 'ramp_start_date': '2025-01-06'}
+MONTHLY_SITES = {'sites_count_PHL': '2', 'monthly_capacity_PHL_site1': '40', 'monthly_capacity_PHL_site2': '20'}
+
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(scenario_sweep, '_cache', OrderedDict())
+
+
+def test_sweep_with_monthly_capacities(empty_cache):
+    result = run_sweep(MONTHLY_FORM, MONTHLY_SITES, {'capacity_scale': [0.5, 1, 1.5], 'batch_size': [10, 20]})
+    assert result['baseline']['ready_week'] is not None
+    assert result['evaluated'] == 6
+    assert result['pending'] == 0
+    assert not any('error' in item['summary'] for item in result['results'])
+    # More hiring capacity never finishes later
+    ready = {item['overrides']['capacity_scale']: item['summary']['ready_week'] for item in result['results']}
+    assert ready[1.5] <= ready[1] <= ready[0.5]
+
+
+def test_sweep_in_worker_pool_with_monthly_capacities(empty_cache):
+    grid = {'capacity_scale': [0.5, 0.75, 1, 1.25, 1.5], 'batch_size': [5, 10, 15, 20]}
+    result = run_sweep(MONTHLY_FORM, MONTHLY_SITES, grid, time_budget=30)
+    assert result['evaluated'] == 20
+    assert result['pending'] == 0
+    assert not any('error' in item['summary'] for item in result['results'])
+
+
+def test_failed_variants_are_reported_not_raised(empty_cache, monkeypatch):
+    def simulate_ramp(form_data, sites_config):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(scenario_sweep, 'simulate_ramp', simulate_ramp)
+    result = run_sweep(MONTHLY_FORM, MONTHLY_SITES, {'batch_size': [10]})
+    assert result['baseline'] == {'error': 'boom'}
+    assert result['results'][0]['summary'] == {'error': 'boom'}
@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from session_store import FileSessionBackend, SessionStore, SqliteSessionBackend, merge_patch
+
+CHANGES = {'step1': {'client_name': 'Acme', 'ramp_end_date': None, 'extra': {'note': 'x', 'old': None}}}
+EXPECTED = {'client_name': 'Acme', 'ramp_start_date': '2025-01-01', 'extra': {'keep': 1, 'note': 'x'}}
+
+
+def make_store(kind, tmp_path):
+    if kind == 'sqlite':
+        return SessionStore(SqliteSessionBackend(str(tmp_path / 'sessions.sqlite3')), sweep_interval=0)
+    return SessionStore(FileSessionBackend(str(tmp_path / 'sessions')), sweep_interval=0)
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_patch_with_nested_and_null_values_matches_the_stored_session(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    store.put('s1', {'step1': {'client_name': 'Old', 'ramp_start_date': '2025-01-01', 'ramp_end_date': '2025-06-01',
+                               'extra': {'keep': 1, 'old': 2}}})
+    store.patch('s1', CHANGES)
+    assert store.get('s1')['step1'] == EXPECTED
+    store.flush()
+    # A worker with an empty cache reads the same document
+    assert make_store(kind, tmp_path).get('s1')['step1'] == EXPECTED
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_new_fragment_drops_null_values(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    store.patch('s2', {'step2': {'requirement_type': 'fte', 'requirement_value': None}})
+    assert store.get('s2')['step2'] == {'requirement_type': 'fte'}
+    store.flush()
+    assert make_store(kind, tmp_path).get('s2')['step2'] == {'requirement_type': 'fte'}
+
+
+def fragment(size):
+    return {'step1': {'notes': 'x' * size}}
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_least_recently_used_session_is_evicted_over_the_memory_budget(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    store.max_bytes = 2500
+    store.put('s1', fragment(1000))
+    store.put('s2', fragment(1000))
+    store.get('s1')
+    store.put('s3', fragment(1000))
+    assert store.stats()['evictions'] == 1
+    assert store.stats()['entries'] == 2
+    misses = store.stats()['misses']
+    store.get('s1')
+    store.get('s3')
+    assert store.stats()['misses'] == misses
+    # The evicted session is read back from the backend
+    assert store.get('s2') == fragment(1000)
+    assert store.stats()['misses'] == misses + 1
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_idle_sessions_expire_from_the_cache(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    store.idle_ttl = 60
+    store.put('idle', fragment(10))
+    store.put('active', fragment(10))
+    store._entries['idle'][2] -= 120
+    store._expire_idle()
+    assert store.stats()['entries'] == 1
+    assert store.expirations == 1
+    assert store.get('idle') == fragment(10)
+
+
+def test_write_behind_session_is_written_when_evicted(tmp_path):
+    store = make_store('file', tmp_path)
+    store.max_bytes = 1500
+    store.patch('s1', fragment(1000))
+    assert store.backend.read('s1') is None
+    store.put('s2', fragment(1000))
+    assert store.evictions == 1
+    assert store.backend.read('s1')[0] == fragment(1000)
+    # An idle session is written before it is dropped too
+    store.idle_ttl = 60
+    store._entries['s2'][2] -= 120
+    assert store.get('s2') == fragment(1000)
+    assert store.backend.read('s2')[0] == fragment(1000)
+
+
+def test_sweep_removes_expired_sessions_and_empty_shards(tmp_path):
+    store = make_store('file', tmp_path)
+    backend = store.backend
+    for session_uuid in ('aa-old', 'ab-old', 'ab-new'):
+        store.put(session_uuid, fragment(10))
+    store.flush()
+    legacy = backend._flat_path('ac-legacy')
+    with open(legacy, 'w') as f:
+        f.write('{}')
+    old = time.time() - 3600
+    for path in (backend.path('aa-old'), backend.path('ab-old'), legacy):
+        os.utime(path, (old, old))
+
+    result = store.sweep(max_age=600, compact=True)
+    assert result['sessions'] == 3
+    assert sorted(os.listdir(backend.directory)) == ['ab']
+    assert os.listdir(os.path.join(backend.directory, 'ab')) == ['ab-new.json']
+    # A write into a removed shard directory recreates it
+    store.put('aa-again', fragment(10))
+    store.flush()
+    assert backend.read('aa-again')[0] == fragment(10)
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_patching_one_fragment_leaves_the_others_alone(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    store.put('s1', {'step1': {'client_name': 'Acme'}, 'step2': {'lob_count': 2},
+                     'sites_config': {'sites_count_PHL': '2'}})
+    store.patch('s1', {'step2': {'lob_count': 3, 'requirement_type': 'fte'}})
+    store.flush()
+    expected = {'step1': {'client_name': 'Acme'}, 'step2': {'lob_count': 3, 'requirement_type': 'fte'},
+                'sites_config': {'sites_count_PHL': '2'}}
+    assert store.get('s1') == expected
+    assert make_store(kind, tmp_path).get('s1') == expected
+
+
+def test_sqlite_patch_only_rewrites_the_patched_fragment(tmp_path):
+    store = make_store('sqlite', tmp_path)
+    store.put('s1', {'step1': {'client_name': 'Acme'}, 'step2': {'lob_count': 2}})
+    store.patch('s1', {'step2': {'lob_count': 3}})
+    rows = store.backend._conn().execute(
+        "SELECT fragment, version FROM session_fragments WHERE session_uuid = 's1'").fetchall()
+    assert dict(rows) == {'step1': 1, 'step2': 2}
+
+
+@pytest.mark.parametrize('target, changes', [
+    ({'a': 1, 'b': 2}, {'a': None, 'c': 3}),
+    ({'a': {'b': 1, 'c': 2}}, {'a': {'b': None, 'd': {'e': None, 'f': 1}}}),
+    ({'a': {'b': 1}}, {'a': 'flat'}),
+    ({'a': 'flat'}, {'a': {'b': 1, 'c': None}}),
+    ({'a': [1, 2]}, {'a': [3, None]}),
+    ({}, {'a': None, 'b': {}}),
+])
+def test_merge_patch_matches_sqlite_json_patch(target, changes):
+    conn = sqlite3.connect(':memory:')
+    (patched,), = conn.execute('SELECT json_patch(?, ?)', (json.dumps(target), json.dumps(changes))).fetchall()
+    assert merge_patch(target, changes) == json.loads(patched)
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from staffing import MAX_AGENTS, MAX_OCCUPANCY, solve_interval, staffing_plan, staffing_summary
+
+
+def abandon_rate(agents, traffic, aht, patience, states=400):
+    """P(abandon) of M/M/n+M from its birth-death chain, as a reference for Erlang A"""
+    arrival, service, patience_rate = traffic / aht, 1 / aht, 1 / patience
+    probabilities = [1.0]
+    for k in range(1, states):
+        probabilities.append(probabilities[-1] * arrival
+                             / (min(k, agents) * service + max(k - agents, 0) * patience_rate))
+    queued = sum(max(k - agents, 0) * p for k, p in enumerate(probabilities)) / sum(probabilities)
+    return patience_rate * queued / arrival
+
+
+def test_erlang_c_textbook_case():
+    # 100 calls per half hour at 3 minutes AHT (10 Erlangs), 80% answered in 20 seconds
+    (agents, service_level, asa, abandon), = solve_interval(10.0, 180, (0.8,), 20)
+    assert agents == 14
+    assert service_level == pytest.approx(0.888, abs=0.001)
+    assert asa == pytest.approx(7.8, abs=0.1)
+    assert abandon == 0.0
+    # One agent fewer misses the target
+    assert solve_interval(10.0, 180, (0.79,), 20)[0][0] == 13
+
+
+def test_erlang_c_solves_several_targets_in_order():
+    results = solve_interval(10.0, 180, (0.9, 0.8, 0.95), 20)
+    assert [agents for agents, *_ in results] == [15, 14, 16]
+
+
+def test_erlang_a_matches_the_birth_death_chain():
+    (agents, service_level, asa, abandon), = solve_interval(10.0, 180, (0.8,), 20, None, 0.05, 600)
+    # Callers hanging up relieve the queue, so fewer agents than Erlang C
+    assert agents == 13
+    assert abandon == pytest.approx(abandon_rate(13, 10.0, 180, 600), abs=1e-4)
+    assert asa == pytest.approx(abandon * 600, abs=0.1)
+    assert service_level >= 0.8
+
+
+def test_no_load_needs_no_agents():
+    assert solve_interval(0.0, 180, (0.8, 0.9), 20) == ((0, 1.0, 0.0, 0.0), (0, 1.0, 0.0, 0.0))
+    assert staffing_plan({'inbound': {'weekly_calls': 0, 'aht': 180}})['channels'] == {}
+
+
+def test_traffic_beyond_the_supported_maximum_is_rejected():
+    with pytest.raises(ValueError):
+        solve_interval(float(MAX_AGENTS) * 3, 180, (0.05,), 20)
+    with pytest.raises(ValueError):
+        solve_interval(float(MAX_AGENTS) - 0.5, 180, (0.99,), 20)
+
+
+def test_plan_per_channel():
+    # 33600 calls a week spread flat over 7 x 48 intervals is 100 calls (10 Erlangs) each
+    sizing = {
+        'inbound': {'weekly_calls': 33600, 'aht': '03:00', 'sl': 80},
+        'chat': {'weekly_calls': 33600, 'aht': 180, 'sl': 80, 'asa': 30, 'abandon': 5},
+        'email': {'weekly_calls': 33600, 'aht': 180},
+    }
+    plan = staffing_plan(sizing)
+    channels = plan['channels']
+    assert {name: channel['model'] for name, channel in channels.items()} == {
+        'inbound': 'erlang_c', 'chat': 'erlang_a', 'email': 'workload'}
+    assert channels['inbound']['targets']['80']['agents'] == [14] * 336
+    assert channels['chat']['targets']['80']['peak'] == 13
+    assert channels['email']['targets']['workload']['peak'] == math.ceil(10 / MAX_OCCUPANCY)
+    assert staffing_summary(plan)['inbound'] == {'80': {'peak': 14, 'agent_hours': 14 * 336 / 2}}
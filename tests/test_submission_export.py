@@ -0,0 +1,37 @@
+import csv
+import io
+import zipfile
+
+import pytest
+
+import submission_export
+from submission_export import iter_csv, write_xlsx
+
+INJECTED = '=HYPERLINK("http://x","y")'
+RECORDS = [
+    {'timestamp': '2025-01-01T00:00:00', 'client_name': INJECTED, 'lob_names': '+SUM(1,2)',
+     'specify_languages': '@cmd', 'requirement_value': '-12.5'},
+]
+
+
+@pytest.fixture
+def records(monkeypatch):
+    monkeypatch.setattr(submission_export, 'iter_matching', lambda query: enumerate(RECORDS))
+
+
+def test_xlsx_export_writes_formula_like_text_as_strings(records):
+    output = io.BytesIO()
+    assert write_xlsx(output, {'type': 'ramp'}) == 1
+    with zipfile.ZipFile(output) as archive:
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert '<f>' not in sheet
+    assert 'HYPERLINK' in sheet
+
+
+def test_csv_export_neutralizes_formula_like_text(records):
+    rows = list(csv.DictReader(io.StringIO(''.join(iter_csv({'type': 'ramp'})))))
+    assert rows[0]['client_name'] == "'" + INJECTED
+    assert rows[0]['lob_names'] == "'+SUM(1,2)"
+    assert rows[0]['specify_languages'] == "'@cmd"
+    # Plain numbers are left alone
+    assert rows[0]['requirement_value'] == '-12.5'
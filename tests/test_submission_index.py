@@ -0,0 +1,46 @@
+import os
+import sqlite3
+
+import submission_index
+from submission_index import find_positions, index_submission, rebuild_index, sync_index
+from submission_store import append_submission
+
+
+def save(record):
+    """Append and index a record the way routes.save_submission does"""
+    position = append_submission(record)
+    try:
+        index_submission(position, record)
+    except sqlite3.Error:
+        pass
+    return position
+
+
+def test_sync_indexes_a_record_whose_index_write_failed(data_dir, monkeypatch):
+    rebuild_index()
+    first = save({'client_name': 'Acme', 'submission_type': 'ramp'})
+
+    write = submission_index._write
+
+    def failing_write(conn, entries):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(submission_index, '_write', failing_write)
+    missed = save({'client_name': 'Acme', 'submission_type': 'ramp'})
+    monkeypatch.setattr(submission_index, '_write', write)
+    last = save({'client_name': 'Acme', 'submission_type': 'ramp'})
+
+    assert find_positions({'client_name': 'acme'}) == [first, last]
+    sync_index()
+    assert find_positions({'client_name': 'acme'}) == [first, missed, last]
+    # Nothing is left to catch up afterwards
+    assert sync_index() == 0
+
+
+def test_forked_process_opens_its_own_connection(data_dir):
+    parent = submission_index.get_connection()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if submission_index.get_connection() is not parent else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
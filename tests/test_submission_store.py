@@ -0,0 +1,32 @@
+import os
+
+import submission_store
+from submission_store import append_submission, iter_submissions, segment_path
+
+
+def test_append_after_a_torn_write_keeps_the_new_record(data_dir):
+    first = append_submission({'client_name': 'first'})
+    # A writer that died mid-append left half a record behind
+    with open(segment_path(first[0]), 'ab') as f:
+        f.write(b'{"client_name":"tor')
+    second = append_submission({'client_name': 'second'})
+    records = [record['client_name'] for _, record in iter_submissions()]
+    assert records == ['first', 'second']
+    assert [position for position, _ in iter_submissions()] == [first, second]
+
+
+def test_torn_tail_longer_than_the_scan_window(data_dir, monkeypatch):
+    monkeypatch.setattr(submission_store, 'TAIL_SCAN_BYTES', 4)
+    append_submission({'client_name': 'first'})
+    with open(segment_path(1), 'ab') as f:
+        f.write(b'{"client_name":"' + b'x' * 50)
+    append_submission({'client_name': 'second'})
+    assert [record['client_name'] for _, record in iter_submissions()] == ['first', 'second']
+
+
+def test_torn_first_record(data_dir):
+    os.makedirs(submission_store.SUBMISSIONS_DIR)
+    with open(segment_path(1), 'wb') as f:
+        f.write(b'{"client_na')
+    assert append_submission({'client_name': 'only'}) == (1, 0)
+    assert [record['client_name'] for _, record in iter_submissions()] == ['only']
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+import template_cache
+from template_cache import FragmentCache, FragmentCacheExtension, data_key, template_version
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """Jinja environment over tmp_path/templates with the {% cache %} tag and an empty fragment cache"""
+    monkeypatch.setattr(template_cache, 'fragments', FragmentCache())
+    (tmp_path / 'templates').mkdir()
+    env = Environment(loader=FileSystemLoader(str(tmp_path / 'templates')), extensions=[FragmentCacheExtension])
+    env.globals['renders'] = renders = []
+    env.globals['render'] = lambda value: renders.append(value) or value
+    return env
+
+
+def write(tmp_path, name, source, mtime=None):
+    path = tmp_path / 'templates' / name
+    path.write_text(source)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_fragment_is_rendered_once_per_key(env, tmp_path):
+    write(tmp_path, 'page.html', "<p>{% cache 'grid', key %}{{ render(key) }}{% endcache %}</p>")
+    template = env.get_template('page.html')
+    assert template.render(key='a') == '<p>a</p>'
+    assert template.render(key='a') == '<p>a</p>'
+    assert env.globals['renders'] == ['a']
+    # A different key is a miss
+    assert template.render(key='b') == '<p>b</p>'
+    assert env.globals['renders'] == ['a', 'b']
+
+
+def test_changed_template_invalidates_its_fragments(env, tmp_path):
+    write(tmp_path, 'page.html', "{% cache 'grid' %}old{% endcache %}", mtime=1000)
+    assert env.get_template('page.html').render() == 'old'
+    write(tmp_path, 'page.html', "{% cache 'grid' %}new{% endcache %}", mtime=2000)
+    assert env.get_template('page.html').render() == 'new'
+
+
+def test_fragment_cache_is_bounded_least_recently_used_first():
+    cache = FragmentCache(max_bytes=10)
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    cache.get('a')
+    cache.put('c', 'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aaaa' and cache.get('c') == 'cccc'
+    cache.put('huge', 'x' * 11)
+    assert cache.get('huge') is None
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'max_bytes': 10}
+
+
+def test_data_key_ignores_key_order():
+    assert data_key({'a': 1, 'b': [1, 2]}) == data_key({'b': [1, 2], 'a': 1})
+    assert data_key({'a': 1}) != data_key({'a': 2})
+
+
+def test_compiled_templates_are_reused_from_the_bytecode_cache(tmp_path, monkeypatch):
+    (tmp_path / 'templates').mkdir()
+    write(tmp_path, 'page.html', '{{ 1 + 1 }}')
+    cache_dir = tmp_path / 'jinja_cache'
+    cache_dir.mkdir()
+
+    def make_env():
+        return Environment(loader=FileSystemLoader(str(tmp_path / 'templates')),
+                           bytecode_cache=FileSystemBytecodeCache(str(cache_dir)))
+
+    assert make_env().get_template('page.html').render() == '2'
+    assert os.listdir(cache_dir)
+    # A new process loads the bytecode instead of compiling the source
+    fresh = make_env()
+    monkeypatch.setattr(fresh, 'compile', lambda *args, **kwargs: pytest.fail('template was recompiled'))
+    assert fresh.get_template('page.html').render() == '2'
+
+
+def test_template_version_changes_with_the_templates(tmp_path):
+    (tmp_path / 'templates').mkdir()
+    write(tmp_path, 'page.html', 'one', mtime=1000)
+    version = template_version(str(tmp_path / 'templates'))
+    assert template_version(str(tmp_path / 'templates')) == version
+    write(tmp_path, 'page.html', 'two', mtime=2000)
+    assert template_version(str(tmp_path / 'templates')) != version
@@ -0,0 +1,27 @@
+import io
+import os
+
+import pytest
+
+from upload_store import UploadError, UploadStore
+from workbook_import import SUPPORTED_EXTENSIONS
+
+
+def test_uploads_are_limited_to_importable_files(tmp_path):
+    store = UploadStore(str(tmp_path / 'uploads'))
+    with pytest.raises(UploadError):
+        store.put(io.BytesIO(b'legacy'), 'volumes.xls')
+    with pytest.raises(UploadError):
+        store.create_upload('volumes.xls', 6)
+    for extension in SUPPORTED_EXTENSIONS:
+        assert store.put(io.BytesIO(b'Month,Chat\n'), f'volumes{extension}')['sha256']
+
+
+def test_forked_process_opens_its_own_connection(tmp_path):
+    store = UploadStore(str(tmp_path / 'uploads'))
+    parent = store._connection()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if store._connection() is not parent else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,49 @@
+import zipfile
+
+import pytest
+
+from workbook_import import WorkbookImportError, import_workbook
+
+
+def write_xlsx(path, parts):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    return str(path)
+
+
+SHEET = ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+         '<row r="1"><c r="A1" t="s"><v>{index}</v></c></row></sheetData></worksheet>')
+
+
+def test_csv_import(tmp_path):
+    path = tmp_path / 'monthly.csv'
+    path.write_text('Month,Inbound Calls,Inbound AHT\nJanuary,100,300\n', encoding='utf-8')
+    summary = import_workbook(str(path))
+    assert summary['layout'] == 'monthly'
+    assert summary['rows'] == 1
+
+
+def test_corrupt_xlsx_is_an_import_error(tmp_path):
+    path = write_xlsx(tmp_path / 'corrupt.xlsx', {'xl/worksheets/sheet1.xml': '<worksheet><sheetData><row>'})
+    with pytest.raises(WorkbookImportError):
+        import_workbook(path)
+
+
+def test_xlsx_without_worksheet_is_an_import_error(tmp_path):
+    path = write_xlsx(tmp_path / 'empty.xlsx', {'[Content_Types].xml': '<Types/>'})
+    with pytest.raises(WorkbookImportError):
+        import_workbook(path)
+
+
+def test_bad_shared_string_index_is_an_import_error(tmp_path):
+    path = write_xlsx(tmp_path / 'strings.xlsx', {'xl/worksheets/sheet1.xml': SHEET.format(index=7)})
+    with pytest.raises(WorkbookImportError):
+        import_workbook(path)
+
+
+def test_non_utf8_csv_is_an_import_error(tmp_path):
+    path = tmp_path / 'latin1.csv'
+    path.write_bytes('Month,Inbound Calls\nJanvier \xe9t\xe9,100\n'.encode('latin-1'))
+    with pytest.raises(WorkbookImportError):
+        import_workbook(str(path))
@@ -0,0 +1,318 @@
+"""Content-addressed storage for uploaded workbooks.
+
+Uploads are streamed to a temporary file in fixed-size chunks while being
+hashed, so memory use does not depend on the file size, and the size limit is
+enforced as soon as it is crossed instead of after the whole body has been read.
+Finished files are stored once under their SHA-256 (``blobs/<ab>/<hash><ext>``)
+with a reference count in ``uploads.sqlite3``: uploading the same bytes again
+only bumps the count, and a blob is deleted when its last reference is released.
+
+Large files can also be sent as resumable chunked uploads: create the upload
+with its final size, then append chunks at the offset the server reports until
+it is complete. Partial uploads not touched for ``UPLOAD_PARTIAL_TTL`` seconds
+are deleted, and a completed upload holds its reference for the same period so
+it can be claimed by a later form submission or import.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from workbook_import import SUPPORTED_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = os.environ.get('UPLOADS_DIR', 'uploads')
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+UPLOAD_PARTIAL_TTL = int(os.environ.get('UPLOAD_PARTIAL_TTL', 24 * 3600))
+
+# Only files the workbook import can read are worth storing
+ALLOWED_EXTENSIONS = SUPPORTED_EXTENSIONS
+CHUNK_BYTES = 64 * 1024
+CLEANUP_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    extension TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    refs INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    received INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_updated ON uploads (updated_at);
+"""
+
+
+class UploadError(ValueError):
+    """Raised for uploads that cannot be accepted"""
+
+
+class UploadTooLarge(UploadError):
+    """Raised when an upload exceeds the size limit"""
+
+
+class UploadOffsetMismatch(UploadError):
+    """Raised when a chunk does not start where the upload currently ends"""
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+
+class UploadStore:
+    """Blob files plus a SQLite table of reference counts and resumable uploads"""
+
+    def __init__(self, directory, max_bytes=UPLOAD_MAX_BYTES, partial_ttl=UPLOAD_PARTIAL_TTL):
+        self.directory = directory
+        self.db_path = os.path.join(directory, 'uploads.sqlite3')
+        self.blobs_dir = os.path.join(directory, 'blobs')
+        self.partial_dir = os.path.join(directory, 'partial')
+        self.tmp_dir = os.path.join(directory, 'tmp')
+        self.max_bytes = max_bytes
+        self.partial_ttl = partial_ttl
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            for path in (self.blobs_dir, self.partial_dir, self.tmp_dir):
+                os.makedirs(path, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _blob_path(self, sha256, extension):
+        return os.path.join(self.blobs_dir, sha256[:2], f'{sha256}{extension}')
+
+    def _check_name(self, filename):
+        """Sanitised filename and its extension, raising UploadError for unsupported files"""
+        name = secure_filename(filename or '')
+        extension = os.path.splitext(name)[1].lower()
+        if not name or extension not in ALLOWED_EXTENSIONS:
+            raise UploadError(f'Only {", ".join(ALLOWED_EXTENSIONS)} files can be uploaded')
+        return name, extension
+
+    def _check_size(self, size):
+        if size is not None and size > self.max_bytes:
+            raise UploadTooLarge(f'Uploads are limited to {self.max_bytes / (1024 * 1024):g}MB')
+
+    def put(self, stream, filename, length=None):
+        """Store a file-like object's contents and return its blob info, holding one reference"""
+        name, extension = self._check_name(filename)
+        self._check_size(length)
+        self._connection()
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    self._check_size(size)
+                    digest.update(chunk)
+                    f.write(chunk)
+            info = self._commit(tmp_path, digest.hexdigest(), size, extension)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+        return dict(info, filename=name)
+
+    def _commit(self, tmp_path, sha256, size, extension):
+        """Move a finished file into the blob store, or drop it if the content is already stored"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT extension FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+            if row is None:
+                path = self._blob_path(sha256, extension)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                conn.execute('INSERT INTO blobs (sha256, extension, size, refs, created_at) VALUES (?, ?, ?, 1, ?)',
+                             (sha256, extension, size, time.time()))
+            else:
+                path = self._blob_path(sha256, row['extension'])
+                if os.path.exists(path):
+                    _remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                conn.execute('UPDATE blobs SET refs = refs + 1 WHERE sha256 = ?', (sha256,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return {'sha256': sha256, 'size': size, 'path': path}
+
+    def path(self, sha256):
+        """Path of a stored blob, or None if it is not stored"""
+        row = self._connection().execute('SELECT extension FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+        return self._blob_path(sha256, row['extension']) if row else None
+
+    def acquire(self, sha256):
+        """Add a reference to a stored blob; False if it is not stored"""
+        conn = self._connection()
+        return conn.execute('UPDATE blobs SET refs = refs + 1 WHERE sha256 = ?', (sha256,)).rowcount == 1
+
+    def release(self, sha256):
+        """Drop a reference, deleting the blob when none remain"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT extension, refs FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+            if row is not None and row['refs'] <= 1:
+                conn.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+                _remove(self._blob_path(sha256, row['extension']))
+            elif row is not None:
+                conn.execute('UPDATE blobs SET refs = refs - 1 WHERE sha256 = ?', (sha256,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def create_upload(self, filename, size):
+        """Start a resumable upload of a file of known size and return its status"""
+        name, _ = self._check_name(filename)
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('size must be a positive number of bytes')
+        self._check_size(size)
+        self._maybe_cleanup()
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        open(self._partial_path(upload_id), 'wb').close()
+        self._connection().execute(
+            'INSERT INTO uploads (id, filename, size, received, created_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)',
+            (upload_id, name, size, now, now))
+        return self.upload_status(upload_id)
+
+    def _partial_path(self, upload_id):
+        return os.path.join(self.partial_dir, upload_id)
+
+    def upload_status(self, upload_id):
+        """Public view of a resumable upload, or None if unknown or expired"""
+        row = self._connection().execute('SELECT * FROM uploads WHERE id = ?', (upload_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'filename': row['filename'],
+            'size': row['size'],
+            'offset': row['received'],
+            'complete': row['sha256'] is not None,
+            'sha256': row['sha256'],
+        }
+
+    def append(self, upload_id, offset, stream):
+        """Append a chunk at the given offset; the upload is stored as a blob once complete"""
+        status = self.upload_status(upload_id)
+        if status is None:
+            return None
+        if status['complete'] or offset != status['offset']:
+            raise UploadOffsetMismatch(status['offset'])
+        path = self._partial_path(upload_id)
+        with open(path, 'r+b') as f:
+            # One writer per upload across all workers
+            fcntl.flock(f, fcntl.LOCK_EX)
+            status = self.upload_status(upload_id)
+            if status is None or status['complete'] or offset != status['offset']:
+                raise UploadOffsetMismatch(status['offset'] if status else offset)
+            f.seek(offset)
+            f.truncate()
+            received = offset
+            while True:
+                chunk = stream.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > status['size']:
+                    f.truncate(offset)
+                    raise UploadTooLarge(f"Chunk goes past the declared size of {status['size']} bytes")
+                f.write(chunk)
+            f.flush()
+            self._connection().execute('UPDATE uploads SET received = ?, updated_at = ? WHERE id = ?',
+                                       (received, time.time(), upload_id))
+            if received == status['size']:
+                self._complete(upload_id, path)
+        return self.upload_status(upload_id)
+
+    def _complete(self, upload_id, path):
+        """Hash a finished partial upload and move it into the blob store"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+                digest.update(chunk)
+        row = self._connection().execute('SELECT filename, size FROM uploads WHERE id = ?', (upload_id,)).fetchone()
+        extension = os.path.splitext(row['filename'])[1].lower()
+        info = self._commit(path, digest.hexdigest(), row['size'], extension)
+        self._connection().execute('UPDATE uploads SET sha256 = ?, updated_at = ? WHERE id = ?',
+                                   (info['sha256'], time.time(), upload_id))
+
+    def claim(self, upload_id):
+        """Blob info of a completed upload with a new reference for the caller"""
+        status = self.upload_status(upload_id)
+        if status is None or not status['complete']:
+            raise UploadError('Upload is not complete')
+        if not self.acquire(status['sha256']):
+            raise UploadError('Upload is no longer available')
+        return {'sha256': status['sha256'], 'size': status['size'], 'filename': status['filename'],
+                'path': self.path(status['sha256'])}
+
+    def cleanup(self, now=None):
+        """Delete partial uploads and release completed ones not touched within the TTL"""
+        cutoff = (now or time.time()) - self.partial_ttl
+        conn = self._connection()
+        rows = conn.execute('SELECT id, sha256 FROM uploads WHERE updated_at < ?', (cutoff,)).fetchall()
+        for row in rows:
+            conn.execute('DELETE FROM uploads WHERE id = ?', (row['id'],))
+            if row['sha256']:
+                self.release(row['sha256'])
+            else:
+                _remove(self._partial_path(row['id']))
+        # Streamed uploads interrupted by a crash leave their temp files behind
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    _remove(path)
+            except FileNotFoundError:
+                pass
+        return len(rows)
+
+    def _maybe_cleanup(self):
+        if time.monotonic() - self._last_cleanup >= CLEANUP_INTERVAL:
+            self._last_cleanup = time.monotonic()
+            try:
+                self.cleanup()
+            except (OSError, sqlite3.Error):
+                logger.exception('Upload cleanup failed')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,101 @@
+"""Start-up phases timed by the app factory, and warm-up of the per-process caches.
+
+``create_app`` runs each configuration step through ``StartupTimings.phase`` and
+then, unless ``WARMUP=0``, the warm-up phases registered with ``@phase(name)``:
+compiling every template, building the form classes, the blank workbook bytes
+and loading recently used sessions. Under ``gunicorn --preload`` this all
+happens once in the master, and the forked workers start with it done. Warm-up
+must therefore not start threads (a lock held by a thread at fork time stays
+locked in the child), which is why its timings are logged and kept in
+``app.extensions['startup']`` (``/startup-stats``) rather than recorded as
+metrics.
+
+Each process records how long after start-up it sent its first response in the
+``wfm_startup_first_response_seconds`` histogram. Start-up is when this module
+was first imported, which under ``--preload`` is in the master, so the figure
+covers the whole time from scale-up to a served request.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP = os.environ.get('WARMUP', '1') == '1'
+WARMUP_SESSIONS = int(os.environ.get('WARMUP_SESSIONS', 200))
+
+STARTED = time.monotonic()
+
+# (name, fn(app)) in registration order
+PHASES = []
+
+
+def phase(name):
+    """Register a warm-up phase, run as fn(app) by warm_up"""
+    def register(fn):
+        PHASES.append((name, fn))
+        return fn
+    return register
+
+
+class StartupTimings:
+    """Seconds spent in each start-up phase of this app"""
+
+    def __init__(self):
+        self.phases = {}
+        self.first_response = None
+        self._first_response_pid = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+            logger.info('Start-up phase %s took %.1f ms', name, self.phases[name] * 1000)
+
+    def response_sent(self):
+        """Record the time to this process's first response (once per process)"""
+        if self._first_response_pid == os.getpid():
+            return
+        self._first_response_pid = os.getpid()
+        self.first_response = time.monotonic() - STARTED
+        metrics.observe('wfm_startup_first_response_seconds', self.first_response)
+        logger.info('First response %.1f ms after start-up', self.first_response * 1000)
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'total_ms': round(sum(self.phases.values()) * 1000, 3),
+            'first_response_ms': None if self.first_response is None or self._first_response_pid != os.getpid()
+            else round(self.first_response * 1000, 3),
+        }
+
+
+def warm_up(app, timings):
+    """Run the registered warm-up phases, timing each; a failed phase is logged and skipped"""
+    for name, fn in PHASES:
+        with timings.phase(f'warmup:{name}'):
+            try:
+                fn(app)
+            except Exception:
+                logger.exception('Warm-up phase %s failed', name)
+
+
+@phase('templates')
+def compile_templates(app):
+    """Load every template, compiling it (or reading its bytecode) into the Jinja environment's cache"""
+    env = app.jinja_env
+    for name in env.list_templates(extensions=('html',)):
+        env.get_template(name)
+
+
+@phase('url_map')
+def compile_url_map(app):
+    """Sort the routes and build the URL matcher before the first request needs it"""
+    app.url_map.update()
@@ -0,0 +1,402 @@
+"""Streaming import of the monthly, weekly and intraday volume/AHT workbooks.
+
+The layouts are the ones served by ``/download-template/<type>``. Workbooks are
+read row by row straight out of the xlsx zip with ``iterparse`` (CSV files with
+the same columns are accepted too), so memory stays bounded no matter how many
+rows a file has. Rows are validated and converted in batches into ``array('d')``
+columns, and each batch is folded into running totals.
+
+Units: monthly and weekly AHT values are taken as seconds; the intraday
+template's "AHT (minutes)" column is converted to seconds.
+"""
+import csv
+import os
+import posixpath
+import zipfile
+import zlib
+from array import array
+from xml.etree.ElementTree import ParseError, iterparse
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+BATCH_ROWS = 2048
+INTERVALS_PER_DAY = 48
+WEEKS_PER_YEAR = 52
+DAYS_PER_YEAR = 365
+
+CHANNELS = ('inbound', 'outbound', 'backoffice', 'social', 'chat', 'email')
+# File types iter_rows can read (uploads are limited to these too)
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+# Monthly template column -> (channel, measure)
+MONTHLY_COLUMNS = {
+    'inbound calls': ('inbound', 'volume'),
+    'outbound calls': ('outbound', 'volume'),
+    'back-office tasks': ('backoffice', 'volume'),
+    'social media': ('social', 'volume'),
+    'chat': ('chat', 'volume'),
+    'email': ('email', 'volume'),
+    'inbound aht': ('inbound', 'aht'),
+    'outbound aht': ('outbound', 'aht'),
+    'back-office aht': ('backoffice', 'aht'),
+    'social media aht': ('social', 'aht'),
+    'chat aht': ('chat', 'aht'),
+    'email aht': ('email', 'aht'),
+}
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+class WorkbookImportError(ValueError):
+    """Raised when an uploaded workbook cannot be read or does not match a template layout"""
+
+
+def _column_index(ref):
+    """Convert a cell reference such as 'AB12' to a zero-based column index"""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _first_sheet_path(archive):
+    """Locate the first worksheet's XML part inside an xlsx archive"""
+    try:
+        with archive.open('xl/workbook.xml') as f:
+            sheet = next(elem for _, elem in iterparse(f) if elem.tag == f'{SHEET_NS}sheet')
+        rel_id = sheet.get(f'{REL_NS}id')
+        with archive.open('xl/_rels/workbook.xml.rels') as f:
+            for _, elem in iterparse(f):
+                if elem.tag == f'{PACKAGE_REL_NS}Relationship' and elem.get('Id') == rel_id:
+                    target = elem.get('Target')
+                    return target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    except (KeyError, StopIteration):
+        pass
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _read_shared_strings(archive):
+    """Load the shared string table (unique strings only)"""
+    strings = []
+    try:
+        f = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return strings
+    with f:
+        for _, elem in iterparse(f):
+            if elem.tag == f'{SHEET_NS}si':
+                strings.append(''.join(t.text or '' for t in elem.iter(f'{SHEET_NS}t')))
+                elem.clear()
+    return strings
+
+
+def iter_xlsx_rows(path):
+    """Yield each row of the first worksheet as a list of str/float/None values"""
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise WorkbookImportError('File is not a valid .xlsx workbook')
+    try:
+        with archive:
+            yield from _iter_sheet_rows(archive)
+    except WorkbookImportError:
+        raise
+    except (ParseError, KeyError, IndexError, ValueError, EOFError, zipfile.BadZipFile, zlib.error) as e:
+        raise WorkbookImportError('File is not a valid .xlsx workbook (it may be damaged)') from e
+
+
+def _iter_sheet_rows(archive):
+    """Yield the first worksheet's rows from an open xlsx archive"""
+    strings = _read_shared_strings(archive)
+    with archive.open(_first_sheet_path(archive)) as f:
+        for _, elem in iterparse(f):
+            if elem.tag != f'{SHEET_NS}row':
+                continue
+            row = []
+            for cell in elem.iter(f'{SHEET_NS}c'):
+                column = _column_index(cell.get('r', ''))
+                if column < 0:
+                    column = len(row)
+                cell_type = cell.get('t')
+                if cell_type == 'inlineStr':
+                    value = ''.join(t.text or '' for t in cell.iter(f'{SHEET_NS}t'))
+                else:
+                    raw = cell.findtext(f'{SHEET_NS}v')
+                    if raw is None:
+                        value = None
+                    elif cell_type == 's':
+                        value = strings[int(raw)]
+                    elif cell_type in ('str', 'e'):
+                        value = raw
+                    else:
+                        try:
+                            value = float(raw)
+                        except ValueError:
+                            value = raw
+                row.extend([None] * (column - len(row)))
+                row.append(value)
+            yield row
+            elem.clear()
+
+
+def iter_csv_rows(path):
+    """Yield each row of a CSV file as a list of strings"""
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+    except UnicodeDecodeError as e:
+        raise WorkbookImportError('CSV files must be UTF-8 encoded; save the file as "CSV UTF-8"') from e
+    except csv.Error as e:
+        raise WorkbookImportError(f'File is not a valid CSV file: {e}') from e
+
+
+def iter_rows(path):
+    """Yield rows from an uploaded .xlsx or .csv file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return iter_csv_rows(path)
+    if extension == '.xls':
+        raise WorkbookImportError('Legacy .xls workbooks are not supported; save the file as .xlsx or .csv')
+    return iter_xlsx_rows(path)
+
+
+def _to_number(value):
+    """Parse a cell into a float, treating blanks as NaN and rejecting text"""
+    if value is None:
+        return float('nan')
+    if isinstance(value, float):
+        return value
+    text = str(value).strip().replace(',', '')
+    if not text:
+        return float('nan')
+    if text.endswith('%'):
+        text = text[:-1]
+    try:
+        return float(text)
+    except ValueError:
+        raise WorkbookImportError(f'Expected a number but found {value!r}')
+
+
+def _interval_index(value):
+    """Map a time interval cell ('13:30' or an Excel time fraction) to a half-hour slot"""
+    if isinstance(value, float):
+        return int(round((value % 1) * INTERVALS_PER_DAY)) % INTERVALS_PER_DAY
+    try:
+        hours, minutes = str(value).strip().split(':')[:2]
+        return (int(hours) * 2 + int(minutes) // 30) % INTERVALS_PER_DAY
+    except (ValueError, AttributeError):
+        raise WorkbookImportError(f'Invalid time interval {value!r}')
+
+
+def _batches(rows, wanted):
+    """Group data rows into batches of (labels, {position: numeric column}) for the wanted columns"""
+    width = max(wanted, default=-1) + 2
+    labels = []
+    columns = {position: array('d') for position in wanted}
+    for row in rows:
+        if not row or all(cell in (None, '') for cell in row):
+            continue
+        row = list(row) + [None] * (width - len(row))
+        labels.append(row[0])
+        for position, column in columns.items():
+            column.append(_to_number(row[position + 1]))
+        if len(labels) >= BATCH_ROWS:
+            yield labels, columns
+            labels = []
+            columns = {position: array('d') for position in wanted}
+    if labels:
+        yield labels, columns
+
+
+def _header_map(header, known):
+    """Map known column names to their positions (relative to the label column)"""
+    positions = {}
+    for i, name in enumerate(header[1:]):
+        key = str(name or '').strip().lower()
+        if key in known:
+            positions[key] = i
+    return positions
+
+
+def _is_number(value):
+    """True for anything but NaN"""
+    return value == value
+
+
+def _import_monthly(header, rows):
+    """Annual and weekly volume plus volume-weighted AHT per channel from 12 monthly rows"""
+    positions = _header_map(header, MONTHLY_COLUMNS)
+    if not positions:
+        raise WorkbookImportError('Monthly workbook has none of the expected channel columns')
+
+    volume = dict.fromkeys(CHANNELS, 0.0)
+    aht_weighted = dict.fromkeys(CHANNELS, 0.0)
+    aht_plain = {channel: [0.0, 0] for channel in CHANNELS}
+    seen = set()
+    count = 0
+    for labels, columns in _batches(rows, positions.values()):
+        count += len(labels)
+        for name, (channel, measure) in MONTHLY_COLUMNS.items():
+            if name not in positions:
+                continue
+            values = columns[positions[name]]
+            if measure == 'volume':
+                volume[channel] += sum(v for v in values if _is_number(v))
+                seen.add(channel)
+                continue
+            volume_name = next(n for n, cm in MONTHLY_COLUMNS.items() if cm == (channel, 'volume'))
+            volumes = columns[positions[volume_name]] if volume_name in positions else None
+            for i, value in enumerate(values):
+                if not _is_number(value):
+                    continue
+                aht_plain[channel][0] += value
+                aht_plain[channel][1] += 1
+                if volumes is not None and _is_number(volumes[i]):
+                    aht_weighted[channel] += value * volumes[i]
+
+    channels = {}
+    for channel in CHANNELS:
+        summary = {}
+        if channel in seen and volume[channel]:
+            summary['annual_calls'] = int(round(volume[channel]))
+            summary['weekly_calls'] = int(round(volume[channel] / WEEKS_PER_YEAR))
+        if volume[channel] and aht_weighted[channel]:
+            summary['aht'] = round(aht_weighted[channel] / volume[channel], 1)
+        elif aht_plain[channel][1]:
+            summary['aht'] = round(aht_plain[channel][0] / aht_plain[channel][1], 1)
+        if summary:
+            channels[channel] = summary
+    return {'layout': 'monthly', 'rows': count, 'channels': channels}
+
+
+def _import_weekly(header, rows, channel):
+    """Average weekly and annual volume plus AHT for one channel from weekly rows"""
+    positions = _header_map(header, set(WEEKDAYS) | {'total volume', 'average aht'})
+    total_volume = 0.0
+    aht_weighted = 0.0
+    weeks = 0
+    count = 0
+    for labels, columns in _batches(rows, positions.values()):
+        count += len(labels)
+        for i in range(len(labels)):
+            week_total = columns[positions['total volume']][i] if 'total volume' in positions else float('nan')
+            if not _is_number(week_total):
+                days = [columns[positions[d]][i] for d in WEEKDAYS if d in positions]
+                days = [v for v in days if _is_number(v)]
+                week_total = sum(days) if days else float('nan')
+            if not _is_number(week_total):
+                continue
+            weeks += 1
+            total_volume += week_total
+            if 'average aht' in positions and _is_number(columns[positions['average aht']][i]):
+                aht_weighted += columns[positions['average aht']][i] * week_total
+
+    summary = {}
+    if weeks:
+        weekly = total_volume / weeks
+        summary['weekly_calls'] = int(round(weekly))
+        summary['annual_calls'] = int(round(weekly * WEEKS_PER_YEAR))
+    if total_volume and aht_weighted:
+        summary['aht'] = round(aht_weighted / total_volume, 1)
+    return {'layout': 'weekly', 'rows': count, 'weeks': weeks, 'channels': {channel: summary} if summary else {}}
+
+
+def _import_intraday(header, rows, channel):
+    """Per-interval average volume/AHT profile plus weekly and annual totals for one channel"""
+    has_date = str(header[0] or '').strip().lower() == 'date'
+    if has_date:
+        # Shift so the time interval is the label column; the date is kept separately
+        header = header[1:]
+        dates = set()
+
+        def strip_dates(source):
+            for row in source:
+                if row and row[0] not in (None, ''):
+                    dates.add(row[0])
+                yield row[1:] if row else row
+
+        rows = strip_dates(rows)
+
+    positions = _header_map(header, {'volume', 'aht (minutes)'})
+    if 'volume' not in positions:
+        raise WorkbookImportError('Intraday workbook needs a Volume column')
+
+    volume = [0.0] * INTERVALS_PER_DAY
+    aht_weighted = [0.0] * INTERVALS_PER_DAY
+    samples = [0] * INTERVALS_PER_DAY
+    count = 0
+    for labels, columns in _batches(rows, positions.values()):
+        count += len(labels)
+        volumes = columns[positions['volume']]
+        ahts = columns[positions['aht (minutes)']] if 'aht (minutes)' in positions else None
+        for i, label in enumerate(labels):
+            slot = _interval_index(label)
+            if not _is_number(volumes[i]):
+                continue
+            samples[slot] += 1
+            volume[slot] += volumes[i]
+            if ahts is not None and _is_number(ahts[i]):
+                aht_weighted[slot] += ahts[i] * 60 * volumes[i]
+
+    days = len(dates) if has_date and dates else max(samples) or 1
+    total = sum(volume)
+    profile_volume = [round(v / days, 2) for v in volume]
+    profile_aht = [round(aht_weighted[i] / volume[i], 1) if volume[i] else 0.0 for i in range(INTERVALS_PER_DAY)]
+
+    summary = {}
+    if total:
+        summary['weekly_calls'] = int(round(total / days * 7))
+        summary['annual_calls'] = int(round(total / days * DAYS_PER_YEAR))
+        if any(aht_weighted):
+            summary['aht'] = round(sum(aht_weighted) / total, 1)
+    return {
+        'layout': 'intraday',
+        'rows': count,
+        'days': days,
+        'channels': {channel: summary} if summary else {},
+        'intraday': {
+            'channel': channel,
+            'intervals': [f'{slot // 2:02d}:{(slot % 2) * 30:02d}' for slot in range(INTERVALS_PER_DAY)],
+            'volume': profile_volume,
+            'aht': profile_aht,
+        },
+    }
+
+
+def import_workbook(path, channel='inbound'):
+    """Parse an uploaded template workbook into per-channel volume and AHT figures
+
+    Weekly and intraday templates carry a single series, which is attributed to
+    ``channel``.
+    """
+    if channel not in CHANNELS:
+        raise WorkbookImportError(f'Unknown channel {channel!r}')
+    rows = iter_rows(path)
+    try:
+        header = next(row for row in rows if row and any(cell not in (None, '') for cell in row))
+    except StopIteration:
+        raise WorkbookImportError('Workbook is empty')
+
+    first = str(header[0] or '').strip().lower()
+    second = str(header[1] if len(header) > 1 and header[1] is not None else '').strip().lower()
+    if first == 'month':
+        return _import_monthly(header, rows)
+    if first == 'week':
+        return _import_weekly(header, rows, channel)
+    if first == 'time interval' or (first == 'date' and second == 'time interval'):
+        return _import_intraday(header, rows, channel)
+    raise WorkbookImportError('Workbook does not match the monthly, weekly or intraday template layout')
+
+
+def apply_import(sizing_data, summary, measures=('annual_calls', 'weekly_calls', 'aht')):
+    """Fill blank per-channel figures on a sizing record from an import summary"""
+    for channel, values in summary['channels'].items():
+        target = sizing_data.setdefault(channel, {})
+        for measure in measures:
+            if measure in values and target.get(measure) in (None, ''):
+                target[measure] = values[measure]
+    if 'intraday' in summary and 'intraday' not in sizing_data:
+        sizing_data['intraday'] = summary['intraday']
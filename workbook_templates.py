@@ -0,0 +1,171 @@
+"""Monthly, weekly and intraday volume/AHT template workbooks.
+
+The blank templates never change, so each one is built once per process and its
+bytes are kept with a content-hash ETag (the workbook's created date is pinned
+so every worker produces identical bytes). Prefilled templates carry the
+client's figures from the session and are written in xlsxwriter's
+``constant_memory`` mode to a temporary file, one row at a time.
+"""
+import hashlib
+import io
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+
+import xlsxwriter
+
+from staffing import INTERVAL_LABELS, parse_duration
+from workbook_import import CHANNELS, WEEKS_PER_YEAR
+
+MONTHS = ('January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+TEMPLATES = {
+    'monthly': ('Monthly Volume and AHT',
+                ['Month', 'Inbound Calls', 'Outbound Calls', 'Back-Office Tasks',
+                 'Social Media', 'Chat', 'Email', 'Inbound AHT', 'Outbound AHT',
+                 'Back-Office AHT', 'Social Media AHT', 'Chat AHT', 'Email AHT']),
+    'weekly': ('Weekly Volume and AHT',
+               ['Week', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                'Saturday', 'Sunday', 'Total Volume', 'Average AHT']),
+    'intraday': ('Intraday Volume and AHT',
+                 ['Time Interval', 'Volume', 'AHT (minutes)', 'Service Level %',
+                  'Abandonment %', 'Calls Answered', 'Calls Offered']),
+}
+TEMPLATE_CREATED = datetime(2025, 1, 1)
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAX_PREFILL_DAYS = 366
+
+_static = {}
+_static_lock = threading.Lock()
+
+
+def _blank_rows(template_type):
+    """Row labels of a blank template"""
+    if template_type == 'monthly':
+        return [[month] for month in MONTHS]
+    if template_type == 'weekly':
+        return [[f'Week {week}'] for week in range(1, WEEKS_PER_YEAR + 1)]
+    return [[label] for label in INTERVAL_LABELS]
+
+
+def write_template(output, template_type, rows, headers=None, constant_memory=False):
+    """Write a template workbook (header row plus data rows) to a path or file object"""
+    sheet_name, default_headers = TEMPLATES[template_type]
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': constant_memory})
+    workbook.set_properties({'created': TEMPLATE_CREATED})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, headers or default_headers)
+    for row, values in enumerate(rows, 1):
+        worksheet.write_row(row, 0, values)
+    workbook.close()
+
+
+def static_template(template_type):
+    """(bytes, etag) of a blank template, built on first use"""
+    cached = _static.get(template_type)
+    if cached is None:
+        with _static_lock:
+            cached = _static.get(template_type)
+            if cached is None:
+                output = io.BytesIO()
+                write_template(output, template_type, _blank_rows(template_type))
+                data = output.getvalue()
+                cached = _static[template_type] = (data, hashlib.sha256(data).hexdigest()[:32])
+    return cached
+
+
+def _number(value):
+    """Float from a stored figure; None when blank or not numeric"""
+    try:
+        return float(value) if value not in (None, '') else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _aht_seconds(values):
+    """A channel's AHT in seconds; None when blank or unreadable"""
+    try:
+        return parse_duration(values.get('aht'))
+    except ValueError:
+        return None
+
+
+def _weekly_volume(values):
+    """A channel's weekly volume from its weekly or annual figure"""
+    weekly = _number(values.get('weekly_calls'))
+    if weekly is None:
+        annual = _number(values.get('annual_calls'))
+        weekly = annual / WEEKS_PER_YEAR if annual is not None else None
+    return weekly
+
+
+def _prefill_monthly(sizing):
+    """Monthly rows with each channel's annual volume spread evenly and its AHT"""
+    volumes = []
+    ahts = []
+    for channel in CHANNELS:
+        values = sizing.get(channel) or {}
+        annual = _number(values.get('annual_calls'))
+        if annual is None and _weekly_volume(values) is not None:
+            annual = _weekly_volume(values) * WEEKS_PER_YEAR
+        volumes.append(round(annual / len(MONTHS)) if annual is not None else None)
+        ahts.append(_aht_seconds(values))
+    for month in MONTHS:
+        yield [month] + volumes + ahts
+
+
+def _prefill_weekly(sizing, channel):
+    """Weekly rows for one channel: daily split, total and AHT"""
+    values = sizing.get(channel) or {}
+    weekly = _weekly_volume(values)
+    daily = [round(weekly / len(WEEKDAYS))] * len(WEEKDAYS) if weekly is not None else [None] * len(WEEKDAYS)
+    total = sum(daily) if weekly is not None else None
+    aht = _aht_seconds(values)
+    for week in range(1, WEEKS_PER_YEAR + 1):
+        yield [f'Week {week}'] + daily + [total, aht]
+
+
+def _prefill_intraday(sizing, channel, days, start):
+    """Intraday rows for one channel over a number of days, from its profile or an even split"""
+    values = sizing.get(channel) or {}
+    intraday = sizing.get('intraday') or {}
+    if intraday.get('channel') == channel and intraday.get('volume'):
+        volumes = [round(volume, 2) for volume in intraday['volume']]
+        ahts = [round(aht / 60, 2) if aht else None for aht in intraday['aht']]
+    else:
+        weekly = _weekly_volume(values)
+        aht = _aht_seconds(values)
+        per_interval = round(weekly / 7 / len(INTERVAL_LABELS), 2) if weekly is not None else None
+        volumes = [per_interval] * len(INTERVAL_LABELS)
+        ahts = [round(aht / 60, 2) if aht else None] * len(INTERVAL_LABELS)
+    for day in range(days):
+        day_label = (start + timedelta(days=day)).isoformat()
+        for label, volume, aht in zip(INTERVAL_LABELS, volumes, ahts):
+            yield [day_label, label, volume, aht]
+
+
+def prefilled_template(template_type, sizing, channel='inbound', days=1, start=None):
+    """Temporary file holding a template prefilled with the session's sizing figures"""
+    if channel not in CHANNELS:
+        raise ValueError(f'Unknown channel {channel!r}')
+    if not 1 <= days <= MAX_PREFILL_DAYS:
+        raise ValueError(f'days must be between 1 and {MAX_PREFILL_DAYS}')
+    headers = None
+    if template_type == 'monthly':
+        rows = _prefill_monthly(sizing)
+    elif template_type == 'weekly':
+        rows = _prefill_weekly(sizing, channel)
+    else:
+        headers = ['Date'] + TEMPLATES['intraday'][1]
+        rows = _prefill_intraday(sizing, channel, days, start or date.today())
+
+    output = tempfile.TemporaryFile()
+    try:
+        write_template(output, template_type, rows, headers=headers, constant_memory=True)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output